@@ -1,27 +1,58 @@
 #bank.py
+import copy
 import random
-from saveload import load_customers, save_customers, load_bank_data, save_bank_data
-from invest import StockMarket
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+from saveload import (load_customers, save_customers, load_bank_data, save_bank_data, full_save_due,
+                      saves_changes, snapshot_customers)
+from invest import StockMarket, load_stock_catalog
+from ledger import LoanBook, DepositBook, RateIndex
+from ringbuffer import RingBuffer, DayRingBuffer
+from economy import load_economy_model
+from profiler import PhaseTimer
+from scheduler import EventCalendar
+from customers import CustomerRegistry, CustomerTable
+from ranking import RankIndex, Window
+from writer import SaveWriter
 
 ECONOMY_FILE = "files/economycycle.json"
 
-class Bank:
-    last_economic_event: str
+DEPOSIT_RATE = 0.01  # yearly, times interest_rate_multiplier
+CREDIT_BANDS = [
+    ("Poor", 300, 449),
+    ("Fair", 450, 599),
+    ("Good", 600, 699),
+    ("Very Good", 700, 799),
+    ("Excellent", 800, 850)
+]
+
+# Bounded feeds: entries pushed out are appended to these archive files
+ARCHIVE_FOLDER = "data/archive"
+HISTORY_DAYS = 30
+HISTORY_CAPACITY = 1000
+TRANSACTIONS_CAPACITY = 500
+EVENT_MESSAGES_CAPACITY = 100
 
-    def __init__(self):
+SNAPSHOT_ROWS = 100  # deposit/loan rows per GUI snapshot unless the panels ask for another window
+
+class Bank:
+    def __init__(self, load=True):
         self.balance = 20000.0
-        self.loans = []          # [amount, days_left, accrued, rate, customer_id]
+        self.rates = RateIndex()  # interest_rate_multiplier history for lazy interest
+        self.loans = LoanBook(self.rates)  # rows: amount, days_left, accrued, rate, customer_id, loan_id
         self.central_loans = []  # [amount, days_left, accrued, rate]
         self.interest_earned = 0.0
-        self.deposits = []       # [amount, accrued, customer_id]
+        self.deposits = DepositBook(self.rates, DEPOSIT_RATE)  # one row per customer: amount, unpaid accrued interest
         self.day = 0
-        self.history = []        # [(day, description)]
+        self.history = DayRingBuffer(HISTORY_CAPACITY, HISTORY_DAYS, f"{ARCHIVE_FOLDER}/history.jsonl")  # [(day, description)]
         self.next_customer_id = 1
-        self.customers = {}      # customer_id: {id, loans, deposits, deposit_balance, credit_score}
+        self.customers = CustomerTable()  # customer_id: {id, loans, deposits, deposit_balance, credit_score}
+        self.customers.attach(self.loans, self.deposits)  # "loans" and "deposits" are read from the books
         self.running = True
         self.pending_event = None
-        self.days_since_last_collection = []
-        self.transaction_values = []
+        self.last_collection_day = 0  # days_since_last_collection = day - last_collection_day
+        self.transaction_values = RingBuffer(TRANSACTIONS_CAPACITY, f"{ARCHIVE_FOLDER}/transactions.jsonl")
         self.monthly_interest_income_history = []
         self.total_paid = 0.0
         self.total_collected = 0.0
@@ -29,44 +60,65 @@ class Bank:
         self.economic_status = "Normal"  # Can be: Normal, Boom, Recession, Inflation, Crisis
         self.economic_multiplier = 1.0  # Multiplier for deposits
         self.interest_rate_multiplier = 1.0  # Multiplier for interest rates
-        self.days_since_last_economic_change = 0
+        self.last_economic_change_day = 0
         self.economic_change_interval = 182  # Approximately half a year (365/2)
+        self.economy_path = deque()  # pre-sampled upcoming state indices (headless runs)
+        self.last_economic_event = None  # newest economic change message, for the GUI
+        self.economic_event_seq = 0  # bumped with every change so the GUI can tell it has not shown it yet
         # Income
         self.yearly_income = 0.0
         self.monthly_income = 0.0
         # Add tax system
-        self.days_since_last_tax = 0
+        self.last_tax_day = 0
         self.tax_interval = 365  # One year
         self.tax_rate = 0.25  # 25% tax rate (can be adjusted based on economic status)
         self.taxes_paid_history = []  # Track historical tax payments
+        self.central_repayment_failures = 0  # days a matured central bank loan could not be repaid
+        self.timings = PhaseTimer()  # per-phase wall time of advance_day
+        # Running aggregates for the dashboard (loan and deposit interest totals live in the books)
+        self.total_deposit_balance = 0.0  # sum of the customers' deposit_balance
+        self.credit_band_counts = {band: 0 for band, _, _ in CREDIT_BANDS}  # customers per band
+        self.registry = CustomerRegistry()  # customer ids for O(1) random picks (all / positive balance)
+        # Largest accounts first, keyed on principal + accrued when they last changed (for the GUI panels)
+        self.deposit_ranking = RankIndex()  # customer ids
+        self.loan_ranking = RankIndex()     # loan ids
+        self.calendar = EventCalendar()  # upcoming days with real work (fast_forward)
         # event messages to main.py gui
-        self.event_messages = []
+        self.event_messages = RingBuffer(EVENT_MESSAGES_CAPACITY, f"{ARCHIVE_FOLDER}/events.jsonl")
         #investing
         self.stock_market = StockMarket(self)
         self.owned_stocks = []  # This will be managed by StockMarket
+        # Persistence: when False, saves are deferred until checkpoint() (headless runs)
+        self.autosave = True
+        # Saves requested inside batch() (or with autosave off) only mark state dirty
+        self.batch_depth = 0
+        self.dirty_data = False
+        self.dirty_customers = set()
+        self.dirty_all_customers = False
+        self.writer = None  # SaveWriter doing the disk writes on its own thread (start_writer)
+        self.history_logger = None  # history.HistoryLogger every history entry is also logged to (the GUI sets one)
 
 
         # Load data
-        self.load_data()
+        if load:
+            self.load_data()
+        self.rebuild_calendar()
 
     # ---------- History ----------
     def add_history(self, description):
         self.history.append((self.day, description))
-        self.history = [h for h in self.history if self.day - h[0] < 30]
+        self.history.expire(self.day)
+        if self.history_logger is not None:
+            self.history_logger.log(self.day, description)
 
     # ---------- Customers ----------
     def new_customer(self):
         """Create a new customer with unique ID and default values."""
         cid = self.next_customer_id
-        score_ranges = [
-            ("Poor", 300, 449),
-            ("Fair", 450, 599),
-            ("Good", 600, 699),
-            ("Very Good", 700, 799),
-            ("Excellent", 800, 850)
-        ]
-        _, min_score, max_score = random.choice(score_ranges)
+        band, min_score, max_score = random.choice(CREDIT_BANDS)
         credit_score = random.randint(min_score, max_score)
+        self.credit_band_counts[band] += 1
+        self.registry.add(cid)
 
         self.customers[cid] = {
             "id": cid,
@@ -76,102 +128,169 @@ class Bank:
             "deposit_balance": 0.0
         }
         self.next_customer_id += 1
-        self.save_customers()
+        self.save_customers([cid])
         return cid
 
     def add_customer(self):
         return self.new_customer()
 
-    def save_customers(self):
-        save_customers(self.customers)
+    @staticmethod
+    def credit_band(score):
+        for band, min_score, max_score in CREDIT_BANDS:
+            if score <= max_score:
+                return band
+        return CREDIT_BANDS[-1][0]
+
+    def recount_aggregates(self):
+        """Recompute the running aggregates from the customers (loading all of them)."""
+        self.total_deposit_balance = 0.0
+        self.credit_band_counts = {band: 0 for band, _, _ in CREDIT_BANDS}
+        for customer in self.customers.values():
+            self.total_deposit_balance += customer.get("deposit_balance", 0.0)
+            self.credit_band_counts[self.credit_band(customer["credit_score"])] += 1
+        self.deposits.recount()
+        self.rank_all_deposits()
+        self.rank_all_loans()
+
+    # ---------- Rankings ----------
+    def rank_deposits(self, customer_id):
+        """Re-key one customer in deposit_ranking after their deposit changed (amount + accrued)."""
+        if customer_id in self.deposits:
+            self.deposit_ranking.update(customer_id, self.deposits.amount_of(customer_id) + self.deposits.accrued_of(customer_id))
+        else:
+            self.deposit_ranking.discard(customer_id)
+
+    def rank_all_deposits(self):
+        """Rebuild deposit_ranking from the deposit book (amount + accrued at each row's last settlement)."""
+        self.deposit_ranking.rebuild(*self.deposits.rank_values())
+
+    def rank_all_loans(self):
+        """Rebuild loan_ranking from the loan book (amount + accrued at each loan's last settlement)."""
+        loans = self.loans
+        self.loan_ranking.rebuild(loans.loan_id[:loans.size], loans.amount[:loans.size] + loans.accrued[:loans.size])
+
+    def totals(self):
+        """Dashboard totals, all kept up to date at mutation time (O(1))."""
+        return {
+            "customers": len(self.customers),
+            "deposit_balance": self.total_deposit_balance,
+            # never negative; max() hides float noise right after a payout
+            "deposit_interest_owed": max(self.deposits.owed_interest(), 0.0),
+            "loans": len(self.loans),
+            "loan_principal": self.loans.principal_total,
+            "loan_interest_accrued": max(self.loans.accrued_total(), 0.0),
+            "credit_bands": dict(self.credit_band_counts),
+        }
+
+    def save_customers(self, customer_ids=None):
+        """Save customers; in journaled mode only `customer_ids` are written (None = all)."""
+        if self.autosave and not self.batch_depth:
+            self.write_customers(customer_ids)
+        elif customer_ids is None:
+            self.dirty_all_customers = True
+        else:
+            self.dirty_customers.update(customer_ids)
+
+    def write_customers(self, customer_ids=None):
+        if customer_ids is not None and full_save_due():
+            customer_ids = None
+        if self.writer is not None:
+            self.writer.save_customers(snapshot_customers(self.customers, customer_ids), customer_ids)
+        else:
+            save_customers(self.customers, customer_ids)
+
+    def adopt_legacy_deposits(self):
+        """
+        Saves from before the deposit book held the unpaid interest kept it in
+        the customers' deposit entries: move it into the book (loads the
+        customers with a deposit, once).
+        """
+        for cid in self.deposits.customer_ids():
+            entries = self.customers.legacy_deposits(cid) if cid in self.customers else []
+            self.deposits.adopt_legacy(cid, entries)
+        self.deposits.recount()
 
     def load_customers(self):
-        self.customers = load_customers()
+        self.customers = load_customers()  # int keys; may be lazily loaded by the backend
+        self.customers.attach(self.loans, self.deposits)
         if self.customers:
-            self.customers = {int(k): v for k, v in self.customers.items()}
             self.next_customer_id = max(self.customers.keys()) + 1
 
     # ---------- Deposits ----------
     def deposit(self, amount, customer_id=None):
         if customer_id is None:
             if self.customers and random.random() < 0.5:
-                customer_id = random.choice(list(self.customers.keys()))
+                customer_id = self.registry.sample()
             else:
                 customer_id = self.new_customer()
         elif customer_id not in self.customers:
             customer_id = self.new_customer()
 
-        before_balance = self.customers[customer_id].get("deposit_balance", 0.0)
-        after_balance = round(before_balance + amount, 2)
-
-        # --- Update global deposits list ---
-        existing = next((d for d in self.deposits if d[2] == customer_id), None)
-        if existing:
-            existing[0] = round(existing[0] + amount, 2)
-        else:
-            self.deposits.append([round(amount, 2), 0.0, customer_id])
-
-        # --- Update customer deposits list ---
-        cust_existing = next((d for d in self.customers[customer_id]["deposits"]), None)
-        if cust_existing:
-            cust_existing["amount"] = round(cust_existing["amount"] + amount, 2)
-        else:
-            self.customers[customer_id]["deposits"].append({"amount": round(amount, 2), "accrued": 0.0})
-
-        # --- Update balances ---
-        self.customers[customer_id]["deposit_balance"] = after_balance
-        self.balance = round(self.balance + amount, 2)
+        before_balance, after_balance = self.credit(customer_id, amount)
 
         # --- History & Save ---
         self.add_history(f"Customer {customer_id} deposited ${amount:.2f} (had ${before_balance:.2f}, now ${after_balance:.2f})")
         self.transaction_values.append(('+', amount))
         self.save_data()
-        self.save_customers()
+        self.save_customers([customer_id])
         return customer_id
 
+    def credit(self, customer_id, amount):
+        """Book a deposit by an existing customer (no history or save). Returns (before, after) balance."""
+        customer = self.customers[customer_id]
+        before_balance = customer.get("deposit_balance", 0.0)
+        after_balance = round(before_balance + amount, 2)
+
+        # --- Update the deposit book ---
+        self.deposits.change(customer_id, amount)
+
+        # --- Update balances ---
+        customer["deposit_balance"] = after_balance
+        self.total_deposit_balance += after_balance - before_balance
+        self.registry.update_balance(customer_id, after_balance)
+        self.rank_deposits(customer_id)
+        self.balance = round(self.balance + amount, 2)
+        return before_balance, after_balance
+
     def withdraw(self, amount, customer_id=None):
         if customer_id is None:
-            eligible_deposits = [d for d in self.deposits if d[0] > 0]
-            if not eligible_deposits:
+            customer_id = self.registry.sample_funded()
+            if customer_id is None:
                 self.event_messages.append("No customer deposits available for withdrawal.")
                 return False
-            d = random.choice(eligible_deposits)
-            customer_id = d[2]
-        else:
-            eligible_deposits = [d for d in self.deposits if d[2] == customer_id and d[0] > 0]
-            if not eligible_deposits:
-                self.event_messages.append(f"Customer {customer_id} has no funds to withdraw.")
-                return False
-            d = random.choice(eligible_deposits)
+        if self.deposits.amount_of(customer_id) <= 0:
+            self.event_messages.append(f"Customer {customer_id} has no funds to withdraw.")
+            return False
+        amount, before_balance, after_balance = self.debit(customer_id, amount)
 
-        before_balance = self.customers[customer_id].get("deposit_balance", 0.0)
+        # --- History & Save ---
+        self.add_history(f"Customer {customer_id} withdrew ${amount:.2f} (had ${before_balance:.2f}, now ${after_balance:.2f})")
+        self.transaction_values.append(('-', amount))
+        self.save_data()
+        self.save_customers([customer_id])
+        return True
+
+    def debit(self, customer_id, amount):
+        """
+        Book a withdrawal from the customer's deposit (no history or save).
+        Returns (amount, before, after): amount is capped at the balance.
+        """
+        customer = self.customers[customer_id]
+        before_balance = customer.get("deposit_balance", 0.0)
         if amount > before_balance:
             amount = before_balance
         after_balance = round(before_balance - amount, 2)
 
-        # --- Update global deposits ---
-        d[0] = round(d[0] - amount, 2)
-        if d[0] <= 0:
-            self.deposits.remove(d)
-
-        # --- Update customer deposits ---
-        for cd in list(self.customers[customer_id]["deposits"]):
-            if cd["amount"] >= amount:
-                cd["amount"] = round(cd["amount"] - amount, 2)
-                if cd["amount"] <= 0:
-                    self.customers[customer_id]["deposits"].remove(cd)
-                break
+        # --- Update the deposit book (the row closes when it is emptied) ---
+        self.deposits.change(customer_id, -amount)
 
         # --- Update balances ---
-        self.customers[customer_id]["deposit_balance"] = after_balance
+        customer["deposit_balance"] = after_balance
+        self.total_deposit_balance += after_balance - before_balance
+        self.registry.update_balance(customer_id, after_balance)
+        self.rank_deposits(customer_id)
         self.balance = round(self.balance - amount, 2)
-
-        # --- History & Save ---
-        self.add_history(f"Customer {customer_id} withdrew ${amount:.2f} (had ${before_balance:.2f}, now ${after_balance:.2f})")
-        self.transaction_values.append(('-', amount))
-        self.save_data()
-        self.save_customers()
-        return True
+        return amount, before_balance, after_balance
 
     # ---------- Loans ----------
     def give_loan(self, amount, years, rate=None, customer_id=None, require_approval=True, get_input_func=None):
@@ -184,12 +303,7 @@ class Bank:
 
         # Determine interest rate if not provided
         if rate is None:
-            score = self.customers[customer_id]["credit_score"]
-            if score < 450: rate=0.10
-            elif score < 600: rate=0.08
-            elif score < 700: rate=0.06
-            elif score < 800: rate=0.04
-            else: rate=0.02
+            rate = self.loan_rate(self.customers[customer_id]["credit_score"])
 
         # Optional interactive approval
         if require_approval and get_input_func:
@@ -205,28 +319,37 @@ class Bank:
                 return False
 
         # Register loan
-        days = int(years * 365)
-        self.loans.append([amount, days, 0.0, rate, customer_id])
-        self.customers[customer_id]["loans"].append({"amount": amount, "days_left": days, "accrued": 0.0, "rate": rate})
-        self.balance -= amount
+        self.lend(customer_id, amount, years, rate)
         self.add_history(f"Loan granted ${amount} at {rate*100:.2f}% to customer {customer_id}")
         self.save_data()
-        self.save_customers()
+        self.save_customers([customer_id])
         return True
 
+    @staticmethod
+    def loan_rate(score):
+        """Default yearly rate for a credit score."""
+        if score < 450: return 0.10
+        elif score < 600: return 0.08
+        elif score < 700: return 0.06
+        elif score < 800: return 0.04
+        return 0.02
+
+    def lend(self, customer_id, amount, years, rate):
+        """Book a loan (no funds check, history or save)."""
+        days = int(years * 365)
+        loan_id = self.loans.add(amount, days, rate, customer_id)
+        self.loan_ranking.update(loan_id, amount)
+        self.schedule_loans(days)
+        self.balance -= amount
+
     def collect_monthly_interest(self):
-        total_collected = 0.0
-        for loan in self.loans:
-            principal, days_left, accrued, rate, customer_id = loan
-            if accrued > 0:
-                self.balance += accrued
-                self.interest_earned += accrued
-                total_collected += accrued
-                loan[2] = 0.0
-                for cl in self.customers[customer_id]["loans"]:
-                    if cl["amount"] == principal and cl["days_left"] == days_left:
-                        cl["accrued"] = 0.0
-                        break
+        # Loans settle here and nowhere else, so keys only move for loans loaded with accrued interest
+        rerank = bool(self.loans.accrued[:self.loans.size].any())
+        total_collected = self.loans.collect_accrued()
+        if rerank:
+            self.rank_all_loans()
+        self.balance += total_collected
+        self.interest_earned += total_collected
         self.total_collected = total_collected
         if total_collected > 0:
             self.add_history(f"Collected ${total_collected:,.2f} in loan interest this month")
@@ -236,13 +359,17 @@ class Bank:
     def pay_monthly_interest(self):
         total_paid = 0.0
         if self.days_since_last_collection >= 30:
-            for cid, customer in self.customers.items():
-                for dep in customer.get("deposits", []):
-                    if dep["accrued"] > 0:
-                        customer["deposit_balance"] += dep["accrued"]
-                        total_paid += dep["accrued"]
-                        dep["accrued"] = 0.0
-                customer["deposit_balance"] = round(customer["deposit_balance"], 2)
+            # Only customers with a deposit row accrue interest, so the rest
+            # of the (possibly lazily loaded) customer table is never read
+            ids, paid = self.deposits.pay_all()
+            paid = np.maximum(paid, 0.0)
+            total_paid = float(paid.sum())
+            before, after = self.customers.add_to_balances(ids, paid)
+            self.total_deposit_balance += float((after - before).sum())
+            # Balances only grow, so only customers at zero or below can join the funded ids
+            for cid, balance in zip(ids[before <= 0].tolist(), after[before <= 0].tolist()):
+                self.registry.update_balance(cid, balance)
+            self.rank_all_deposits()  # the unpaid interest was part of the keys
             self.total_paid = total_paid
             if total_paid > 0:
                 self.balance -= total_paid   # Deduct all interest payouts here only!
@@ -324,29 +451,18 @@ class Bank:
 
     def update_economic_status(self):
         """Change economic status every half year with different effects"""
-        self.days_since_last_economic_change += 1
-
         if self.days_since_last_economic_change >= self.economic_change_interval:
             self.days_since_last_economic_change = 0
 
-            # load states and their effects from file
-            economic_states = [ECONOMY_FILE]
-
-            # Get current state index
-            current_state_index = next((i for i, state in enumerate(economic_states)
-                                        if state["name"] == self.economic_status), 0)
+            # states and their transition table (parsed once from file)
+            economy = load_economy_model(ECONOMY_FILE)
+            current_state = economy.state(self.economic_status)
 
             # Choose a new state (can be the same or different)
-            if random.random() < 0.7:  # 70% chance to change to a different state
-                if random.random() < 0.5:  # 50% chance for it to be normal
-                    # Select Normal state specifically
-                    new_state = next((s for s in economic_states if s["name"] == "Normal"), economic_states[0])
-                else:
-                    # Select any state except the current one
-                    available_states = [s for s in economic_states if s["name"] != self.economic_status]
-                    new_state = random.choice(available_states) if available_states else economic_states[0]
+            if self.economy_path:
+                new_state = economy.states[self.economy_path.popleft()]
             else:
-                new_state = economic_states[current_state_index]  # Stay in current state
+                new_state = economy.next_state(self.economic_status)
 
             # Apply the economic changes
             old_status = self.economic_status
@@ -356,12 +472,14 @@ class Bank:
 
             # Apply changes to existing deposits
             deposit_change_factor = new_state["deposit_multiplier"] / (
-                economic_states[current_state_index]["deposit_multiplier"] if old_status != "Normal" else 1.0
+                current_state["deposit_multiplier"] if old_status != "Normal" else 1.0
             )
 
-            for customer in self.customers.values():
-                for deposit in customer.get("deposits", []):
-                    deposit["amount"] = round(deposit["amount"] * deposit_change_factor, 2)
+            # Interest so far accrued on the old amounts, at the old rate
+            self.deposits.settle_all()
+            self.rates.set_multiplier(self.day, self.interest_rate_multiplier)
+            self.deposits.scale(deposit_change_factor)
+            self.rank_all_deposits()
 
             # Log the economic change
             self.add_history(f"Economic change: {old_status} → {new_state['name']}. {new_state['message']}")
@@ -370,6 +488,12 @@ class Bank:
 
         return None
 
+    def pregenerate_economy(self, days):
+        """Sample every economic change in the next `days` days at once (headless runs)."""
+        economy = load_economy_model(ECONOMY_FILE)
+        changes = economy.changes_within(days, self.economic_change_interval, self.days_since_last_economic_change)
+        self.economy_path = deque(economy.sample_path(self.economic_status, changes).tolist())
+
 
     # ---------- INVESTMENTS ------------
 
@@ -439,114 +563,423 @@ class Bank:
 
     # ---------- Day / Interest ----------
     def advance_day(self):
+        with self.timings.phase("day"):
+            self._advance_day()
+
+    def _advance_day(self):
+        timings = self.timings
         self.day += 1
-        self.days_since_last_collection += 1
-        self.days_since_last_tax += 1  # Add this
+        due = self.calendar.pop_due(self.day)
 
         #
-        if self.stock_market.update_market():
-            self.add_history("Stock market updated - new stocks available")
-            self.event_messages.append("Stock market updated - new stocks available")
+        with timings.phase("stock_market"):
+            if self.stock_market.update_market():
+                self.add_history("Stock market updated - new stocks available")
+                self.event_messages.append("Stock market updated - new stocks available")
 
         # Add tax payment logic
-        if self.days_since_last_tax >= self.tax_interval:
-            self.pay_taxes()
+        with timings.phase("taxes"):
+            if self.days_since_last_tax >= self.tax_interval:
+                self.pay_taxes()
 
         #Economic cycle: boom, normal, recession, etc
-        economic_event = self.update_economic_status()
-        if economic_event:
-            # Store for GUI display
-            self.last_economic_event = economic_event
-
-        # --- Customer loans accrual ---
-        for loan in self.loans[:]:
-            if loan[1] > 0:
-                daily_interest = loan[0] * loan[3] * self.interest_rate_multiplier / 365
-                loan[2] += daily_interest
-                loan[1] -= 1
-                customer_id = loan[4]
-                for cl in self.customers[customer_id]["loans"]:
-                    if cl["amount"] == loan[0] and cl["days_left"] == loan[1] + 1:
-                        cl["accrued"] += daily_interest
-                        cl["days_left"] = loan[1]
-                        break
-
-
-
-            else:
-                principal, _, accrued, rate, customer_id = loan
+        with timings.phase("economy"):
+            economic_event = self.update_economic_status()
+            if economic_event:
+                # Store for GUI display
+                self.last_economic_event = economic_event
+                self.economic_event_seq += 1
+
+        # Loan and deposit interest accrue lazily from here on (see RateIndex)
+        self.rates.advance(self.day)
+
+        # Customers whose records change today (journaled saves only write these)
+        touched = set()
+
+        # --- Matured customer loans (from the calendar) ---
+        with timings.phase("loans"):
+            matured = self.loans.matured() if any(kind == "loans" for kind, _ in due) else []
+            for loan_id in matured:
+                principal, _, accrued, rate, customer_id, _ = self.loans.get(loan_id)
                 self.balance += principal
                 self.add_history(f"Customer {customer_id} repaid loan principal of ${principal:,.2f}")
                 # record the transaction
                 self.transaction_values.append(('+', principal))
-                self.loans.remove(loan)
-
-                # --- Remove from customer loans list ---
-                for cl in list(self.customers[customer_id]["loans"]):
-                    if cl["amount"] == principal and cl["days_left"] <= 0:
-                        self.customers[customer_id]["loans"].remove(cl)
-                        break
 
+                # --- Remove the loan (the customer's loans are read from the book) ---
+                self.loans.remove(loan_id)
+                self.loan_ranking.discard(loan_id)
 
         # --- Central bank loans ---
-        for loan in self.central_loans[:]:
-            if loan[1] > 0:
-                loan[2] += loan[0] * loan[3] * self.interest_rate_multiplier / 365
-                loan[1] -= 1
-            else:
-                principal, _, accrued, rate = loan
-                total_due = principal + accrued
-                if self.balance >= total_due:
-                    self.balance -= total_due
-                    self.central_loans.remove(loan)
-                    self.add_history(f"Repaid central bank loan of ${total_due:,.2f}")
-                    self.event_messages.append(f"Repaid central bank loan of ${total_due:,.2f}")
+        with timings.phase("central_loans"):
+            for loan in self.central_loans[:]:
+                if loan[1] > 0:
+                    loan[2] += loan[0] * loan[3] * self.interest_rate_multiplier / 365
+                    loan[1] -= 1
                 else:
-                    self.add_history("WARNING: Could not repay central bank loan (insufficient funds)")
-
-        # --- Deposits daily accrual ---
-        current_deposit_rate = 0.01 * self.interest_rate_multiplier
-        for d in self.deposits:
-            daily_interest = d[0] * current_deposit_rate / 365
-            d[1] += daily_interest
-            customer_id = d[2]
-            for cd in self.customers[customer_id]["deposits"]:
-                if cd["amount"] >= d[0]:
-                    cd["accrued"] += daily_interest
-                    break
+                    principal, _, accrued, rate = loan
+                    total_due = principal + accrued
+                    if self.balance >= total_due:
+                        self.balance -= total_due
+                        self.central_loans.remove(loan)
+                        self.add_history(f"Repaid central bank loan of ${total_due:,.2f}")
+                        self.event_messages.append(f"Repaid central bank loan of ${total_due:,.2f}")
+                    else:
+                        self.central_repayment_failures += 1
+                        self.add_history("WARNING: Could not repay central bank loan (insufficient funds)")
 
         # --- Collect loan- and deposit interest every 30 days ---
-        if self.days_since_last_collection >= 30:
-            self.collect_monthly_interest()
-            self.pay_monthly_interest()
+        payday = self.days_since_last_collection >= 30
+        if payday:
+            with timings.phase("monthly_collection"):
+                self.collect_monthly_interest()
+                self.pay_monthly_interest()
+                touched.update(self.deposits.customer_ids())
 
-            # create monthly income
-            self.monthly_income = self.total_collected - self.total_paid
-            self.monthly_interest_income_history.append(self.monthly_income)
+                # create monthly income
+                self.monthly_income = self.total_collected - self.total_paid
+                self.monthly_interest_income_history.append(self.monthly_income)
 
-            # Calculate yearly income - ADD THIS
-            self.yearly_income = self.calculate_yearly_income()
+                # Calculate yearly income - ADD THIS
+                self.yearly_income = self.calculate_yearly_income()
 
-            # reset
-            self.days_since_last_collection = 0
+                # reset
+                self.days_since_last_collection = 0
+
+        self.schedule_recurring()
+
+        with timings.phase("save"):
+            self.save_data()
+            self.save_customers(touched)
+
+    # ---------- Event batches ----------
+    def apply_event_batch(self, batch):
+        """
+        Apply one day of random events drawn by events.draw_event_batch in a
+        single pass: one history line, one entry per direction in the
+        transaction feed and one save for the whole batch.
+
+        Deposits with customer id 0 (or an unknown id) open a new customer;
+        withdrawals are capped at what the customer still has; loans go to
+        new customers at the default rate while the bank can fund them.
+        The deposits and withdrawals are summed per customer with NumPy, so
+        each customer's deposit row is settled and re-ranked once. Returns a
+        summary message.
+        """
+        deposit_customers = batch["deposit_customers"].copy()
+        deposit_amounts = batch["deposit_amounts"]
+        withdraw_customers = batch["withdraw_customers"]
+        withdraw_amounts = batch["withdraw_amounts"]
+        with self.batch():
+            for i, customer_id in enumerate(deposit_customers.tolist()):
+                if customer_id not in self.customers:
+                    deposit_customers[i] = self.new_customer()
+
+            # Per customer: deposits, then the withdrawals in order while the deposit lasts
+            ids, inverse = np.unique(np.concatenate((deposit_customers, withdraw_customers)), return_inverse=True)
+            deposit_of = inverse[:len(deposit_customers)]
+            withdraw_of = inverse[len(deposit_customers):]
+            deposited = np.bincount(deposit_of, deposit_amounts, len(ids))
+            available = self.deposits.amounts_of(ids) + deposited
+            order = np.argsort(withdraw_of, kind="stable")
+            wanted = withdraw_amounts[order]
+            owner = withdraw_of[order]
+            ahead = np.cumsum(wanted) - wanted  # wanted before each withdrawal in the batch,
+            ahead -= ahead[np.searchsorted(owner, owner)]  # less what the customer's earlier ones wanted
+            left = available[owner] - ahead
+            done = left > 0
+            withdrawn = np.bincount(owner, np.minimum(wanted, np.maximum(left, 0.0)), len(ids))
+            withdrawn = np.minimum(withdrawn, self.customers.balances_of(ids) + deposited)
+
+            net = deposited - withdrawn
+            before, after = self.customers.add_to_balances(ids, net)
+            self.total_deposit_balance += float((after - before).sum())
+            for customer_id, delta, balance in zip(ids.tolist(), net.tolist(), after.tolist()):
+                self.deposits.change(customer_id, delta)
+                self.registry.update_balance(customer_id, balance)
+                self.rank_deposits(customer_id)
+            self.balance = round(self.balance + float(net.sum()), 2)
+            touched = set(ids.tolist())
+
+            deposits, withdrawals = len(deposit_amounts), int(done.sum())
+            deposited, withdrawn = float(deposit_amounts.sum()), float(withdrawn.sum())
+            lent = 0.0
+            loans = 0
+            for amount, years in zip(batch["loan_amounts"].tolist(), batch["loan_years"].tolist()):
+                if amount > self.balance:
+                    continue
+                customer_id = self.new_customer()
+                self.lend(customer_id, amount, years, self.loan_rate(self.customers[customer_id]["credit_score"]))
+                lent += amount
+                loans += 1
+                touched.add(customer_id)
+
+            message = (f"{deposits} deposits (${deposited:,.2f}), {withdrawals} withdrawals (${withdrawn:,.2f}), "
+                       f"{loans} loans (${lent:,.2f})")
+            if deposits or withdrawals or loans:
+                self.add_history(message)
+            if deposited:
+                self.transaction_values.append(('+', deposited))
+            if withdrawn:
+                self.transaction_values.append(('-', withdrawn))
+            self.save_data()
+            self.save_customers(touched)
+        return message
+
+    # ---------- Calendar ----------
+    @property
+    def days_since_last_collection(self):
+        return self.day - self.last_collection_day
+
+    @days_since_last_collection.setter
+    def days_since_last_collection(self, days):
+        self.last_collection_day = self.day - days
+
+    @property
+    def days_since_last_tax(self):
+        return self.day - self.last_tax_day
+
+    @days_since_last_tax.setter
+    def days_since_last_tax(self, days):
+        self.last_tax_day = self.day - days
+
+    @property
+    def days_since_last_economic_change(self):
+        return self.day - self.last_economic_change_day
+
+    @days_since_last_economic_change.setter
+    def days_since_last_economic_change(self, days):
+        self.last_economic_change_day = self.day - days
+
+    def schedule_loans(self, days_left):
+        # days_left counts down once a day; a loan is repaid the day after it reaches 0.
+        # One entry per repayment day: LoanBook.matured() finds the loans due then
+        day = self.day + days_left + 1
+        self.calendar.schedule(day, "loans", day)
+
+    def schedule_recurring(self):
+        """(Re)schedule collection, taxes, economy, market and central loans from their anchors."""
+        tomorrow = self.day + 1
+        calendar = self.calendar
+        calendar.schedule(max(self.last_collection_day + 30, tomorrow), "collection")
+        # Unpaid taxes are retried every day
+        calendar.schedule(max(self.last_tax_day + self.tax_interval, tomorrow), "tax")
+        calendar.schedule(max(self.last_economic_change_day + self.economic_change_interval, tomorrow), "economy")
+        calendar.schedule(max(self.stock_market.next_update_day(), tomorrow), "market")
+        for loan in self.central_loans:
+            # keyed by due day; a loan that could not be repaid is due again tomorrow
+            due = self.day + loan[1] + 1
+            calendar.schedule(due, "central_loan", due)
+
+    def rebuild_calendar(self):
+        self.calendar.clear()
+        self.schedule_recurring()
+        for days_left in np.unique(self.loans.current_days_left()).tolist():
+            self.schedule_loans(days_left)
+
+    def skip_days(self, days):
+        """
+        Advance `days` quiet days at once: no scheduled work falls inside them,
+        so only central loans accrue (customer loans and deposits accrue lazily).
+        """
+        with self.timings.phase("skip"):
+            self.day += days
+            self.rates.advance(self.day)
+            multiplier = self.interest_rate_multiplier
+            for loan in self.central_loans:
+                loan[2] += loan[0] * loan[3] * multiplier / 365 * days
+                loan[1] -= days
+            self.history.expire(self.day)
 
         self.save_data()
-        self.save_customers()
+
+    def next_work_day(self):
+        """The next day that has scheduled work (at least tomorrow)."""
+        self.schedule_recurring()
+        next_day = self.calendar.next_day()
+        return self.day + 1 if next_day is None else max(next_day, self.day + 1)
+
+    def fast_forward(self, days):
+        """
+        Advance `days` days with no events in between, jumping straight over
+        quiet days. Gives the same result as calling advance_day() `days`
+        times (up to float rounding of the accrued interest).
+        """
+        end = self.day + days
+        while self.day < end:
+            target = min(self.next_work_day(), end)
+            if target - self.day > 1:
+                self.skip_days(target - self.day - 1)
+            self.advance_day()
 
 
 
+    # ---------- GUI snapshot ----------
+    def snapshot(self, deposit_window=(0, SNAPSHOT_ROWS), loan_window=(0, SNAPSHOT_ROWS)):
+        """
+        Read-only copy of everything the GUI shows, built on the simulation
+        thread (SimulationWorker) and rendered on the Tk thread. Nothing in it
+        is shared with the live bank. The last economic event is always
+        included with its sequence number; the GUI shows it once per number,
+        so it is not lost when several snapshots are published between frames.
+
+        The deposit and loan lists are Windows of the rankings: only the
+        (start, count) rows asked for are built, with interest up to today.
+        """
+        market = self.stock_market
+        return {
+            "day": self.day,
+            "balance": self.balance,
+            "totals": self.totals(),
+            "economic_status": self.economic_status,
+            "economic_event": (self.economic_event_seq, self.last_economic_event),
+            "event_messages": self.event_messages[-2:],
+            "central_loans": [tuple(loan) for loan in self.central_loans],
+            "monthly_income": self.monthly_income,
+            "yearly_income": self.yearly_income,
+            "last_tax": self.taxes_paid_history[-1] if self.taxes_paid_history else None,
+            "days_since_last_collection": self.days_since_last_collection,
+            "deposits": self.deposit_rows(*deposit_window),
+            "loans": self.loan_rows(*loan_window),
+            "history": self.history[-8:],
+            "transactions": self.transaction_values[-8:],
+            "timings": self.timings.report(),
+            "available_stocks": copy.deepcopy(market.get_available_stocks()),
+            # (ticker, shares, avg_price, current_price)
+            "owned_stocks": [(ticker, shares, price, market.get_stock_value(ticker))
+                             for ticker, shares, price in market.get_owned_stocks()],
+            "portfolio_value": market.get_portfolio_value(),
+            "portfolio_performance": market.get_portfolio_performance(),
+        }
+
+    def deposit_rows(self, start, count):
+        """Window of (total, customer_id, principal, accrued) rows, largest deposits first."""
+        rows = []
+        for cid in self.deposit_ranking[start:start + count]:
+            principal = self.deposits.amount_of(cid)
+            accrued = self.deposits.accrued_of(cid)  # read-only: a redraw leaves the rows unsaved
+            rows.append((principal + accrued, cid, principal, accrued))
+        return Window(start, rows, len(self.deposit_ranking))
+
+    def loan_rows(self, start, count):
+        """Window of (total, customer_id, principal, accrued, days_left) rows, largest loans first."""
+        rows = []
+        for loan_id in self.loan_ranking[start:start + count]:
+            principal, days_left, accrued, _, cid, _ = self.loans.get(loan_id)
+            rows.append((principal + accrued, cid, principal, accrued, days_left))
+        return Window(start, rows, len(self.loan_ranking))
+
     # ---------- Persistence ----------
+    def __getstate__(self):
+        """
+        Pickle support (Monte Carlo clones): lazily loaded customers are
+        materialized; the writer and history logger (threads) stay behind.
+        """
+        state = self.__dict__.copy()
+        state["writer"] = None
+        state["history_logger"] = None
+        if not isinstance(self.customers, CustomerTable):
+            state["customers"] = CustomerTable(self.customers.items())
+        return state
+
     def save_data(self):
-        save_bank_data({
+        if self.autosave and not self.batch_depth:
+            self.write_data()
+        else:
+            self.dirty_data = True
+
+    @contextmanager
+    def batch(self):
+        """
+        Group the saves of a whole event or tick:
+
+            with bank.batch():
+                bank.advance_day()
+                deposit_event(bank)
+
+        Saves inside only mark state dirty; flush() writes once at the end.
+        """
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            if not self.batch_depth and self.autosave:
+                self.flush()
+
+    def flush(self):
+        """Write whatever was marked dirty since the last write."""
+        if self.dirty_data:
+            self.write_data()
+        if self.dirty_all_customers:
+            self.write_customers()
+        elif self.dirty_customers:
+            self.write_customers(self.dirty_customers)
+        self.clear_dirty()
+
+    def clear_dirty(self):
+        self.dirty_data = False
+        self.dirty_customers = set()
+        self.dirty_all_customers = False
+
+    # ---------- Background writer ----------
+    def start_writer(self):
+        """Hand all disk writes to a SaveWriter thread (the GUI calls this; headless runs save in-line)."""
+        if self.writer is None:
+            self.writer = SaveWriter()
+            for feed in (self.history, self.transaction_values, self.event_messages):
+                feed.archive_writer = self.writer
+            # Parse the read-only game files now too, so ticks never touch the disk
+            load_economy_model(ECONOMY_FILE)
+            try:
+                load_stock_catalog()
+            except FileNotFoundError:
+                pass
+        return self.writer
+
+    def stop_writer(self):
+        """Queue anything still dirty, wait until it is written and stop the writer thread."""
+        if self.writer is None:
+            return
+        self.flush()
+        self.stock_market.save_current_stocks()  # prices move daily but are saved on rotations and trades
+        for feed in (self.history, self.transaction_values, self.event_messages):
+            feed.flush_archive()
+            feed.archive_writer = None
+        self.writer.shutdown()
+        self.writer = None
+
+    def checkpoint(self):
+        """
+        Write bank data, customers and market state, even when autosave is off.
+        In journaled mode this compacts the journal into fresh snapshots.
+        """
+        self.write_data()
+        self.write_customers()
+        self.stock_market.save_current_stocks()
+        self.clear_dirty()
+
+    def write_data(self):
+        for feed in (self.history, self.transaction_values, self.event_messages):
+            feed.flush_archive()
+        # Lists the bank keeps mutating are copied, so the dict can go to the writer thread.
+        # The books and funded ids hand over only the rows changed since the last save
+        # when the backend can take that (take_changes).
+        full = not saves_changes()
+        data = {
             "balance": self.balance,
-            "loans": self.loans,
-            "central_loans": self.central_loans,
+            "loans": self.loans.take_changes(full),
+            "central_loans": [list(loan) for loan in self.central_loans],
             "interest_earned": self.interest_earned,
-            "deposits": self.deposits,
+            "deposits": self.deposits.take_changes(full),
+            "deposit_accrued": "unpaid",  # what the deposit rows' accrued holds, see adopt_legacy_deposits
+            "rate_segments": self.rates.to_list(),
             "day": self.day,
-            "history": self.history,
+            "history": self.history.to_list(),
+            "history_total": self.history.total,
             "next_customer_id": self.next_customer_id,
-            "monthly_interest_income_history": self.monthly_interest_income_history,
+            "next_loan_id": self.loans.next_loan_id,
+            "monthly_interest_income_history": list(self.monthly_interest_income_history),
             "days_since_last_collection": self.days_since_last_collection,
             "economic_status": self.economic_status,
             "economic_multiplier": self.economic_multiplier,
@@ -555,19 +988,28 @@ class Bank:
             "days_since_last_tax": self.days_since_last_tax,
             "monthly_income": self.monthly_income,
             "yearly_income": self.yearly_income,  # ADD THIS
-            "taxes_paid_history": self.taxes_paid_history,
-            "owned_stocks": self.owned_stocks
-        })
+            "taxes_paid_history": list(self.taxes_paid_history),
+            "central_repayment_failures": self.central_repayment_failures,
+            "total_deposit_balance": self.total_deposit_balance,
+            "credit_band_counts": dict(self.credit_band_counts),
+            "funded_customers": self.registry.funded.take_changes(full),
+            "owned_stocks": [list(stock) for stock in self.owned_stocks]
+        }
+        if self.writer is not None:
+            self.writer.save_data(data)
+        else:
+            save_bank_data(data)
 
     def load_data(self):
         data = load_bank_data()
         self.balance = data.get("balance", 20000)
-        self.loans = data.get("loans", [])
+        self.day = data.get("day", 0)
+        self.rates = RateIndex.from_list(data.get("rate_segments"), self.day, data.get("interest_rate_multiplier", 1.0))
+        self.loans = LoanBook.from_list(data.get("loans", []), data.get("next_loan_id", 1), self.rates)
         self.central_loans = data.get("central_loans", [])
         self.interest_earned = data.get("interest_earned", 0.0)
-        self.deposits = data.get("deposits", [])
-        self.day = data.get("day", 0)
-        self.history = data.get("history", [])
+        self.deposits = DepositBook.from_list(data.get("deposits", []), self.rates, DEPOSIT_RATE)
+        self.history.load([tuple(h) for h in data.get("history", [])], data.get("history_total"))
         self.next_customer_id = data.get("next_customer_id", 1)
         self.monthly_interest_income_history = data.get("monthly_interest_income_history", [])
         self.days_since_last_collection = data.get("days_since_last_collection", 0)
@@ -579,7 +1021,26 @@ class Bank:
         self.monthly_income = data.get("monthly_income", 0.0)
         self.yearly_income = data.get("yearly_income", 0.0)  # ADD THIS
         self.taxes_paid_history = data.get("taxes_paid_history", [])
+        self.central_repayment_failures = data.get("central_repayment_failures", 0)
         self.owned_stocks = data.get("owned_stocks", [])
         # Reinitialize stock market after loading data
         self.stock_market = StockMarket(self)
-        self.load_customers()
\ No newline at end of file
+        self.load_customers()
+        self.registry.rebuild(self.customers, data.get("funded_customers"))
+        # What was loaded is what is saved: later saves only need what changes from here
+        self.loans.mark_saved()
+        self.deposits.mark_saved()
+        if "funded_customers" in data:
+            self.registry.funded.mark_saved()
+        if data.get("deposit_accrued") != "unpaid":
+            self.adopt_legacy_deposits()
+        self.customers.drop_legacy()
+        if "total_deposit_balance" in data:
+            self.total_deposit_balance = data["total_deposit_balance"]
+            self.credit_band_counts.update(data.get("credit_band_counts", {}))
+            self.rank_all_deposits()
+            self.rank_all_loans()
+        else:
+            # Saves from before the aggregates were kept
+            self.recount_aggregates()
+        self.rebuild_calendar()
\ No newline at end of file
@@ -0,0 +1,248 @@
+# benchmark.py
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+import saveload
+from bank import Bank
+from customers import CustomerTable
+from invest import StockPrices
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+
+
+# ---------- Synthetic bank ----------
+def build_bank(customers, loan_ratio=0.5, deposit_ratio=0.7, seed=0):
+    """
+    Build an in-memory bank with `customers` customers, about `loan_ratio`
+    loans and `deposit_ratio` deposits per customer. Bypasses new_customer()
+    and friends so that building a million customers stays quick.
+    """
+    rng = random.Random(seed)
+    bank = Bank(load=False)
+    bank.autosave = False
+    bank.balance = 1e12  # enough to fund every loan
+    for feed in (bank.history, bank.transaction_values, bank.event_messages):
+        feed.archive_file = None
+
+    bank.customers = CustomerTable(capacity=customers)
+    bank.customers.attach(bank.loans, bank.deposits)
+    for cid in range(1, customers + 1):
+        customer = bank.customers.add(cid, rng.randint(300, 850))
+        if rng.random() < deposit_ratio:
+            amount = float(rng.randint(100, 10000))
+            bank.deposits.add(amount, cid)
+            customer["deposit_balance"] = amount
+        if rng.random() < loan_ratio:
+            amount = float(rng.randint(500, 20000))
+            days = rng.randint(1, 20) * 365
+            rate = rng.choice((0.02, 0.04, 0.06, 0.08, 0.10))
+            bank.loans.add(amount, days, rate, cid)
+    bank.next_customer_id = customers + 1
+    bank.rebuild_calendar()
+    bank.recount_aggregates()
+    bank.registry.rebuild(bank.customers)
+    return bank
+
+
+# ---------- Timing ----------
+def time_op(fn, min_time=0.5, max_calls=1000):
+    """Call fn() until min_time has passed (at least once). Returns (calls, seconds)."""
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while calls < max_calls and (calls == 0 or elapsed < min_time):
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return calls, elapsed
+
+
+def peak_memory(fn):
+    """Peak bytes allocated by Python during one call of fn()."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def bank_operations(bank, rng, data_dir):
+    """The operations to time, as name -> zero-argument callable."""
+    customer_ids = list(bank.customers.keys())
+
+    def deposit():
+        bank.deposit(rng.randint(100, 10000), customer_id=rng.choice(customer_ids))
+
+    def withdraw():
+        bank.withdraw(rng.randint(1, 500), customer_id=rng.choice(customer_ids))
+
+    def give_loan():
+        bank.give_loan(rng.randint(500, 20000), rng.randint(1, 20), customer_id=rng.choice(customer_ids),
+                       require_approval=False)
+
+    def pay_monthly_interest():
+        bank.days_since_last_collection = 30
+        bank.pay_monthly_interest()
+
+    # A synthetic stock universe with as many listings as customers, ticked a day at a time
+    price_rng = np.random.default_rng(rng.randrange(2 ** 32))
+    listings = StockPrices.synthetic(len(customer_ids), price_rng)
+
+    def update_stock_prices():
+        listings.step(price_rng, 1)
+
+    backend = saveload.JsonBackend(os.path.join(data_dir, "customers.json"),
+                                   os.path.join(data_dir, "bank_data.json"),
+                                   os.path.join(data_dir, "journal.jsonl"))
+
+    def save_data():
+        saveload.set_backend(backend)
+        bank.write_data()
+        bank.write_customers()
+
+    def load_data():
+        saveload.set_backend(backend)
+        loaded = Bank(load=False)
+        loaded.load_data()
+
+    snapshot = saveload.SnapshotBackend(os.path.join(data_dir, "customers.npz"),
+                                        os.path.join(data_dir, "bank_data.npz"), fallback=backend)
+
+    def save_snapshot():
+        saveload.set_backend(snapshot)
+        bank.write_data()
+        bank.write_customers()
+
+    def load_snapshot():
+        saveload.set_backend(snapshot)
+        loaded = Bank(load=False)
+        loaded.load_data()
+
+    return {
+        "advance_day": bank.advance_day,
+        "deposit": deposit,
+        "withdraw": withdraw,
+        "give_loan": give_loan,
+        "collect_monthly_interest": bank.collect_monthly_interest,
+        "pay_monthly_interest": pay_monthly_interest,
+        "update_stock_prices": update_stock_prices,
+        "save_data": save_data,
+        "load_data": load_data,
+        "save_snapshot": save_snapshot,
+        "load_snapshot": load_snapshot,
+    }
+
+
+def run_size(size, min_time, max_calls, trace_memory, seed):
+    print(f"\n== {size:,} customers ==")
+    start = time.perf_counter()
+    bank = build_bank(size, seed=seed)
+    result = {
+        "customers": size,
+        "loans": len(bank.loans),
+        "deposits": len(bank.deposits),
+        "build_seconds": time.perf_counter() - start,
+        "operations": {},
+    }
+    print(f"built in {result['build_seconds']:.1f}s ({result['loans']:,} loans, {result['deposits']:,} deposits)")
+
+    previous_backend = saveload.get_backend()
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as data_dir:
+        try:
+            # Saves run before their loads, so there is something to read
+            for name, fn in bank_operations(bank, rng, data_dir).items():
+                calls, seconds = time_op(fn, min_time, 3 if name.startswith(("save_", "load_")) else max_calls)
+                op = {"calls": calls, "seconds": seconds, "ops_per_sec": calls / seconds if seconds else None,
+                      "ms_per_op": seconds / calls * 1000}
+                if trace_memory:
+                    op["peak_kb"] = peak_memory(fn) / 1024
+                result["operations"][name] = op
+                peak = f", peak {op['peak_kb']:,.0f} KB" if trace_memory else ""
+                print(f"  {name:<26} {op['ops_per_sec']:>12,.1f} ops/sec  {op['ms_per_op']:>10.3f} ms/op{peak}")
+        finally:
+            saveload.set_backend(previous_backend)
+
+    result["advance_day_phases"] = bank.timings.stats()
+    result["max_rss_mb"] = max_rss_mb()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path):
+    """Print ops/sec ratios against an earlier results file."""
+    with open(baseline_path, "r") as f:
+        baseline = {r["customers"]: r for r in json.load(f)["results"]}
+    print(f"\n== compared with {baseline_path} ==")
+    for result in results:
+        old = baseline.get(result["customers"])
+        if not old:
+            continue
+        for name, op in result["operations"].items():
+            old_op = old["operations"].get(name)
+            if old_op and old_op.get("ops_per_sec") and op.get("ops_per_sec"):
+                print(f"  {result['customers']:>9,} {name:<26} x{op['ops_per_sec'] / old_op['ops_per_sec']:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Bank hot paths on synthetic banks.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma separated customer counts")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to spend on each operation")
+    parser.add_argument("--max-calls", type=int, default=1000, help="cap on calls per operation")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="results file (default: benchmark-<time>.json)")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    results = [run_size(size, args.min_time, args.max_calls, not args.no_memory, args.seed) for size in sizes]
+
+    output = args.output or f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+    with open(output, "w") as f:
+        json.dump({
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,398 @@
+# customers.py
+import random
+from collections.abc import ItemsView, MutableMapping, ValuesView
+
+import numpy as np
+
+from idindex import IdIndex
+from ledger import RowChanges
+
+
+class IdSet:
+    """
+    Set of ids with O(1) add, remove and uniform random choice.
+
+    Ids live in a NumPy array plus an id -> position IdIndex; removing swaps
+    the last id into the freed slot. With track=True the positions written
+    since the last take_changes() are kept in `changed` (None: all of them),
+    so a save writes only those slots.
+    """
+
+    def __init__(self, ids=(), track=False):
+        ids = np.fromiter(ids, dtype=np.int64) if not isinstance(ids, np.ndarray) else ids.astype(np.int64)
+        _, first = np.unique(ids, return_index=True)
+        if len(first) < len(ids):
+            ids = ids[np.sort(first)]
+        self.size = len(ids)
+        self.items = np.zeros(max(64, self.size), dtype=np.int64)
+        self.items[:self.size] = ids
+        self.pos = IdIndex.from_ids(ids)
+        self.track = track
+        self.changed = None
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return iter(self.items[:self.size].tolist())
+
+    def __contains__(self, i):
+        return i in self.pos
+
+    def add(self, i):
+        if i in self.pos:
+            return
+        if self.size == len(self.items):
+            items = np.zeros(2 * self.size, dtype=np.int64)
+            items[:self.size] = self.items
+            self.items = items
+        self.pos[i] = self.size
+        self.items[self.size] = i
+        self.mark(self.size)
+        self.size += 1
+
+    def discard(self, i):
+        pos = self.pos.pop(i, None)
+        if pos is None:
+            return
+        self.size -= 1
+        self.mark(self.size)
+        if pos < self.size:
+            last = int(self.items[self.size])
+            self.items[pos] = last
+            self.pos[last] = pos
+            self.mark(pos)
+
+    def mark(self, position):
+        if self.track and self.changed is not None:
+            self.changed.add(position)
+
+    def mark_saved(self):
+        self.changed = set()
+
+    def take_changes(self, full=False):
+        """RowChanges of the [position, id] slots written since the last call (all of them with full=True)."""
+        changed, self.changed = self.changed, set()
+        if full or changed is None:
+            return RowChanges([[p, i] for p, i in enumerate(self)], full=True, slots=True)
+        rows = [[p, int(self.items[p])] for p in sorted(changed) if p < self.size]
+        return RowChanges(rows, [p for p in sorted(changed) if p >= self.size], slots=True)
+
+    def choice(self, rng=random):
+        """A uniformly random id, or None when empty."""
+        return int(rng.choice(self.items[:self.size])) if self.size else None
+
+    def choices(self, count, rng):
+        """`count` ids drawn uniformly with replacement using a NumPy Generator (empty when empty)."""
+        if not self.size:
+            return np.zeros(0, dtype=np.int64)
+        return self.items[rng.integers(0, self.size, count)]
+
+
+class CustomerRegistry:
+    """
+    Customer ids for the random events: every customer, and the ones with a
+    positive deposit_balance. The bank keeps the funded subset up to date
+    whenever a balance changes, so sampling never scans the customers.
+    """
+
+    def __init__(self):
+        self.all = IdSet()
+        self.funded = IdSet(track=True)  # saved with the bank data
+
+    def __len__(self):
+        return len(self.all)
+
+    def add(self, customer_id, balance=0.0):
+        self.all.add(customer_id)
+        self.update_balance(customer_id, balance)
+
+    def remove(self, customer_id):
+        self.all.discard(customer_id)
+        self.funded.discard(customer_id)
+
+    def update_balance(self, customer_id, balance):
+        if balance > 0:
+            self.funded.add(customer_id)
+        else:
+            self.funded.discard(customer_id)
+
+    def sample(self, rng=random):
+        """Any customer id (None if there are none)."""
+        return self.all.choice(rng)
+
+    def sample_funded(self, rng=random):
+        """A customer id with a positive balance (None if there are none)."""
+        return self.funded.choice(rng)
+
+    def sample_many(self, count, rng):
+        """`count` customer ids (with replacement) as an array, from a NumPy Generator."""
+        return self.all.choices(count, rng)
+
+    def sample_funded_many(self, count, rng):
+        """`count` ids of customers with a positive balance (with replacement)."""
+        return self.funded.choices(count, rng)
+
+    def rebuild(self, customers, funded=None):
+        """
+        Fill from the customers mapping. With `funded` (saved ids) the
+        balances are not read, so lazily loaded customers stay unloaded.
+        """
+        self.all = IdSet(customers.ids[:customers.size] if isinstance(customers, CustomerTable) else customers.keys())
+        if funded is not None:
+            self.funded = IdSet(funded, track=True)
+        else:
+            self.funded = IdSet((cid for cid, c in customers.items() if c.get("deposit_balance", 0) > 0), track=True)
+
+
+class Customer(MutableMapping):
+    """
+    Dict-style view of one CustomerTable row:
+    {id, credit_score, deposit_balance}, plus "loans" and "deposits".
+
+    Views are created on access and hold no data themselves, so they stay
+    valid while the row exists. "loans" and "deposits" are built from the
+    table's LoanBook and DepositBook on each read (new lists) and are not
+    part of the saved record.
+    """
+
+    __slots__ = ("table", "cid")
+    FIELDS = ("id", "credit_score", "deposit_balance")
+
+    def __init__(self, table, cid):
+        self.table = table
+        self.cid = cid
+
+    def __getitem__(self, key):
+        table = self.table
+        if key == "deposit_balance":
+            return float(table.deposit_balance[table.index[self.cid]])
+        if key == "credit_score":
+            return int(table.credit_score[table.index[self.cid]])
+        if key == "deposits":
+            return table.deposits_of(self.cid)
+        if key == "loans":
+            return table.loans_of(self.cid)
+        if key == "id":
+            return self.cid
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        table = self.table
+        if key == "deposit_balance":
+            table.deposit_balance[table.index[self.cid]] = value
+        elif key == "credit_score":
+            table.credit_score[table.index[self.cid]] = value
+        elif key in ("loans", "deposits"):
+            raise TypeError(f"a customer's {key} live in the bank's books")
+        elif key == "id":
+            if value != self.cid:
+                raise ValueError("a customer's id cannot change")
+        else:
+            raise KeyError(key)
+
+    def __delitem__(self, key):
+        raise TypeError("customer fields cannot be deleted")
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def to_dict(self):
+        """Plain dict copy of the saved fields, for JSON."""
+        return self.table.record(self.cid)
+
+
+class CustomerItems(ItemsView):
+    def __iter__(self):
+        table = self._mapping
+        for cid in table:
+            yield cid, Customer(table, cid)
+
+
+class CustomerValues(ValuesView):
+    def __iter__(self):
+        table = self._mapping
+        for cid in table:
+            yield Customer(table, cid)
+
+
+class CustomerTable(MutableMapping):
+    """
+    Customers stored column-wise: id, credit score (int16) and deposit
+    balance in NumPy arrays. Loans and deposits are read from the bank's
+    LoanBook and DepositBook (attach()).
+
+    Behaves like the old {customer_id: customer dict} mapping. Reading a
+    customer returns a Customer view; assigning any mapping with the
+    customer fields copies the scalars into the columns. Iteration follows
+    insertion order; removing a customer moves the last row into its slot.
+
+    Records from old saves still carry "deposits" entries; they are kept
+    (or, from binary snapshots, left packed in arrays sorted by customer
+    id) only until Bank.load_data has moved them into the DepositBook with
+    legacy_deposits().
+    """
+
+    def __init__(self, records=(), capacity=64):
+        self.size = 0
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.credit_score = np.zeros(capacity, dtype=np.int16)
+        self.deposit_balance = np.zeros(capacity, dtype=np.float64)
+        self.index = IdIndex(capacity)  # customer_id: row
+        self.loan_book = None     # the bank's books, see attach()
+        self.deposit_book = None
+        self.legacy = {}          # customer_id: deposit entries of an old save
+        self.packed = None        # the same as (customer_id, amount, accrued, settled_day) arrays
+        for cid, record in records:
+            self[cid] = record
+
+    def attach(self, loan_book, deposit_book):
+        """Read the customers' "loans" and "deposits" from these books."""
+        self.loan_book = loan_book
+        self.deposit_book = deposit_book
+
+    def _columns(self):
+        return ("ids", "credit_score", "deposit_balance")
+
+    def _grow(self, needed):
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name in self._columns():
+            old = getattr(self, name)
+            new = np.zeros(new_capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add(self, cid, credit_score, deposit_balance=0.0, deposits=None):
+        """Insert or overwrite a customer and return its view; `deposits` = entries of an old save."""
+        row = self.index.get(cid)
+        if row is None:
+            self._grow(self.size + 1)
+            row = self.size
+            self.size += 1
+            self.index[cid] = row
+            self.ids[row] = cid
+        self.credit_score[row] = credit_score
+        self.deposit_balance[row] = deposit_balance
+        if deposits:
+            self.legacy[cid] = deposits
+        return Customer(self, cid)
+
+    def loans_of(self, cid):
+        """The customer's loans, built from the LoanBook."""
+        return [] if self.loan_book is None else self.loan_book.customer_loans(cid)
+
+    def deposits_of(self, cid):
+        """The customer's deposits, built from the DepositBook."""
+        return [] if self.deposit_book is None else self.deposit_book.customer_deposits(cid)
+
+    # ---------- Old saves ----------
+    def legacy_deposits(self, cid):
+        """The deposit entries an old save had for the customer (taken out of the table)."""
+        entries = self.legacy.pop(cid, None)
+        if entries is not None or self.packed is None:
+            return entries or []
+        customer_id, amount, accrued, settled_day = self.packed
+        lo, hi = np.searchsorted(customer_id, [cid, cid + 1])
+        entries = []
+        for a, acc, day in zip(amount[lo:hi].tolist(), accrued[lo:hi].tolist(), settled_day[lo:hi].tolist()):
+            entry = {"amount": a, "accrued": acc}
+            if day >= 0:
+                entry["settled_day"] = day
+            entries.append(entry)
+        return entries
+
+    def drop_legacy(self):
+        self.legacy = {}
+        self.packed = None
+
+    def __getitem__(self, cid):
+        if cid not in self.index:
+            raise KeyError(cid)
+        return Customer(self, cid)
+
+    def __setitem__(self, cid, record):
+        self.add(cid, record.get("credit_score", 300), record.get("deposit_balance", 0.0), record.get("deposits"))
+
+    def __delitem__(self, cid):
+        row = self.index.pop(cid)
+        self.legacy.pop(cid, None)
+        last = self.size - 1
+        if row != last:
+            for name in self._columns():
+                column = getattr(self, name)
+                column[row] = column[last]
+            self.index[int(self.ids[row])] = row
+        self.size -= 1
+
+    def __contains__(self, cid):
+        return cid in self.index
+
+    def __iter__(self):
+        return iter(self.ids[:self.size].tolist())
+
+    def __len__(self):
+        return self.size
+
+    def items(self):
+        return CustomerItems(self)
+
+    def values(self):
+        return CustomerValues(self)
+
+    def balances_of(self, ids):
+        """The deposit_balance of an array of customer ids."""
+        return self.deposit_balance[self.index.rows(ids)]
+
+    def add_to_balances(self, ids, amounts):
+        """Add amounts to the customers' deposit_balance (rounded to cents); returns the balances before and after."""
+        rows = self.index.rows(ids)
+        before = self.deposit_balance[rows]
+        after = np.round(before + amounts, 2)
+        self.deposit_balance[rows] = after
+        return before, after
+
+    def record(self, cid):
+        """One customer as a plain dict of the saved fields (the books save loans and deposits)."""
+        row = self.index[cid]
+        return {
+            "id": cid,
+            "credit_score": int(self.credit_score[row]),
+            "deposit_balance": float(self.deposit_balance[row])
+        }
+
+    def to_dict(self):
+        """Plain {customer_id: dict} copy, for JSON."""
+        return {cid: self.record(cid) for cid in self}
+
+    def copy(self):
+        """Copy of the columns (for the background writer; the books are not attached)."""
+        n = self.size
+        table = CustomerTable(capacity=max(64, n))
+        for name in self._columns():
+            getattr(table, name)[:n] = getattr(self, name)[:n]
+        table.size = n
+        table.index = self.index.copy()
+        return table
+
+    # ---------- Columns ----------
+    @classmethod
+    def from_columns(cls, ids, credit_score, deposit_balance, packed=None):
+        """A table over loaded columns; `packed` = deposit entry arrays of an old snapshot."""
+        n = len(ids)
+        table = cls(capacity=max(64, n))
+        table.ids[:n] = ids
+        table.credit_score[:n] = credit_score
+        table.deposit_balance[:n] = deposit_balance
+        table.size = n
+        table.index = IdIndex.from_ids(table.ids[:n])
+        table.packed = packed
+        return table
@@ -0,0 +1,110 @@
+# economy.py
+import json
+import random
+from bisect import bisect_right
+from functools import lru_cache
+
+import numpy as np
+
+ECONOMY_FILE = "files/economycycle.json"
+
+
+class EconomyModel:
+    """
+    Economic states from economycycle.json as a Markov chain.
+
+    Transition rule (same as the game always used): 30% stay in the current
+    state; otherwise half the time go to Normal and half the time to any
+    other state. The rows are precomputed as cumulative probabilities, so a
+    transition is one random number and one bisect.
+    """
+
+    STAY_CHANCE = 0.3
+    NORMAL_CHANCE = 0.5  # of the changes
+
+    def __init__(self, states):
+        self.states = states
+        self.names = [s["name"] for s in states]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.deposit_multipliers = np.array([s["deposit_multiplier"] for s in states], dtype=np.float64)
+        self.interest_rate_multipliers = np.array([s["interest_rate_multiplier"] for s in states], dtype=np.float64)
+
+        n = len(states)
+        normal = self.index.get("Normal", 0)
+        change = 1.0 - self.STAY_CHANCE
+        matrix = np.zeros((n, n), dtype=np.float64)
+        for i in range(n):
+            matrix[i, i] += self.STAY_CHANCE
+            matrix[i, normal] += change * self.NORMAL_CHANCE
+            if n > 1:
+                for j in range(n):
+                    if j != i:
+                        matrix[i, j] += change * (1.0 - self.NORMAL_CHANCE) / (n - 1)
+            else:
+                matrix[i, 0] += change * (1.0 - self.NORMAL_CHANCE)
+        self.transitions = matrix
+        self.cumulative = np.cumsum(matrix, axis=1)
+        self.cumulative[:, -1] = 1.0
+        self.cumulative_rows = self.cumulative.tolist()
+
+    def state_index(self, name):
+        return self.index.get(name, 0)
+
+    def state(self, name):
+        return self.states[self.state_index(name)]
+
+    # ---------- Sampling ----------
+    def next_state(self, current, rng=random):
+        """Pick the state after `current` (a name) and return its dict."""
+        row = self.cumulative_rows[self.state_index(current)]
+        return self.states[min(bisect_right(row, rng.random()), len(row) - 1)]
+
+    def sample_paths(self, start, changes, paths=1, rng=None):
+        """
+        Sample `paths` independent chains of `changes` transitions from `start`.
+
+        All random numbers are drawn up front and each step advances every
+        path at once. Returns an int array of state indices, shape (paths, changes).
+        """
+        if rng is None:
+            rng = np.random.default_rng(random.getrandbits(64))
+        draws = rng.random((paths, changes))
+        out = np.empty((paths, changes), dtype=np.int64)
+        state = np.full(paths, self.state_index(start), dtype=np.int64)
+        last = len(self.states) - 1
+        for step in range(changes):
+            rows = self.cumulative[state]
+            state = np.minimum((draws[:, step, None] >= rows).sum(axis=1), last)
+            out[:, step] = state
+        return out
+
+    def sample_path(self, start, changes, rng=None):
+        """Sample one chain of `changes` transitions (array of state indices)."""
+        return self.sample_paths(start, changes, 1, rng)[0]
+
+    def sample_days(self, start, days, interval, days_since_change=0, rng=None):
+        """
+        Expand a sampled chain into the state index in force on each of the next `days` days,
+        given that the state changes every `interval` days.
+        """
+        path = self.sample_path(start, self.changes_within(days, interval, days_since_change), rng)
+        daily = np.full(days, self.state_index(start), dtype=np.int64)
+        if len(path):
+            first_change = max(interval - days_since_change, 1)
+            change_number = (np.arange(days) - (first_change - 1)) // interval
+            changed = change_number >= 0
+            daily[changed] = path[change_number[changed]]
+        return daily
+
+    @staticmethod
+    def changes_within(days, interval, days_since_change=0):
+        """How many state changes happen in the next `days` days."""
+        first_change = max(interval - days_since_change, 1)
+        return 0 if days < first_change else (days - first_change) // interval + 1
+
+
+@lru_cache(maxsize=None)
+def load_economy_model(path=ECONOMY_FILE):
+    """Parse economycycle.json once and return the shared EconomyModel."""
+    with open(path, "r", encoding="utf-8") as f:
+        return EconomyModel(json.load(f))
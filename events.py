@@ -1,12 +1,62 @@
 # events.py
 import random
 
+import numpy as np
+
+# Mean number of events per day at economic_multiplier 1.0 (draw_event_batch)
+EVENT_RATES = {"deposit": 3.0, "withdraw": 2.0, "loan": 0.5}
+NEW_DEPOSITOR_SHARE = 0.5  # share of batch deposits that open a new customer, as in deposit_event
+
+rng = np.random.default_rng()
+
+def draw_event_batch(bank, rates=None, generator=None):
+    """
+    Draw one day of random events as arrays. The number of deposits,
+    withdrawals and loan requests are Poisson with mean rates[kind] times
+    bank.economic_multiplier; amounts and customers use the same ranges as
+    the single events. Apply the result with bank.apply_event_batch().
+
+    Returns a dict of arrays:
+        deposit_customers, deposit_amounts    (customer 0 = a new customer)
+        withdraw_customers, withdraw_amounts
+        loan_amounts, loan_years
+    """
+    rates = EVENT_RATES if rates is None else rates
+    generator = rng if generator is None else generator
+    multiplier = max(bank.economic_multiplier, 0.0)
+    deposits, withdrawals, loans = generator.poisson(
+        [rates.get(kind, 0.0) * multiplier for kind in ("deposit", "withdraw", "loan")]).tolist()
+
+    deposit_customers = np.zeros(deposits, dtype=np.int64)
+    existing = generator.random(deposits) >= NEW_DEPOSITOR_SHARE
+    if len(bank.registry):
+        deposit_customers[existing] = bank.registry.sample_many(int(existing.sum()), generator)
+
+    # Withdraw between 1 and the whole deposit, like withdraw_event
+    withdraw_customers = bank.registry.sample_funded_many(withdrawals, generator)
+    available = bank.deposits.amounts_of(withdraw_customers)
+    withdraw_amounts = 1 + np.floor(generator.random(len(withdraw_customers)) * np.floor(available))
+    keep = available >= 1
+
+    return {
+        "deposit_customers": deposit_customers,
+        "deposit_amounts": generator.integers(100, 10001, deposits).astype(np.float64),
+        "withdraw_customers": withdraw_customers[keep],
+        "withdraw_amounts": withdraw_amounts[keep],
+        "loan_amounts": generator.integers(500, 20001, loans).astype(np.float64),
+        "loan_years": generator.integers(1, 21, loans),
+    }
+
+def run_event_batch(bank, rates=None, generator=None):
+    """Draw and apply one day of batched events; returns the summary message."""
+    return bank.apply_event_batch(draw_event_batch(bank, rates, generator))
+
 def deposit_event(bank):
     """Simulate a deposit by a customer."""
     amt = random.randint(100, 10000)
     # Pick an existing customer 50% of the time, else create new
     if bank.customers and random.random() < 0.5:
-        cid = random.choice(list(bank.customers.keys()))
+        cid = bank.registry.sample()
     else:
         cid = bank.new_customer()
     bank.deposit(amt, customer_id=cid)
@@ -14,13 +64,11 @@ def deposit_event(bank):
 
 def withdraw_event(bank):
     """Simulate a withdrawal by a customer with available deposits."""
-    eligible = [cid for cid, c in bank.customers.items() if c.get("deposit_balance", 0) > 0]
-    if not eligible:
+    cid = bank.registry.sample_funded()
+    if cid is None:
         return "No customers with deposits available for withdrawal."
-    cid = random.choice(eligible)
-    cust = bank.customers[cid]
-    total = sum(d["amount"] for d in cust["deposits"])
-    if total <= 0:
+    total = bank.deposits.amount_of(cid)
+    if total < 1:
         return f"Customer {cid} has no funds to withdraw."
     amt = random.randint(1, int(total))
     success = bank.withdraw(amt, customer_id=cid)
@@ -1,22 +1,188 @@
+import json
 import logging
 import os
+import queue
+import struct
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+INDEX_RECORD = struct.Struct("<qq")  # (day, byte offset of the day's first record)
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 5
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: {"time", "day", "event"}."""
+
+    def format(self, record):
+        return json.dumps({
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="seconds"),
+            "day": record.day,
+            "event": record.getMessage()
+        })
+
+
+class DayIndexedFileHandler(RotatingFileHandler):
+    """
+    Size-rotated JSONL log with a sidecar day index.
+
+    Next to every log file (history.jsonl, history.jsonl.1, ...) sits an
+    .idx file of fixed-size INDEX_RECORD entries, one per day, holding the
+    byte offset of that day's first line. Days only go up within a file (a
+    lower day, i.e. a new game, starts a new file), so read_day() finds a
+    day with a binary search over the index instead of scanning the log.
+    """
+
+    def __init__(self, filename, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self.index = open(index_path(self.baseFilename), "ab")
+        self.last_day = last_indexed_day(self.baseFilename)
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.shouldRollover(record) or (self.last_day is not None and record.day < self.last_day):
+                self.doRollover()
+            if record.day != self.last_day:
+                self.index.write(INDEX_RECORD.pack(record.day, self.stream.tell()))
+                self.index.flush()
+                self.last_day = record.day
+            logging.FileHandler.emit(self, record)
+        except Exception:
+            self.handleError(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.index.close()
+        base = self.baseFilename
+        for i in range(self.backupCount - 1, 0, -1):
+            if os.path.exists(index_path(f"{base}.{i}")):
+                os.replace(index_path(f"{base}.{i}"), index_path(f"{base}.{i + 1}"))
+        if self.backupCount > 0:
+            os.replace(index_path(base), index_path(f"{base}.1"))
+        self.index = open(index_path(base), "wb")
+        self.last_day = None
+
+    def close(self):
+        self.acquire()
+        try:
+            self.index.close()
+        finally:
+            self.release()
+        super().close()
+
 
 class HistoryLogger:
-    def __init__(self, log_folder='log', log_file='history.log'):
+    """
+    Structured history log written from a background thread.
+
+    log() only puts the record on a queue (cheap enough for the simulation
+    thread); a QueueListener thread writes it through DayIndexedFileHandler
+    to log/history.jsonl, rotated at max_bytes with backup_count old files.
+
+        history_logger = HistoryLogger()
+        history_logger.log(bank.day, "Deposit of $500.00")
+        history_logger.read_day(120)  # [{"time": ..., "day": 120, "event": ...}, ...]
+        history_logger.close()        # write what is queued, stop the thread
+    """
+
+    def __init__(self, log_folder='log', log_file='history.jsonl', max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
         self.log_folder = log_folder
         self.log_file = log_file
         os.makedirs(self.log_folder, exist_ok=True)
-        self.full_path = os.path.join(self.log_folder, self.log_file)
+        self.full_path = os.path.abspath(os.path.join(self.log_folder, self.log_file))
+        self.backup_count = backup_count
 
-        # Use a module-level logger to prevent duplicate handlers
-        self.logger = logging.getLogger('BankHistoryLogger')
+        self.handler = DayIndexedFileHandler(self.full_path, max_bytes, backup_count)
+        self.handler.setFormatter(JsonFormatter())
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, self.handler)
+        self.listener.start()
+
+        # A logger of its own (not propagated), so records only reach this file
+        self.logger = logging.getLogger(f"BankHistoryLogger.{id(self)}")
         self.logger.setLevel(logging.INFO)
-        # Only add handler once for each unique log file
-        if not any(isinstance(h, logging.FileHandler) and h.baseFilename == self.full_path for h in self.logger.handlers):
-            handler = logging.FileHandler(self.full_path, encoding='utf-8')
-            formatter = logging.Formatter('%(asctime)s: %(message)s')
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
-
-    def log(self, message):
-        self.logger.info(message)
\ No newline at end of file
+        self.logger.propagate = False
+        self.logger.addHandler(QueueHandler(self.queue))
+
+    def log(self, day, message):
+        self.logger.info(message, extra={"day": day})
+
+    def read_day(self, day):
+        """The records of `day` written so far (ones still queued are not on disk yet)."""
+        return read_day(self.full_path, day, self.backup_count)
+
+    def close(self):
+        if self.listener is None:
+            return
+        self.listener.stop()  # writes everything queued first
+        self.listener = None
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+        self.handler.close()
+
+
+# ---------- Day index ----------
+def index_path(log_path):
+    return log_path + ".idx"
+
+
+def index_entry(f, i):
+    f.seek(i * INDEX_RECORD.size)
+    return INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))
+
+
+def last_indexed_day(log_path):
+    try:
+        with open(index_path(log_path), "rb") as f:
+            count = os.fstat(f.fileno()).st_size // INDEX_RECORD.size
+            return index_entry(f, count - 1)[0] if count else None
+    except FileNotFoundError:
+        return None
+
+
+def find_day(log_path, day):
+    """(start, end) byte range of `day` in one log file (end None = to the end), or None."""
+    try:
+        f = open(index_path(log_path), "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        count = os.fstat(f.fileno()).st_size // INDEX_RECORD.size
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if index_entry(f, mid)[0] < day:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == count:
+            return None
+        found, start = index_entry(f, lo)
+        if found != day:
+            return None
+        return start, index_entry(f, lo + 1)[1] if lo + 1 < count else None
+
+
+def read_day(log_path, day, backup_count=BACKUP_COUNT):
+    """
+    The records of `day` from log_path and its rotated files, oldest first.
+    A day split by a rotation is read from both files.
+    """
+    records = []
+    for i in range(backup_count + 1):
+        path = log_path if i == 0 else f"{log_path}.{i}"
+        span = find_day(path, day)
+        if span is None:
+            if records:
+                break
+            continue
+        start, end = span
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read() if end is None else f.read(end - start)
+        records[:0] = [json.loads(line) for line in data.splitlines() if line.strip()]
+        if start > 0:
+            break  # the day starts in this file
+    return records
@@ -0,0 +1,86 @@
+# idindex.py
+import numpy as np
+
+
+class IdIndex:
+    """
+    Map from non-negative integer ids (customer and loan ids, which are
+    handed out in increasing order) to rows, stored as one NumPy array
+    indexed by id; -1 marks a missing id.
+
+    Costs 4 bytes per id up to the largest one instead of a dict entry and
+    two int objects per id, and looks up whole arrays of ids at once (rows).
+    Supports the dict operations the books use: [], get, in, pop, len.
+    """
+
+    def __init__(self, capacity=64):
+        self.row_of = np.full(capacity, -1, dtype=np.int32)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, item_id):
+        return 0 <= item_id < len(self.row_of) and self.row_of[item_id] >= 0
+
+    def __getitem__(self, item_id):
+        row = self.get(item_id)
+        if row is None:
+            raise KeyError(item_id)
+        return row
+
+    def get(self, item_id, default=None):
+        if 0 <= item_id < len(self.row_of):
+            row = int(self.row_of[item_id])
+            if row >= 0:
+                return row
+        return default
+
+    def __setitem__(self, item_id, row):
+        if item_id < 0:
+            raise KeyError(item_id)
+        self._grow(item_id + 1)
+        if self.row_of[item_id] < 0:
+            self.count += 1
+        self.row_of[item_id] = row
+
+    def pop(self, item_id, *default):
+        row = self.get(item_id)
+        if row is None:
+            if default:
+                return default[0]
+            raise KeyError(item_id)
+        self.row_of[item_id] = -1
+        self.count -= 1
+        return row
+
+    def _grow(self, needed):
+        capacity = len(self.row_of)
+        if needed <= capacity:
+            return
+        row_of = np.full(max(needed, capacity * 2), -1, dtype=np.int32)
+        row_of[:capacity] = self.row_of
+        self.row_of = row_of
+
+    def rows(self, ids):
+        """Rows of an array of ids (-1 where an id is missing)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        rows = np.full(len(ids), -1, dtype=np.int64)
+        known = (ids >= 0) & (ids < len(self.row_of))
+        rows[known] = self.row_of[ids[known]]
+        return rows
+
+    def copy(self):
+        index = IdIndex(0)
+        index.row_of = self.row_of.copy()
+        index.count = self.count
+        return index
+
+    @classmethod
+    def from_ids(cls, ids):
+        """Index ids[i] -> i for an array of distinct ids."""
+        ids = np.asarray(ids, dtype=np.int64)
+        index = cls(max(64, int(ids.max()) + 1) if len(ids) else 64)
+        index.row_of[ids] = np.arange(len(ids), dtype=np.int32)
+        index.count = len(ids)
+        return index
@@ -1,11 +1,139 @@
 # invest.py
+import copy
 import json
 import random
 import os
 from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
 
 STOCKS_FILE = "files/stocks.json"
 CURRENT_STOCKS_FILE = "files/current_stocks.json"
+CURRENT_PRICES_FILE = "files/current_prices.json"
+
+PRICE_MODEL_DAYS = 30  # the price model's trend and volatility are per 30 days
+HISTORY_POINTS = 100   # prices kept per ticker
+
+
+@lru_cache(maxsize=None)
+def load_stock_catalog(path=STOCKS_FILE):
+    """Parse stocks.json once. The entries are shared: deep-copy the ones you keep (prices get updated)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class StockPrices:
+    """
+    Price state of every listing, column-wise: price, P/E, debt/equity,
+    52-week high/low, last change and the last HISTORY_POINTS prices in
+    NumPy arrays (position i = tickers[i]). step() moves the whole universe
+    in a few array operations, so prices can tick daily.
+
+    The stock dicts shown in the market are copies: write_to() refreshes
+    their price fields from the columns.
+    """
+
+    def __init__(self, tickers, price, pe_ratio, debt_equity, high, low, change=None):
+        n = len(tickers)
+        self.tickers = list(tickers)
+        self.index = dict(zip(self.tickers, range(n)))
+        self.price = np.asarray(price, dtype=np.float64)
+        self.pe_ratio = np.asarray(pe_ratio, dtype=np.float64)
+        self.debt_equity = np.asarray(debt_equity, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.change = np.zeros(n) if change is None else np.asarray(change, dtype=np.float64)  # percent
+        self.history = np.zeros((HISTORY_POINTS, n))  # ring of price rows
+        self.history[0] = self.price
+        self.history_pos = 0    # row of the latest prices
+        self.history_count = 1
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self.index
+
+    @classmethod
+    def from_stocks(cls, stocks):
+        """Columns from stock dicts in the stocks.json format."""
+        quotes = [s['stock'] for s in stocks]
+        return cls([s['ticker'] for s in stocks],
+                   [q['price'] for q in quotes],
+                   [q.get('pe_ratio', 15) for q in quotes],
+                   [s.get('financials', {}).get('debt_equity', 1.0) for s in stocks],
+                   [q.get('52_week_high', 0) for q in quotes],
+                   [q.get('52_week_low', float('inf')) for q in quotes],
+                   [q.get('daily_change_percent', 0.0) for q in quotes])
+
+    @classmethod
+    def synthetic(cls, count, rng):
+        """A random universe of `count` listings (benchmarks)."""
+        price = np.round(rng.lognormal(4, 1, count), 2)
+        return cls([f"SYN{i}" for i in range(count)], price, rng.uniform(5, 40, count),
+                   rng.uniform(0, 3, count), price * 1.2, price * 0.8)
+
+    # ---------- Prices ----------
+    def step(self, rng, days=PRICE_MODEL_DAYS):
+        """
+        Move every price by one draw of the model (a random trend of -5%..+10%
+        and 2-8% volatility per PRICE_MODEL_DAYS, x1.5 for P/E over 20, x1.3
+        for debt/equity over 1.5), scaled to `days`; a price never drops
+        below 30% of where it was.
+        """
+        n = len(self.tickers)
+        scale = days / PRICE_MODEL_DAYS
+        volatility = rng.uniform(0.02, 0.08, n)
+        volatility *= np.where(self.pe_ratio > 20, 1.5, 1.0) * np.where(self.debt_equity > 1.5, 1.3, 1.0)
+        trend = rng.uniform(-0.05, 0.1, n)
+        change = rng.normal(trend * scale, volatility * np.sqrt(scale))
+        price = np.round(np.maximum(self.price * (1 + change), self.price * 0.3), 2)
+
+        self.price = price
+        self.change = np.round(change * 100, 2)
+        np.maximum(self.high, price, out=self.high)
+        np.minimum(self.low, price, out=self.low)
+        self.history_pos = (self.history_pos + 1) % HISTORY_POINTS
+        self.history[self.history_pos] = price
+        self.history_count = min(self.history_count + 1, HISTORY_POINTS)
+
+    def price_of(self, ticker):
+        i = self.index.get(ticker)
+        return None if i is None else float(self.price[i])
+
+    def history_of(self, ticker):
+        """The ticker's last prices, oldest first."""
+        i = self.index[ticker]
+        rows = (self.history_pos - np.arange(self.history_count - 1, -1, -1)) % HISTORY_POINTS
+        return self.history[rows, i].tolist()
+
+    def write_to(self, stocks):
+        """Copy the current price fields into these stock dicts."""
+        for stock in stocks:
+            i = self.index.get(stock['ticker'])
+            if i is None:
+                continue
+            quote = stock['stock']
+            quote['price'] = float(self.price[i])
+            quote['daily_change_percent'] = float(self.change[i])
+            quote['52_week_high'] = float(self.high[i])
+            quote['52_week_low'] = float(self.low[i])
+
+    # ---------- Saving ----------
+    def to_dict(self):
+        return {"tickers": list(self.tickers), "price": self.price.tolist(), "change": self.change.tolist(),
+                "high": self.high.tolist(), "low": self.low.tolist()}
+
+    def load_dict(self, data):
+        """Restore saved prices of the tickers that are still listed."""
+        for column in ("price", "change", "high", "low"):
+            values = getattr(self, column)
+            for ticker, value in zip(data["tickers"], data[column]):
+                i = self.index.get(ticker)
+                if i is not None:
+                    values[i] = value
+        self.history[self.history_pos] = self.price
 
 
 class StockMarket:
@@ -13,9 +141,12 @@ class StockMarket:
         self.bank = bank
         self.available_stocks = []
         self.owned_stocks = []  # [ticker, shares, purchase_price]
-        self.stock_price_history = {}  # {ticker: [price_history]}
-        self.days_since_last_market_update = 0
-        self.market_update_interval = 30  # Update market every 30 days
+        self.prices = StockPrices.from_stocks([])  # every listing's price, see load_stocks
+        self.rng = np.random.default_rng()
+        self.last_market_update_day = bank.day
+        self.market_update_interval = 30  # New stocks available every 30 days
+        self.last_price_update_day = bank.day
+        self.price_update_interval = 1  # Prices of all listings move daily
         self.load_stocks()
         self.load_owned_stocks()
 
@@ -28,29 +159,45 @@ class StockMarket:
                     self.available_stocks = json.load(f)
             else:
                 # Load from original stocks and initialize current prices
-                with open(STOCKS_FILE, 'r', encoding='utf-8') as f:
-                    original_stocks = json.load(f)
-                    self.available_stocks = original_stocks.copy()
+                self.available_stocks = copy.deepcopy(load_stock_catalog())
 
                 # Save current state
                 self.save_current_stocks()
 
-            # Initialize price history for each stock
-            for stock in self.available_stocks:
-                ticker = stock['ticker']
-                self.stock_price_history[ticker] = [stock['stock']['price']]
-
         except FileNotFoundError:
             print(f"Warning: {STOCKS_FILE} not found. No stocks available.")
             self.available_stocks = []
+        self.load_prices()
 
-    def save_current_stocks(self):
-        """Save current stock data to separate file"""
+    def load_prices(self):
+        """Price columns for the whole catalog, with the saved prices (or the listed stocks' ones) on top."""
         try:
-            with open(CURRENT_STOCKS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.available_stocks, f, indent=2)
-        except Exception as e:
-            print(f"Error saving current stocks: {e}")
+            catalog = load_stock_catalog()
+        except FileNotFoundError:
+            catalog = []
+        listed = {s['ticker']: s for s in self.available_stocks}
+        self.prices = StockPrices.from_stocks([listed.pop(s['ticker'], s) for s in catalog] + list(listed.values()))
+        if os.path.exists(CURRENT_PRICES_FILE):
+            try:
+                with open(CURRENT_PRICES_FILE, 'r', encoding='utf-8') as f:
+                    self.prices.load_dict(json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error loading {CURRENT_PRICES_FILE}: {e}")
+        self.prices.write_to(self.available_stocks)
+
+    def save_current_stocks(self):
+        """Save current stock data (and every listing's prices) to separate files"""
+        writer = getattr(self.bank, "writer", None)
+        if writer is not None:
+            writer.save_json(CURRENT_STOCKS_FILE, copy.deepcopy(self.available_stocks))
+            writer.save_json(CURRENT_PRICES_FILE, self.prices.to_dict())
+            return
+        for filepath, data in ((CURRENT_STOCKS_FILE, self.available_stocks), (CURRENT_PRICES_FILE, self.prices.to_dict())):
+            try:
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2)
+            except Exception as e:
+                print(f"Error saving {filepath}: {e}")
 
     def load_owned_stocks(self):
         """Load owned stocks from bank data"""
@@ -63,21 +210,29 @@ class StockMarket:
         """Save owned stocks to bank data"""
         self.bank.owned_stocks = self.owned_stocks
 
+    @property
+    def days_since_last_market_update(self):
+        return self.bank.day - self.last_market_update_day
+
+    def next_update_day(self):
+        return self.last_market_update_day + self.market_update_interval
+
     def update_market(self):
-        """Update stock prices and available stocks"""
-        self.days_since_last_market_update += 1
+        """Move prices (daily) and rotate the available stocks (monthly); True on a rotation"""
+        days = self.bank.day - self.last_price_update_day
+        if days >= self.price_update_interval:
+            self.last_price_update_day = self.bank.day
+            self.update_stock_prices(days)
 
         if self.days_since_last_market_update >= self.market_update_interval:
-            self.days_since_last_market_update = 0
+            self.last_market_update_day = self.bank.day
 
             # Randomly add/remove some stocks from the market
             self.rotate_available_stocks()
 
-            # Update prices for all available stocks
-            self.update_stock_prices()
-
-            # Save updated stock data
-            self.save_current_stocks()
+            # Save updated stock data (headless runs write it at checkpoints)
+            if self.bank.autosave:
+                self.save_current_stocks()
 
             return True
         return False
@@ -86,8 +241,7 @@ class StockMarket:
         """Randomly select 20 stocks to be available in the market"""
         # Get all possible stocks
         try:
-            with open(STOCKS_FILE, 'r', encoding='utf-8') as f:
-                all_stocks = json.load(f)
+            all_stocks = load_stock_catalog()
         except FileNotFoundError:
             print(f"Warning: {STOCKS_FILE} not found.")
             return
@@ -99,53 +253,15 @@ class StockMarket:
         # Select 20 random stocks (or less if not enough available)
         num_to_select = min(30, len(available_for_selection))
         if num_to_select > 0:
-            self.available_stocks = random.sample(available_for_selection, num_to_select)
+            self.available_stocks = copy.deepcopy(random.sample(available_for_selection, num_to_select))
+            self.prices.write_to(self.available_stocks)
         else:
             self.available_stocks = []
 
-    def update_stock_prices(self):
-        """Update prices for all available stocks based on random factors"""
-        for stock in self.available_stocks:
-            current_price = stock['stock']['price']
-
-            # More realistic price changes based on company performance
-            volatility = random.uniform(0.02, 0.08)  # 2-8% volatility
-            trend_factor = random.uniform(-0.05, 0.1)  # Random trend
-
-            # Company-specific factors
-            pe_ratio = stock['stock'].get('pe_ratio', 15)
-            debt_equity = stock['financials'].get('debt_equity', 1.0)
-
-            # Calculate price change
-            if pe_ratio > 20:  # Overvalued stocks more volatile
-                volatility *= 1.5
-            if debt_equity > 1.5:  # High debt companies more risky
-                volatility *= 1.3
-
-            change_percent = random.gauss(trend_factor, volatility)
-            new_price = current_price * (1 + change_percent)
-
-            # Ensure price doesn't go below a minimum
-            min_price = current_price * 0.3  # At least 30% of current price
-            new_price = max(new_price, min_price)
-
-            # Update stock data
-            stock['stock']['price'] = round(new_price, 2)
-            stock['stock']['daily_change_percent'] = round(change_percent * 100, 2)
-
-            # Update 52-week high/low if needed
-            if new_price > stock['stock'].get('52_week_high', 0):
-                stock['stock']['52_week_high'] = round(new_price, 2)
-            if new_price < stock['stock'].get('52_week_low', float('inf')):
-                stock['stock']['52_week_low'] = round(new_price, 2)
-
-            # Update price history
-            ticker = stock['ticker']
-            if ticker in self.stock_price_history:
-                self.stock_price_history[ticker].append(new_price)
-                # Keep only the last 100 price points
-                if len(self.stock_price_history[ticker]) > 100:
-                    self.stock_price_history[ticker] = self.stock_price_history[ticker][-100:]
+    def update_stock_prices(self, days=PRICE_MODEL_DAYS):
+        """Move the prices of every listing by `days` worth of the price model, in one array step"""
+        self.prices.step(self.rng, days)
+        self.prices.write_to(self.available_stocks)
 
     def get_available_stocks(self):
         """Get stocks currently available in the market"""
@@ -218,19 +334,10 @@ class StockMarket:
         if shares > self.owned_stocks[owned_idx][1]:
             return False, "You don't own enough shares"
 
-        # Find the current price from available stocks or history
-        current_price = None
-        for stock in self.available_stocks:
-            if stock['ticker'] == ticker:
-                current_price = stock['stock']['price']
-                break
-
-        if current_price is None:
-            # If stock is not available, use the last known price from history
-            if ticker in self.stock_price_history and self.stock_price_history[ticker]:
-                current_price = self.stock_price_history[ticker][-1]
-            else:
-                return False, "Cannot determine current price"
+        # Every listing has a current price, available or not
+        current_price = self.get_stock_value(ticker)
+        if not current_price:
+            return False, "Cannot determine current price"
 
         sale_value = current_price * shares
         purchase_cost = self.owned_stocks[owned_idx][2] * shares
@@ -246,12 +353,12 @@ class StockMarket:
 
             # Add back to available stocks
             try:
-                with open(STOCKS_FILE, 'r', encoding='utf-8') as f:
-                    all_stocks = json.load(f)
-                original_stock = next((s for s in all_stocks if s['ticker'] == ticker), None)
+                original_stock = next((s for s in load_stock_catalog() if s['ticker'] == ticker), None)
                 if original_stock:
-                    # Update with current price but keep other original data
+                    original_stock = copy.deepcopy(original_stock)
+                    # Update with current prices but keep other original data
                     original_stock['stock']['price'] = current_price
+                    self.prices.write_to([original_stock])
                     self.available_stocks.append(original_stock)
             except FileNotFoundError:
                 pass
@@ -270,15 +377,15 @@ class StockMarket:
 
     def get_stock_value(self, ticker):
         """Get the current value of a stock"""
-        # First check available stocks
+        price = self.prices.price_of(ticker)
+        if price is not None:
+            return price
+
+        # Not a listing of the catalog: the market's copy, if any
         for stock in self.available_stocks:
             if stock['ticker'] == ticker:
                 return stock['stock']['price']
 
-        # Then check price history
-        if ticker in self.stock_price_history and self.stock_price_history[ticker]:
-            return self.stock_price_history[ticker][-1]
-
         return 0
 
     def get_portfolio_value(self):
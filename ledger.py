@@ -0,0 +1,688 @@
+# ledger.py
+from bisect import bisect_right
+
+import numpy as np
+
+from idindex import IdIndex
+
+
+class RateIndex:
+    """
+    Running sum of the daily interest_rate_multiplier.
+
+    value(day) is the sum of the multipliers in force on every day up to and
+    including `day`, so the interest on a principal P at yearly rate r between
+    the end of day a and the end of day b is P * r / 365 * (value(b) - value(a)).
+    Stored as segments of constant multiplier: [start_day, multiplier, value(start_day - 1)].
+
+    `day` is the last day interest has run for (the bank's current day).
+    """
+
+    def __init__(self, day=0, multiplier=1.0):
+        self.day = day
+        self.starts = [day + 1]
+        self.multipliers = [multiplier]
+        self.bases = [0.0]
+
+    def advance(self, day):
+        self.day = day
+
+    def set_multiplier(self, day, multiplier):
+        """The multiplier in force from `day` on (days only move forward)."""
+        if self.starts[-1] == day:
+            self.multipliers[-1] = multiplier
+            return
+        self.bases.append(self.value(day - 1))
+        self.starts.append(day)
+        self.multipliers.append(multiplier)
+
+    def value(self, day):
+        i = max(bisect_right(self.starts, day) - 1, 0)
+        return self.bases[i] + (day - self.starts[i] + 1) * self.multipliers[i]
+
+    def values(self, days):
+        """value() for an array of days."""
+        starts = np.array(self.starts, dtype=np.int64)
+        i = np.maximum(np.searchsorted(starts, days, side="right") - 1, 0)
+        return (np.array(self.bases)[i] + (days - starts[i] + 1) * np.array(self.multipliers)[i])
+
+    # ---------- Persistence ----------
+    def to_list(self):
+        return [list(s) for s in zip(self.starts, self.multipliers, self.bases)]
+
+    @classmethod
+    def from_list(cls, rows, day, multiplier=1.0):
+        """Rebuild a saved index; old saves without one start a new index at `day`."""
+        index = cls(day, multiplier)
+        if rows:
+            index.starts = [int(r[0]) for r in rows]
+            index.multipliers = [r[1] for r in rows]
+            index.bases = [r[2] for r in rows]
+        return index
+
+
+class RowChanges:
+    """
+    The saved rows of a book that changed since its last save, as handed
+    from take_changes() to the save backends: `rows` (in the saved layout)
+    of the ids added or changed and the `removed` ids, or with full=True
+    every row. `column` is where the id sits in a row.
+
+    Slots (slots=True) are [position, id] rows of an id list saved in
+    position order, like the funded customer ids; plain() gives that list.
+    """
+
+    def __init__(self, rows, removed=(), full=False, column=0, slots=False):
+        self.rows = rows
+        self.removed = list(removed)
+        self.full = full
+        self.column = column
+        self.slots = slots
+
+    def merge(self, newer):
+        """These changes followed by `newer` (the SaveWriter coalesces queued saves)."""
+        if newer.full:
+            return newer
+        rows = {row[self.column]: row for row in self.rows}
+        removed = dict.fromkeys(self.removed)
+        for item in newer.removed:
+            rows.pop(item, None)
+            removed[item] = None
+        for row in newer.rows:
+            rows[row[self.column]] = row
+            removed.pop(row[self.column], None)
+        return RowChanges(list(rows.values()), [] if self.full else list(removed), self.full, self.column,
+                          self.slots)
+
+    def plain(self):
+        """The whole saved value of full changes."""
+        if self.slots:
+            return [item for _, item in sorted(self.rows)]
+        return self.rows
+
+
+class LoanBook:
+    """
+    Customer loans stored column-wise in NumPy arrays.
+
+    Each row is one loan with a stable loan_id. rows(), get() and iteration
+    use the list layout [amount, days_left, accrued, rate, customer_id,
+    loan_id] with today's values.
+
+    Interest is not added day by day: each loan keeps the accrued amount and
+    the day (and rate index value) of its last settlement plus its last
+    accruing day (end_day), and days_left/accrued are computed from `rates`
+    when needed. Saves store that settled state, [amount, end_day, accrued,
+    rate, customer_id, loan_id, settled_day], so a saved row only changes
+    when the loan itself does. Saves in the list layout (and old ones
+    without a loan_id) still load.
+
+    `index` maps loan_id -> row. The book is the only copy of the loans: a
+    customer's "loans" are built from it on demand (customer_loans).
+
+    `changed` holds the ids of the loans added, changed or repaid since the
+    last take_changes() (None: every loan, e.g. a book not loaded from the
+    saves), so a save writes only those rows.
+    """
+
+    def __init__(self, rates=None, capacity=64):
+        self.rates = rates if rates is not None else RateIndex()
+        self.size = 0
+        self.next_loan_id = 1
+        self.amount = np.zeros(capacity, dtype=np.float64)
+        self.end_day = np.zeros(capacity, dtype=np.int64)    # last day the loan accrues
+        self.accrued = np.zeros(capacity, dtype=np.float64)  # accrued at the last settlement
+        self.settled_day = np.zeros(capacity, dtype=np.int64)  # day of the last settlement
+        self.settled = np.zeros(capacity, dtype=np.float64)      # rates value on settled_day
+        self.rate = np.zeros(capacity, dtype=np.float64)
+        self.customer_id = np.zeros(capacity, dtype=np.int64)
+        self.loan_id = np.zeros(capacity, dtype=np.int64)
+        self.index = IdIndex()  # loan_id: row
+        self.changed = None
+        # Running totals: accrued interest of the book = base_total + weight_total * rates value today
+        self.principal_total = 0.0
+        self.weight_total = 0.0  # sum of amount * rate / 365
+        self.base_total = 0.0    # sum of accrued - weight * settled
+
+    # ---------- Container helpers ----------
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        """Iterate rows in the list format (copies, not live references)."""
+        for row in self.rows():
+            yield row
+
+    def __contains__(self, loan_id):
+        return loan_id in self.index
+
+    def row(self, row):
+        today = self.rates.day
+        end_day = int(self.end_day[row])
+        accrued = float(self.accrued[row]) + float(self.amount[row] * self.rate[row]) / 365 * (
+            self.rates.value(min(today, end_day)) - float(self.settled[row]))
+        return [float(self.amount[row]), max(end_day - today, 0), accrued,
+                float(self.rate[row]), int(self.customer_id[row]), int(self.loan_id[row])]
+
+    def rows(self):
+        n = self.size
+        return [list(r) for r in zip(self.amount[:n].tolist(), self.current_days_left().tolist(),
+                                     self.current_accrued().tolist(), self.rate[:n].tolist(),
+                                     self.customer_id[:n].tolist(), self.loan_id[:n].tolist())]
+
+    def get(self, loan_id):
+        """Return the list-format row for a loan id, or None."""
+        row = self.index.get(loan_id)
+        return None if row is None else self.row(row)
+
+    def _columns(self):
+        return ("amount", "end_day", "accrued", "settled_day", "settled", "rate", "customer_id", "loan_id")
+
+    def _grow(self, needed):
+        capacity = len(self.amount)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name in self._columns():
+            old = getattr(self, name)
+            new = np.zeros(new_capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    # ---------- Mutations ----------
+    def add(self, amount, days_left, rate, customer_id, accrued=0.0, loan_id=None):
+        """Append a loan (settled as of today) and return its loan id."""
+        today = self.rates.day
+        return self.add_settled(amount, today + days_left, accrued, today, rate, customer_id, loan_id)
+
+    def add_settled(self, amount, end_day, accrued, settled_day, rate, customer_id, loan_id=None):
+        """Append a loan with `accrued` interest as of settled_day (the saved layout) and return its loan id."""
+        if loan_id is None:
+            loan_id = self.next_loan_id
+        self.next_loan_id = max(self.next_loan_id, loan_id + 1)
+
+        self._grow(self.size + 1)
+        row = self.size
+        self.amount[row] = amount
+        self.end_day[row] = end_day
+        self.accrued[row] = accrued
+        self.settled_day[row] = settled_day
+        self.settled[row] = self.rates.value(settled_day)
+        self.rate[row] = rate
+        self.customer_id[row] = customer_id
+        self.loan_id[row] = loan_id
+        self.size += 1
+
+        weight = amount * rate / 365
+        self.principal_total += amount
+        self.weight_total += weight
+        self.base_total += accrued - weight * float(self.settled[row])
+
+        self.index[loan_id] = row
+        self.mark(loan_id)
+        return loan_id
+
+    def remove(self, loan_id):
+        """Remove a loan by id (the last row is moved into its slot)."""
+        row = self.index.pop(loan_id)
+        weight = self.amount[row] * self.rate[row] / 365
+        self.principal_total -= float(self.amount[row])
+        self.weight_total -= float(weight)
+        self.base_total -= float(self.accrued[row] - weight * self.settled[row])
+        last = self.size - 1
+        if row != last:
+            for name in self._columns():
+                column = getattr(self, name)
+                column[row] = column[last]
+            self.index[int(self.loan_id[row])] = row
+        self.size -= 1
+        self.mark(loan_id)
+
+    def mark(self, loan_id):
+        if self.changed is not None:
+            self.changed.add(loan_id)
+
+    def mark_saved(self):
+        """The book is as saved (just loaded): forget the changes."""
+        self.changed = set()
+
+    def matured(self):
+        """Ids of the loans past their last accruing day (repaid the day after), in row order."""
+        n = self.size
+        return self.loan_id[:n][self.end_day[:n] < self.rates.day].tolist()
+
+    # ---------- Interest ----------
+    def current_days_left(self):
+        return np.maximum(self.end_day[:self.size] - self.rates.day, 0)
+
+    def _accrual_days(self):
+        """The last day each loan has accrued for (today, or its end day)."""
+        return np.minimum(self.end_day[:self.size], self.rates.day)
+
+    def _accrual_index(self):
+        return self.rates.values(self._accrual_days())
+
+    def current_accrued(self):
+        n = self.size
+        return self.accrued[:n] + self.amount[:n] * self.rate[:n] / 365 * (self._accrual_index() - self.settled[:n])
+
+    def collect_accrued(self):
+        """Reset accrued interest on every loan and return the total collected."""
+        n = self.size
+        total = float(self.current_accrued().sum())
+        self.accrued[:n] = 0.0
+        self.settled_day[:n] = self._accrual_days()
+        self.settled[:n] = self.rates.values(self.settled_day[:n])
+        self.recount()
+        self.changed = None
+        return total
+
+    def accrued_total(self):
+        """Accrued interest of the whole book in O(1) (loans past their end day are repaid the next morning)."""
+        return self.base_total + self.weight_total * self.rates.value(self.rates.day)
+
+    def recount(self):
+        """Recompute the running totals from the columns (also clears float drift)."""
+        n = self.size
+        weight = self.amount[:n] * self.rate[:n] / 365
+        self.principal_total = float(self.amount[:n].sum())
+        self.weight_total = float(weight.sum())
+        self.base_total = float((self.accrued[:n] - weight * self.settled[:n]).sum())
+
+    # ---------- Customer view ----------
+    def customer_loans(self, customer_id):
+        """A customer's loans as new dicts {loan_id, amount, days_left, accrued, rate}, interest up to today."""
+        loans = []
+        for row in np.flatnonzero(self.customer_id[:self.size] == customer_id).tolist():
+            amount, days_left, accrued, rate, _, loan_id = self.row(row)
+            loans.append({"loan_id": loan_id, "amount": amount, "days_left": days_left,
+                          "accrued": accrued, "rate": rate})
+        return loans
+
+    # ---------- Persistence ----------
+    def to_list(self):
+        """Settled rows: [amount, end_day, accrued, rate, customer_id, loan_id, settled_day]."""
+        n = self.size
+        return [list(r) for r in zip(self.amount[:n].tolist(), self.end_day[:n].tolist(),
+                                     self.accrued[:n].tolist(), self.rate[:n].tolist(),
+                                     self.customer_id[:n].tolist(), self.loan_id[:n].tolist(),
+                                     self.settled_day[:n].tolist())]
+
+    def take_changes(self, full=False):
+        """RowChanges of the loans changed since the last call (every loan with full=True)."""
+        changed, self.changed = self.changed, set()
+        if full or changed is None:
+            return RowChanges(self.to_list(), full=True, column=5)
+        rows = [self.index.get(loan_id) for loan_id in changed]
+        saved = [[float(self.amount[row]), int(self.end_day[row]), float(self.accrued[row]), float(self.rate[row]),
+                  int(self.customer_id[row]), int(self.loan_id[row]), int(self.settled_day[row])]
+                 for row in rows if row is not None]
+        return RowChanges(saved, [loan_id for loan_id in changed if loan_id not in self.index], column=5)
+
+    @classmethod
+    def from_list(cls, rows, next_loan_id=1, rates=None):
+        """
+        Settled rows (to_list), rows in the list layout (settled as of today)
+        or a dict of columns (binary snapshots).
+        """
+        if isinstance(rows, dict):
+            return cls.from_columns(rows, next_loan_id, rates)
+        book = cls(rates, capacity=max(64, len(rows)))
+        # Leave room for saved ids so rows from old saves never collide with them
+        book.next_loan_id = max([next_loan_id] + [row[5] + 1 for row in rows if len(row) > 5])
+        for row in rows:
+            if len(row) > 6:
+                amount, end_day, accrued, rate, customer_id, loan_id, settled_day = row[:7]
+                book.add_settled(amount, end_day, accrued, settled_day, rate, customer_id, loan_id)
+                continue
+            amount, days_left, accrued, rate, customer_id = row[:5]
+            loan_id = row[5] if len(row) > 5 else None
+            book.add(amount, days_left, rate, customer_id, accrued, loan_id=loan_id)
+        return book
+
+    @classmethod
+    def from_columns(cls, columns, next_loan_id=1, rates=None):
+        """
+        Load from amount/end_day/accrued/rate/customer_id/loan_id/settled_day
+        arrays (or days_left instead of end_day and settled_day, settled as of
+        today) without building rows.
+        """
+        n = len(columns["amount"])
+        book = cls(rates, capacity=max(64, n))
+        today = book.rates.day
+        book.amount[:n] = columns["amount"]
+        book.accrued[:n] = columns["accrued"]
+        if "settled_day" in columns:
+            book.end_day[:n] = columns["end_day"]
+            book.settled_day[:n] = columns["settled_day"]
+            book.settled[:n] = book.rates.values(book.settled_day[:n])
+        else:
+            book.end_day[:n] = today + columns["days_left"]
+            book.settled_day[:n] = today
+            book.settled[:n] = book.rates.value(today)
+        book.rate[:n] = columns["rate"]
+        book.customer_id[:n] = columns["customer_id"]
+        book.loan_id[:n] = columns["loan_id"]
+        book.size = n
+        book.index = IdIndex.from_ids(book.loan_id[:n])
+        book.next_loan_id = max([next_loan_id] + ([int(book.loan_id[:n].max()) + 1] if n else []))
+        book.recount()
+        return book
+
+
+class DepositBook:
+    """
+    Customer deposits stored column-wise in NumPy arrays, one row per
+    customer with a deposit: amount, the interest accrued and not paid out
+    yet (as of settled_day) and customer_id. The book is the only copy: a
+    customer's "deposits" are built from it on demand (customer_deposits).
+
+    Like LoanBook, interest is computed lazily from `rates`, and the running
+    totals give the interest owed to all customers in O(1). Saves store
+    [amount, accrued, customer_id, settled_day] rows. Saves from before the
+    book held the unpaid interest kept a lifetime total in accrued instead;
+    Bank.load_data rebuilds those rows with adopt_legacy().
+
+    `changed` holds the customer ids whose row changed since the last
+    take_changes() (None: every row), as in LoanBook.
+    """
+
+    def __init__(self, rates=None, rate=0.01, capacity=64):
+        self.rates = rates if rates is not None else RateIndex()
+        self.rate = rate
+        self.size = 0
+        self.customer_id = np.zeros(capacity, dtype=np.int64)
+        self.amount = np.zeros(capacity, dtype=np.float64)
+        self.accrued = np.zeros(capacity, dtype=np.float64)      # unpaid interest at the last settlement
+        self.settled_day = np.zeros(capacity, dtype=np.int64)  # day of the last settlement
+        self.settled = np.zeros(capacity, dtype=np.float64)      # rates value on settled_day
+        self.index = IdIndex()  # customer_id: row
+        self.changed = None
+        # Interest owed to customers = owed_base + owed_weight * rates value today
+        self.owed_base = 0.0    # sum of accrued - weight * settled
+        self.owed_weight = 0.0  # sum of amount * rate / 365
+
+    # ---------- Container helpers ----------
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, customer_id):
+        return customer_id in self.index
+
+    def customer_ids(self):
+        return self.customer_id[:self.size].tolist()
+
+    def get(self, customer_id):
+        """[amount, accrued up to today, customer_id] for a customer, or None."""
+        row = self.index.get(customer_id)
+        if row is None:
+            return None
+        return [float(self.amount[row]), self._accrued(row), customer_id]
+
+    def amount_of(self, customer_id):
+        row = self.index.get(customer_id)
+        return 0.0 if row is None else float(self.amount[row])
+
+    def amounts_of(self, customer_ids):
+        """amount_of() for an array of customer ids."""
+        rows = self.index.rows(customer_ids)
+        amounts = np.zeros(len(rows), dtype=np.float64)
+        known = rows >= 0
+        amounts[known] = self.amount[rows[known]]
+        return amounts
+
+    def customer_deposits(self, customer_id):
+        """A customer's "deposits" as new dicts [{amount, accrued, settled_day}], interest up to today."""
+        row = self.index.get(customer_id)
+        if row is None:
+            return []
+        return [{"amount": float(self.amount[row]), "accrued": self._accrued(row), "settled_day": self.rates.day}]
+
+    def _columns(self):
+        return ("customer_id", "amount", "accrued", "settled_day", "settled")
+
+    def _grow(self, needed):
+        capacity = len(self.amount)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name in self._columns():
+            old = getattr(self, name)
+            new = np.zeros(new_capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    # ---------- Mutations ----------
+    def add(self, amount, customer_id, accrued=0.0, settled_day=None):
+        """Open a customer's row with `accrued` unpaid interest as of settled_day (default today)."""
+        day = self.rates.day if settled_day is None else settled_day
+        self._grow(self.size + 1)
+        row = self.size
+        self.customer_id[row] = customer_id
+        self.amount[row] = amount
+        self.accrued[row] = accrued
+        self.settled_day[row] = day
+        self.settled[row] = self.rates.value(day)
+        self.index[customer_id] = row
+        self.size += 1
+        self._track(row)
+        self.mark(customer_id)
+
+    def remove(self, customer_id):
+        """Close a customer's row (the last row is moved into its slot); unpaid interest goes with it."""
+        row = self.index.pop(customer_id, None)
+        if row is None:
+            return
+        self._track(row, -1)
+        last = self.size - 1
+        if row != last:
+            for name in self._columns():
+                column = getattr(self, name)
+                column[row] = column[last]
+            self.index[int(self.customer_id[row])] = row
+        self.size -= 1
+        self.mark(customer_id)
+
+    def mark(self, customer_id):
+        if self.changed is not None:
+            self.changed.add(customer_id)
+
+    def mark_saved(self):
+        """The book is as saved (just loaded): forget the changes."""
+        self.changed = set()
+
+    def change(self, customer_id, delta):
+        """
+        Add `delta` to a customer's amount (rounded to cents), settling the
+        row first. Opens the row for a positive delta and closes it when the
+        amount drops to zero. Returns the new amount.
+        """
+        row = self.index.get(customer_id)
+        if row is None:
+            if delta <= 0:
+                return 0.0
+            self.add(round(delta, 2), customer_id)
+            return round(delta, 2)
+        self.settle(customer_id)
+        self._track(row, -1)
+        amount = self.amount[row] = round(float(self.amount[row]) + delta, 2)
+        self._track(row)
+        self.mark(customer_id)
+        if amount <= 0:
+            self.remove(customer_id)
+            return 0.0
+        return amount
+
+    def _track(self, row, sign=1):
+        """Add a row's share to the owed totals (sign=-1 takes it out)."""
+        weight = float(self.amount[row]) * self.rate / 365
+        self.owed_base += sign * (float(self.accrued[row]) - weight * float(self.settled[row]))
+        self.owed_weight += sign * weight
+
+    # ---------- Interest ----------
+    def _accrued(self, row):
+        return float(self.accrued[row]) + float(self.amount[row]) * self.rate / 365 * (
+            self.rates.value(self.rates.day) - float(self.settled[row]))
+
+    def accrued_of(self, customer_id):
+        """A customer's unpaid deposit interest up to today, without settling anything."""
+        row = self.index.get(customer_id)
+        return 0.0 if row is None else self._accrued(row)
+
+    def current_accrued(self):
+        n = self.size
+        return self.accrued[:n] + self.amount[:n] * self.rate / 365 * (self.rates.value(self.rates.day) - self.settled[:n])
+
+    def settle(self, customer_id):
+        """Bring a row's accrued interest up to today (the owed totals do not change)."""
+        row = self.index.get(customer_id)
+        today = self.rates.day
+        if row is None or self.settled_day[row] == today:
+            return
+        self.accrued[row] = self._accrued(row)
+        self.settled_day[row] = today
+        self.settled[row] = self.rates.value(today)
+        self.mark(customer_id)
+
+    def settle_all(self):
+        n = self.size
+        self.accrued[:n] = self.current_accrued()
+        self.settled_day[:n] = self.rates.day
+        self.settled[:n] = self.rates.value(self.rates.day)
+        self.changed = None
+
+    def pay(self, customer_id):
+        """Settle a customer's row and reset its unpaid interest; returns the interest."""
+        row = self.index.get(customer_id)
+        if row is None:
+            return 0.0
+        self.settle(customer_id)
+        paid = float(self.accrued[row])
+        self._track(row, -1)
+        self.accrued[row] = 0.0
+        self._track(row)
+        self.mark(customer_id)
+        return paid
+
+    def pay_all(self):
+        """Settle every row and reset its unpaid interest; returns (customer ids, interest) arrays."""
+        n = self.size
+        paid = self.current_accrued()
+        self.accrued[:n] = 0.0
+        self.settled_day[:n] = self.rates.day
+        self.settled[:n] = self.rates.value(self.rates.day)
+        self.recount()
+        self.changed = None
+        return self.customer_id[:n].copy(), paid
+
+    def scale(self, factor):
+        """
+        Multiply every amount by `factor` (economic changes). Call after
+        settle_all(); a rate change made today applies from here on.
+        """
+        n = self.size
+        self.amount[:n] = np.round(self.amount[:n] * factor, 2)
+        self.settled[:n] = self.rates.values(self.settled_day[:n])
+        self.recount()
+        self.changed = None
+
+    # ---------- Owed interest ----------
+    def recount(self):
+        """Recompute the owed totals from the columns (also clears float drift)."""
+        n = self.size
+        weight = self.amount[:n] * self.rate / 365
+        self.owed_weight = float(weight.sum())
+        self.owed_base = float((self.accrued[:n] - weight * self.settled[:n]).sum())
+
+    def owed_interest(self):
+        return self.owed_base + self.owed_weight * self.rates.value(self.rates.day)
+
+    def rank_values(self):
+        """(customer ids, amount + accrued at the last settlement) for the deposit ranking."""
+        n = self.size
+        return self.customer_id[:n], self.amount[:n] + self.accrued[:n]
+
+    def adopt_legacy(self, customer_id, entries):
+        """
+        Rebuild a row loaded from an old save from the customer's old deposit
+        entries: their unpaid "accrued" plus the interest since its
+        "settled_day" on the first entry at least as large as the row, the
+        one old saves accrued into. Call recount() when done.
+        """
+        row = self.index.get(customer_id)
+        if row is None:
+            return
+        rates = self.rates
+        now = rates.value(rates.day)
+        accrued = sum(cd.get("accrued", 0.0) for cd in entries)
+        for cd in entries:
+            if cd.get("amount", 0.0) >= self.amount[row]:
+                settled_day = cd.get("settled_day", int(self.settled_day[row]))
+                accrued += float(self.amount[row]) * self.rate / 365 * (now - rates.value(settled_day))
+                break
+        self.accrued[row] = accrued
+        self.settled_day[row] = rates.day
+        self.settled[row] = now
+        self.mark(customer_id)
+
+    # ---------- Persistence ----------
+    def to_list(self):
+        """Settled rows: [amount, accrued, customer_id, settled_day]."""
+        n = self.size
+        return [list(r) for r in zip(self.amount[:n].tolist(), self.accrued[:n].tolist(),
+                                     self.customer_id[:n].tolist(), self.settled_day[:n].tolist())]
+
+    def take_changes(self, full=False):
+        """RowChanges of the deposit rows changed since the last call (every row with full=True)."""
+        changed, self.changed = self.changed, set()
+        if full or changed is None:
+            return RowChanges(self.to_list(), full=True, column=2)
+        rows = [self.index.get(customer_id) for customer_id in changed]
+        saved = [[float(self.amount[row]), float(self.accrued[row]), int(self.customer_id[row]),
+                  int(self.settled_day[row])] for row in rows if row is not None]
+        return RowChanges(saved, [cid for cid in changed if cid not in self.index], column=2)
+
+    @classmethod
+    def from_list(cls, rows, rates=None, rate=0.01):
+        """
+        Settled rows (to_list) or a dict of columns (binary snapshots). Rows
+        from old saves ([amount, accrued, customer_id]) are settled as of today.
+        """
+        if isinstance(rows, dict):
+            return cls.from_columns(rows, rates, rate)
+        return cls.from_columns({
+            "amount": np.array([row[0] for row in rows], dtype=np.float64),
+            "accrued": np.array([row[1] for row in rows], dtype=np.float64),
+            "customer_id": np.array([row[2] for row in rows], dtype=np.int64),
+            "settled_day": np.array([row[3] if len(row) > 3 else -1 for row in rows], dtype=np.int64),
+        }, rates, rate)
+
+    @classmethod
+    def from_columns(cls, columns, rates=None, rate=0.01):
+        """
+        Load from amount/accrued/customer_id/settled_day arrays (settled_day
+        -1 = as of today). Several rows of one customer (very old saves) are
+        merged.
+        """
+        book = cls(rates, rate)
+        customer_id = np.asarray(columns["customer_id"], dtype=np.int64)
+        amount = np.asarray(columns["amount"], dtype=np.float64)
+        accrued = np.asarray(columns["accrued"], dtype=np.float64)
+        settled_day = np.asarray(columns["settled_day"], dtype=np.int64)
+        settled_day = np.where(settled_day < 0, book.rates.day, settled_day)
+        ids, first, inverse = np.unique(customer_id, return_index=True, return_inverse=True)
+        if len(ids) < len(customer_id):
+            customer_id, settled_day = ids, settled_day[first]
+            amount = np.bincount(inverse, amount, len(ids))
+            accrued = np.bincount(inverse, accrued, len(ids))
+        n = len(customer_id)
+        book._grow(n)
+        book.customer_id[:n] = customer_id
+        book.amount[:n] = amount
+        book.accrued[:n] = accrued
+        book.settled_day[:n] = settled_day
+        book.settled[:n] = book.rates.values(settled_day)
+        book.size = n
+        book.index = IdIndex.from_ids(customer_id)
+        book.recount()
+        return book
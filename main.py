@@ -1,4 +1,3 @@
-import time
 import random
 import tkinter as tk
 from tkinter import simpledialog, ttk
@@ -10,8 +9,11 @@ import os
 # Import your other modules (ensure they are in the same directory)
 from history import HistoryLogger
 from bank import Bank
-from events import deposit_event, withdraw_event, loan_request_event
+from events import EVENT_RATES, deposit_event, withdraw_event, loan_request_event, run_event_batch
 from menu import PauseMenu  # for the map
+from panels import VirtualList
+from saveload import enable_journal
+from worker import SPEEDS, SimulationWorker
 
 # -------------------------------
 # File paths for map resources
@@ -24,20 +26,27 @@ JSON_FILE = ("files/countries.json")
 with open(JSON_FILE, "r", encoding="utf-8") as f:
     COUNTRY_NAMES = json.load(f)
 
+FRAME_MS = 100  # how often the GUI renders the newest simulation snapshot
+
 # -------------------------------
 # Modified BankingGUI (now takes a parent)
 # -------------------------------
 class BankingGUI:
     def __init__(self, parent, bank: Bank):
         self.root = parent  # Use the parent window
-        self.bank = bank
+        self.bank = bank  # owned by the worker thread: use self.worker.call() to change it
         self.running = True
-        self.simulation_paused = False
-        self.day_duration = 1
-        self.last_day_time = time.time()
+        # The simulation runs on its own thread and publishes snapshots for the GUI
+        self.worker = SimulationWorker(bank, tick=self.simulate_day, day_duration=1)
+        self.rendered_version = 0
+        self.shown_economic_event = 0  # sequence number of the last economic event displayed
         self.pending_event = None
+        # Everyday customer traffic per day (empty = off). No batch loans: loan
+        # requests come from simulate_event, which asks for approval at 1x
+        self.event_rates = {kind: rate for kind, rate in EVENT_RATES.items() if kind != "loan"}
         self.history_logger = HistoryLogger()
-        self.logged_history_ids = set()
+        bank.history_logger = self.history_logger  # the bank logs each entry as it is added
+        self.timings_window = None
 
         # Configure business-like fonts
         self.small_font = ("Segoe UI", 8)
@@ -117,10 +126,13 @@ class BankingGUI:
                                      font=self.title_font, bg="#2c3e50", fg="#ecf0f1")
         deposits_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=1, pady=1)
 
-        self.deposits_text = tk.Text(deposits_frame, bg="#34495e", fg="#ecf0f1", 
-                                   font=self.small_font, borderwidth=1, relief=tk.SUNKEN)
-        self.deposits_text.pack(fill=tk.BOTH, expand=True, padx=1, pady=1)
-        self.deposits_text.tag_configure("red", foreground="#e74c3c")
+        # Only the rows in view are drawn; scroll or page through the whole book
+        self.deposits_list = VirtualList(deposits_frame, self.format_deposit_row,
+                                         on_view=lambda top, visible: self.show_rows("deposit_window", top, visible),
+                                         bg="#34495e", fg="#ecf0f1", font=self.small_font, borderwidth=1,
+                                         relief=tk.SUNKEN)
+        self.deposits_list.pack(fill=tk.BOTH, expand=True, padx=1, pady=1)
+        self.deposits_list.tag_configure("red", foreground="#e74c3c")
 
         # Deposit Interest Counter
         self.deposit_counter_label = tk.Label(deposits_frame, text="", font=self.small_font, 
@@ -132,10 +144,12 @@ class BankingGUI:
                                   font=self.title_font, bg="#2c3e50", fg="#ecf0f1")
         loans_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=1, pady=1)
 
-        self.loans_text = tk.Text(loans_frame, bg="#34495e", fg="#ecf0f1", 
-                                font=self.small_font, borderwidth=1, relief=tk.SUNKEN)
-        self.loans_text.pack(fill=tk.BOTH, expand=True, padx=1, pady=1)
-        self.loans_text.tag_configure("green", foreground="#2ecc71")
+        self.loans_list = VirtualList(loans_frame, self.format_loan_row,
+                                      on_view=lambda top, visible: self.show_rows("loan_window", top, visible),
+                                      bg="#34495e", fg="#ecf0f1", font=self.small_font, borderwidth=1,
+                                      relief=tk.SUNKEN)
+        self.loans_list.pack(fill=tk.BOTH, expand=True, padx=1, pady=1)
+        self.loans_list.tag_configure("green", foreground="#2ecc71")
 
         # Loan Interest Counter
         self.loan_counter_label = tk.Label(loans_frame, text="", font=self.small_font, 
@@ -201,14 +215,36 @@ class BankingGUI:
         self.pause_btn = tk.Button(controls_frame, text="Pause", command=self.toggle_pause, **button_style)
         self.pause_btn.pack(side=tk.LEFT, padx=2)
         tk.Button(controls_frame, text="Continue", command=self.continue_event, **button_style).pack(side=tk.LEFT, padx=2)
+        self.speed_btn = tk.Button(controls_frame, text="Speed: 1x", command=self.cycle_speed, **button_style)
+        self.speed_btn.pack(side=tk.LEFT, padx=2)
+        tk.Button(controls_frame, text="Timings", command=self.toggle_timings, **button_style).pack(side=tk.LEFT, padx=2)
+
+        # Start the simulation and the render loop
+        self.worker.start()
+        self.root.after(FRAME_MS, self.render_loop)
+
+    # Pause state and speed live on the worker
+    @property
+    def simulation_paused(self):
+        return self.worker.paused
+
+    @simulation_paused.setter
+    def simulation_paused(self, paused):
+        self.worker.paused = paused
 
-        # Start loop
-        self.root.after(100, self.update_loop)
+    @property
+    def day_duration(self):
+        return self.worker.day_duration
+
+    @day_duration.setter
+    def day_duration(self, seconds):
+        self.worker.day_duration = seconds
 
     # loan input
     def get_loan_input(self, customer_id, amount, years, rate, credit_score):
         """
-        Called by loan_request_event for interactive approval.
+        Called by loan_request_event for interactive approval (on the Tk
+        thread, through SimulationWorker.ask).
         Returns 'accept', 'decline', or ('counter', new_amt, new_years)
         """
         result = {}
@@ -262,11 +298,11 @@ class BankingGUI:
         amt = simpledialog.askfloat("Borrow", "Amount:")
         yrs = simpledialog.askfloat("Borrow", "Years:")
         if amt and yrs:
-            self.bank.borrow_central_bank(amt, yrs)
+            self.worker.call(self.bank.borrow_central_bank, amt, yrs)
             self.refresh_dashboard()
 
     def repay(self):
-        self.bank.repay_central_bank()
+        self.worker.call(self.bank.repay_central_bank)
         self.refresh_dashboard()
 
     def toggle_pause(self):
@@ -280,6 +316,12 @@ class BankingGUI:
             else:
                 self.map_app_ref.resume_game()
 
+    def cycle_speed(self):
+        """Next game clock speed: 1x, 10x, 100x, max (as many days as the worker can run)."""
+        speed = SPEEDS[(SPEEDS.index(self.worker.speed) + 1) % len(SPEEDS)]
+        self.worker.speed = speed
+        self.speed_btn.config(text=f"Speed: {speed}x" if speed else "Speed: max")
+
     def continue_event(self):
         self.simulation_paused = False
         self.pause_btn.config(text="Pause")  # Update button text
@@ -291,28 +333,62 @@ class BankingGUI:
 
 
     def quit_game(self):
-        self.running = False
+        self.shutdown()
         self.root.destroy()
 
+    def shutdown(self):
+        """Stop the simulation thread, then write everything still queued before the window goes."""
+        self.running = False
+        self.worker.stop()
+        self.bank.stop_writer()
+        self.bank.history_logger = None
+        self.history_logger.close()
+
+    # --- advance_day phase timings ---
+    def toggle_timings(self):
+        if self.timings_window and self.timings_window.winfo_exists():
+            self.timings_window.destroy()
+            self.timings_window = None
+            return
+        self.timings_window = tk.Toplevel(self.root)
+        self.timings_window.title("Day timings (ms)")
+        self.timings_text = tk.Text(self.timings_window, width=64, height=12, bg="#34495e", fg="#ecf0f1",
+                                    font=("Consolas", 9))
+        self.timings_text.pack(fill=tk.BOTH, expand=True)
+        self.refresh_timings()
+
+    def refresh_timings(self):
+        if not (self.timings_window and self.timings_window.winfo_exists()):
+            return
+        self.timings_text.config(state="normal")
+        self.timings_text.delete(1.0, tk.END)
+        _, snap = self.worker.snapshots.latest()
+        self.timings_text.insert(tk.END, snap["timings"] if snap else "")
+        self.timings_text.config(state="disabled")
+
     # --- Dashboard ---
     def refresh_dashboard(self):
-        total_customer_balance = sum(c.get("deposit_balance", 0) for c in self.bank.customers.values())
-        self.total_deposits_label.config(text=f"Balance Bank: ${self.bank.balance:,.2f} / Accounts: ${total_customer_balance:,.2f}")
-        self.day_label.config(text=f"Day: {self.bank.day}")
+        """Render the latest snapshot published by the simulation worker."""
+        version, snap = self.worker.snapshots.latest()
+        if snap is None:
+            return
+        self.rendered_version = version
+        totals = snap["totals"]
+        self.total_deposits_label.config(text=f"Balance Bank: ${snap['balance']:,.2f} / Accounts: ${totals['deposit_balance']:,.2f}")
+        self.day_label.config(text=f"Day: {snap['day']}")
 
         # Display all event messages
             # Check for event messages to display (this is where event display logic belongs)
         event_messages = []
 
             # Add economic events if available
-        if hasattr(self.bank, 'last_economic_event') and self.bank.last_economic_event:
-            event_messages.append(f"Economic Event: {self.bank.last_economic_event}")
-            self.bank.last_economic_event = None
+        seq, economic_event = snap["economic_event"]
+        if seq > self.shown_economic_event:
+            self.shown_economic_event = seq
+            event_messages.append(f"Economic Event: {economic_event}")
 
             # Add other event messages from simulation
-        if hasattr(self.bank, 'event_messages') and self.bank.event_messages:
-            event_messages.extend(self.bank.event_messages)
-                # Don't clear here - we'll clear after displaying
+        event_messages.extend(snap["event_messages"])
 
             # Display all event messages
         if event_messages:
@@ -337,8 +413,8 @@ class BankingGUI:
         self.central_loans_text.config(state="normal")
         self.central_loans_text.delete(1.0, tk.END)
         self.central_loans_text.insert(tk.END, "Central Bank Loans:\n")
-        if self.bank.central_loans:
-            for loan in self.bank.central_loans:
+        if snap["central_loans"]:
+            for loan in snap["central_loans"]:
                 principal, days_left, accrued, rate = loan
                 total_due = principal + accrued
 
@@ -351,118 +427,109 @@ class BankingGUI:
 
         # Monthly and yearly income
         self.monthly_income_label.config(
-            text=f"Monthly Income: ${self.bank.monthly_income:,.2f}"
+            text=f"Monthly Income: ${snap['monthly_income']:,.2f}"
         )
 
         # Use the bank's calculated yearly income instead of calculating it here
         self.yearly_income_label.config(
-            text=f"Yearly Income: ${self.bank.yearly_income:,.2f}"  # CHANGED THIS LINE
+            text=f"Yearly Income: ${snap['yearly_income']:,.2f}"  # CHANGED THIS LINE
         )
 
         #taxes
-        if self.bank.taxes_paid_history:
-            last_tax = self.bank.taxes_paid_history[-1]
-            self.tax_label.config(text=f"Taxes: ${last_tax:,.2f}")
+        if snap["last_tax"] is not None:
+            self.tax_label.config(text=f"Taxes: ${snap['last_tax']:,.2f}")
         else:
             self.tax_label.config(text="Taxes: $0.00")
 
         # Update economic state display - ADD THIS
-        self.economic_state.config(text=f"Economic State: {self.bank.economic_status}")
+        economic_status = snap["economic_status"]
+        self.economic_state.config(text=f"Economic State: {economic_status}")
 
         # Set appropriate color based on economic state
 
-        if self.bank.economic_status == "Boom":
+        if economic_status == "Boom":
             self.economic_state.config(fg="#27ae60")  # Green
-        elif self.bank.economic_status == "Recession":
+        elif economic_status == "Recession":
             self.economic_state.config(fg="#e74c3c")  # Red
-        elif self.bank.economic_status == "Inflation":
+        elif economic_status == "Inflation":
             self.economic_state.config(fg="#f39c12")  # Orange
-        elif self.bank.economic_status == "Crisis":
+        elif economic_status == "Crisis":
             self.economic_state.config(fg="#8e44ad")  # Purple
         else:  # Normal
             self.economic_state.config(fg="#3498db")  # Blue
 
 
         # --- Interest counters ---
-        days_until_deposit_payout = 30 - self.bank.days_since_last_collection
-        days_until_loan_collection = 30 - self.bank.days_since_last_collection
-        self.deposit_counter_label.config(text=f"Deposit interest in: {days_until_deposit_payout} days")
-        self.loan_counter_label.config(text=f"Loan interest in: {days_until_loan_collection} days")
-
-
-
-        # --- Deposits Panel ---
-        self.deposits_text.config(state="normal")
-        self.deposits_text.delete(1.0, tk.END)
-
-        # Collect all deposits and sort by amount (largest first)
-        all_deposits = []
-        for cid, c in self.bank.customers.items():
-            for dep in c.get("deposits", []):
-                principal = dep.get("amount", 0.0)
-                accrued = dep.get("accrued", 0.0)
-                total = principal + accrued
-                all_deposits.append((total, cid, principal, accrued))
-
-        # Sort by total amount (largest first)
-        all_deposits.sort(key=lambda x: x[0], reverse=True)
-
-        # Display sorted deposits
-        for total, cid, principal, accrued in all_deposits:
-            self.deposits_text.insert(tk.END, f"Customer {cid}: ${principal:.2f} (+ ")
-            self.deposits_text.insert(tk.END, f"${accrued:.2f}", "red")
-            self.deposits_text.insert(tk.END, " interest)\n")
-
-        self.deposits_text.config(state="disabled")
-
-        # --- Loans Panel ---
-        self.loans_text.config(state="normal")
-        self.loans_text.delete(1.0, tk.END)
-
-        # Collect all loans and sort by amount (largest first)
-        all_loans = []
-        for cid, c in self.bank.customers.items():
-            for l in c.get("loans", []):
-                principal = l.get("amount", 0.0)
-                accrued = l.get("accrued", 0.0)
-                days_left = l.get("days_left", 0)
-                total = principal + accrued
-                all_loans.append((total, cid, principal, accrued, days_left))
-
-        # Sort by total amount (largest first)
-        all_loans.sort(key=lambda x: x[0], reverse=True)
-
-        # Display sorted loans
-        for total, cid, principal, accrued, days_left in all_loans:
-            self.loans_text.insert(tk.END, f"Customer {cid}: ${principal:.2f} (+ ")
-            self.loans_text.insert(tk.END, f"${accrued:.2f}", "green")
-            self.loans_text.insert(tk.END, f" interest) | {days_left} days left\n")
-
-        self.loans_text.config(state="disabled")
+        days_until_deposit_payout = 30 - snap["days_since_last_collection"]
+        days_until_loan_collection = 30 - snap["days_since_last_collection"]
+        self.deposit_counter_label.config(text=f"Deposit interest in: {days_until_deposit_payout} days "
+                                               f"(${totals['deposit_interest_owed']:,.2f} owed)")
+        self.loan_counter_label.config(text=f"Loan interest in: {days_until_loan_collection} days "
+                                            f"(${totals['loan_interest_accrued']:,.2f} on ${totals['loan_principal']:,.0f})")
+
+
+
+        # --- Deposits and Loans Panels (largest first, the rows around each panel's scroll position) ---
+        self.deposits_list.set_source(snap["deposits"])
+        self.loans_list.set_source(snap["loans"])
 
         # --- History Panel ---
         self.history_text.config(state="normal")
         self.history_text.delete(1.0, tk.END)
-        for day, desc in reversed(self.bank.history[-8:]):
+        for day, desc in reversed(snap["history"]):
             self.history_text.insert(tk.END, f"Day {day}: {desc}\n")
-            # Only log new events
-            history_id = (day, desc)
-            if history_id not in self.logged_history_ids:
-                self.history_logger.log(f"Day {day}: {desc}")
-                self.logged_history_ids.add(history_id)
         self.history_text.config(state="disabled")
 
         # Transaction log
         self.transactions_text.config(state="normal")
         self.transactions_text.delete(1.0, tk.END)
-        for sign, value in reversed(self.bank.transaction_values[-8:]):
+        for sign, value in reversed(snap["transactions"]):
             if sign == '+':
                 self.transactions_text.insert(tk.END, f"+{value:.2f}\n", "green")
             else:
                 self.transactions_text.insert(tk.END, f"-{value:.2f}\n", "red")
         self.transactions_text.config(state="disabled")
 
-    # --- Event simulation ---
+        self.refresh_timings()
+
+    def show_rows(self, window, top, visible):
+        """Ask the worker for the ranked rows around a panel's new scroll position (a page either side)."""
+        self.worker.request_snapshot(**{window: (max(top - visible, 0), 3 * visible)})
+
+    @staticmethod
+    def format_deposit_row(row):
+        total, cid, principal, accrued = row
+        return [(f"Customer {cid}: ${principal:.2f} (+ ", None), (f"${accrued:.2f}", "red"), (" interest)", None)]
+
+    @staticmethod
+    def format_loan_row(row):
+        total, cid, principal, accrued, days_left = row
+        return [(f"Customer {cid}: ${principal:.2f} (+ ", None), (f"${accrued:.2f}", "green"),
+                (f" interest) | {days_left} days left", None)]
+
+    # --- Event simulation (worker thread) ---
+    def simulate_day(self, bank):
+        """One simulated day; SimulationWorker calls this on its thread."""
+        # One save for the whole tick (day + events)
+        with bank.batch():
+            bank.advance_day()
+
+            # Everyday customer traffic, then the featured random event
+            if self.event_rates:
+                run_event_batch(bank, self.event_rates)
+            if random.random() < 0.5:
+                self.simulate_event()
+
+    def ask_loan_input(self, *request):
+        """Approval callback for the worker thread: shows get_loan_input on the Tk thread."""
+        answer = self.worker.ask(self.get_loan_input, *request)
+        return 'decline' if answer is None else answer  # None = the game is closing
+
+    @staticmethod
+    def decline_loan(*request):
+        """Approval callback above 1x: decline without asking."""
+        return 'decline'
+
     def simulate_event(self):
         try:
             event_funcs = [deposit_event, loan_request_event]
@@ -471,7 +538,8 @@ class BankingGUI:
                 event_funcs.append(withdraw_event)
 
             evt_func = random.choice(event_funcs)
-            should_pause = evt_func != loan_request_event
+            # Only stop on deposit/withdrawal events at 1x; faster speeds would pause every few frames
+            should_pause = evt_func != loan_request_event and self.worker.speed == 1
 
             if should_pause:
                 self.simulation_paused = True
@@ -480,46 +548,36 @@ class BankingGUI:
 
             # Run event and ensure result is a string
             if evt_func == loan_request_event:
-                result = evt_func(self.bank, approval_callback=self.get_loan_input)
-                # Don't pause for loan events – handled in modal
+                # Ask in a modal at 1x; above that the dialogs would stall the clock, and
+                # nobody is there to approve, so requests are turned down
+                callback = self.ask_loan_input if self.worker.speed == 1 else self.decline_loan
+                result = evt_func(self.bank, approval_callback=callback)
             else:
                 result = evt_func(self.bank)
-                # Pause for deposit/withdrawal events
-                self.simulation_paused = True
 
             if not isinstance(result, str):
                 result = str(result)
 
             # Store the result in bank's event messages
-            if hasattr(self.bank, 'event_messages'):
-                self.bank.event_messages.append(result)
-            else:
-                # Initialize if it doesn't exist
-                self.bank.event_messages = [result]
+            self.bank.event_messages.append(result)
 
         except Exception as e:
             print(f"Error in simulate_event: {e}")
             # Store error as an event message
-            if hasattr(self.bank, 'event_messages'):
-                self.bank.event_messages.append(f"Error in event: {e}")
-            else:
-                self.bank.event_messages = [f"Error in event: {e}"]
-
-    # --- Update Loop ---
-    def update_loop(self):
-        if self.running and not self.simulation_paused:
-            curr = time.time()
-            if curr - self.last_day_time >= self.day_duration:
-                self.bank.advance_day()
-                self.last_day_time = curr
+            self.bank.event_messages.append(f"Error in event: {e}")
 
-                # Random event
-                if random.random() < 0.5:
-                    self.simulate_event()
-
-                self.refresh_dashboard()
-        if self.running:
-            self.root.after(500, self.update_loop)
+    # --- Render Loop (Tk thread) ---
+    def render_loop(self):
+        """Answer the worker's prompts and redraw when it has published a new snapshot."""
+        if not self.running:
+            return
+        self.worker.answer_prompts()
+        version, _ = self.worker.snapshots.latest()
+        if version != self.rendered_version:
+            self.refresh_dashboard()
+            if hasattr(self, 'investments_panel'):
+                self.investments_panel.refresh_data()
+        self.root.after(FRAME_MS, self.render_loop)
 
     def run(self):
         self.refresh_dashboard()
@@ -789,6 +847,7 @@ class EuropeMapApp:
         self.pause_menu.hide()
 
     def quit_game(self):
+        self.banking_gui.shutdown()
         self.root.destroy()
 
 
@@ -801,9 +860,12 @@ class InvestmentsPanel:
     def __init__(self, parent, banking_gui):
         self.parent = parent
         self.banking_gui = banking_gui
-        self.bank = banking_gui.bank
+        self.bank = banking_gui.bank  # changed through banking_gui.worker; rendered from its snapshots
         self.window = None
 
+    def snapshot(self):
+        return self.banking_gui.worker.snapshots.latest()[1]
+
 
 
     def show(self):
@@ -985,7 +1047,7 @@ class InvestmentsPanel:
             self.available_tree.delete(item)
 
         # Get available stocks
-        available_stocks = self.bank.get_available_stocks()
+        available_stocks = self.snapshot()["available_stocks"]
 
         # Add stocks to treeview
         for stock in available_stocks:
@@ -1017,11 +1079,10 @@ class InvestmentsPanel:
             self.owned_tree.delete(item)
 
         # Get owned stocks
-        owned_stocks = self.bank.get_owned_stocks()
+        owned_stocks = self.snapshot()["owned_stocks"]
 
         # Add stocks to treeview
-        for ticker, shares, avg_price in owned_stocks:
-            current_price = self.bank.stock_market.get_stock_value(ticker)
+        for ticker, shares, avg_price, current_price in owned_stocks:
             current_value = current_price * shares
             total_invested = avg_price * shares
             gain_loss = current_value - total_invested
@@ -1041,12 +1102,13 @@ class InvestmentsPanel:
         if not hasattr(self, 'portfolio_value_label'):
             return
 
-        portfolio_value = self.bank.get_portfolio_value()
-        total_return, percent_return = self.bank.get_portfolio_performance()
+        snap = self.snapshot()
+        portfolio_value = snap["portfolio_value"]
+        total_return, percent_return = snap["portfolio_performance"]
 
         # Calculate total invested
         total_invested = 0
-        for ticker, shares, avg_price in self.bank.get_owned_stocks():
+        for ticker, shares, avg_price, _ in snap["owned_stocks"]:
             total_invested += avg_price * shares
 
         self.portfolio_value_label.config(text=f"${portfolio_value:.2f}")
@@ -1074,11 +1136,11 @@ class InvestmentsPanel:
         item = tree.item(selection[0])
         ticker = item['values'][0]
 
-        success, message = self.bank.invest_in_stock(ticker, shares)
+        success, message = self.banking_gui.worker.call(self.bank.invest_in_stock, ticker, shares)
         if success:
             tk.messagebox.showinfo("Success", message)
             self.refresh_data()
-            self.banking_gui.update_balance_display()  # Update main GUI balance
+            self.banking_gui.refresh_dashboard()  # Update main GUI balance
         else:
             tk.messagebox.showerror("Error", message)
 
@@ -1099,11 +1161,11 @@ class InvestmentsPanel:
         item = tree.item(selection[0])
         ticker = item['values'][0]
 
-        success, message = self.bank.sell_stock(ticker, shares)
+        success, message = self.banking_gui.worker.call(self.bank.sell_stock, ticker, shares)
         if success:
             tk.messagebox.showinfo("Success", message)
             self.refresh_data()
-            self.banking_gui.update_balance_display()  # Update main GUI balance
+            self.banking_gui.refresh_dashboard()  # Update main GUI balance
         else:
             tk.messagebox.showerror("Error", message)
 
@@ -1123,8 +1185,10 @@ class CombinedGame:
         # Force fullscreen
         self.root.attributes('-fullscreen', True)
         
-        # Initialize the Bank
+        # Initialize the Bank (saves go to the append-only journal, written on a background thread)
+        enable_journal()
         self.bank = Bank()
+        self.bank.start_writer()
 
 
 
@@ -1138,43 +1202,15 @@ class CombinedGame:
 
 
 
-        # Add reference to map app in banking GUI for two-way communication
+        # Add references in banking GUI for two-way communication
         self.banking_gui.map_app_ref = self.map_app
-
-        # Start the banking update loop
-        self.root.after(100, self.banking_gui.update_loop)
-
-    def update_game(self):
-        """Update the game state"""
-        if not self.banking_gui.simulation_paused:
-            # Update bank
-            curr = time.time()
-            if curr - self.banking_gui.last_day_time >= self.banking_gui.day_duration:
-                self.bank.advance_day()
-                self.banking_gui.last_day_time = curr
-
-                # Update stock market
-                self.bank.update_stock_market()
-
-                # Random event
-                if random.random() < 0.5:
-                    self.banking_gui.simulate_event()
-
-                # Refresh GUI
-                self.banking_gui.refresh_dashboard()
-
-                # Refresh investments panel if open
-                if hasattr(self.banking_gui,
-                           'investments_panel') and self.banking_gui.investments_panel.window and self.banking_gui.investments_panel.window.winfo_exists():
-                    self.banking_gui.investments_panel.refresh_data()
-
-        # Schedule next update
-        if self.banking_gui.running:
-            self.root.after(500, self.update_game)
-
+        self.banking_gui.investments_panel = self.investments_panel
 
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.banking_gui.shutdown()
 
 # -------------------------------
 # Run the combined game
@@ -0,0 +1,141 @@
+# montecarlo.py
+import argparse
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bank import Bank
+from simulation import Simulation
+
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+# Starting bank state (pickled), set once per worker process
+_start_state = None
+
+
+def _init_worker(state):
+    global _start_state
+    _start_state = state
+
+
+def clone_bank(state):
+    """Unpickle a starting state into an in-memory bank that never touches the disk."""
+    bank = pickle.loads(state)
+    bank.autosave = False
+    for feed in (bank.history, bank.transaction_values, bank.event_messages):
+        feed.archive_file = None
+        feed.spilled = []
+    return bank
+
+
+def run_once(days, seed, event_chance):
+    """One independent run from the worker's starting state. Returns its outcome."""
+    bank = clone_bank(_start_state)
+    start_failures = bank.central_repayment_failures
+
+    low = {"balance": bank.balance, "negative_days": 0}
+
+    def on_day(b):
+        if b.balance < low["balance"]:
+            low["balance"] = b.balance
+        if b.balance < 0:
+            low["negative_days"] += 1
+
+    # The seed covers both random (events) and the stock market's generator,
+    # which every clone would otherwise share from the pickled state
+    Simulation(bank, event_chance=event_chance, checkpoint_interval=None, seed=seed).run(days, on_day=on_day)
+    return {
+        "balance": bank.balance,
+        "min_balance": low["balance"],
+        "negative_days": low["negative_days"],
+        "central_repayment_failures": bank.central_repayment_failures - start_failures,
+        "loans": len(bank.loans),
+        "customers": len(bank.customers),
+    }
+
+
+def _run_chunk(args):
+    days, seeds, event_chance = args
+    return [run_once(days, seed, event_chance) for seed in seeds]
+
+
+def run_monte_carlo(bank, runs=1000, days=5 * 365, workers=None, seed=None, event_chance=0.5, chunk_size=None):
+    """
+    Run `runs` independent simulations of `days` days from the current state
+    of `bank` on a process pool and aggregate the outcomes.
+
+    Every run gets its own seed spawned from `seed`, so results are
+    reproducible for a given seed regardless of the number of workers.
+    Runs never use the GUI or write to disk.
+    """
+    workers = workers or os.cpu_count() or 1
+    state = pickle.dumps(bank)
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(runs)]
+    chunk_size = chunk_size or max(1, runs // (workers * 4))
+    chunks = [(days, seeds[i:i + chunk_size], event_chance) for i in range(0, runs, chunk_size)]
+
+    start = time.perf_counter()
+    outcomes = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(state,)) as pool:
+        for chunk in pool.map(_run_chunk, chunks):
+            outcomes.extend(chunk)
+    seconds = time.perf_counter() - start
+
+    report = summarize(outcomes, bank.balance)
+    report.update({"runs": runs, "days": days, "workers": workers, "seed": seed, "seconds": seconds,
+                   "runs_per_sec": runs / seconds if seconds > 0 else float("inf")})
+    return report
+
+
+def summarize(outcomes, start_balance):
+    """Percentiles, VaR and expected shortfall of the final balance, plus failure rates."""
+    balances = np.array([o["balance"] for o in outcomes], dtype=np.float64)
+    min_balances = np.array([o["min_balance"] for o in outcomes], dtype=np.float64)
+    failures = np.array([o["central_repayment_failures"] for o in outcomes], dtype=np.float64)
+    losses = start_balance - balances
+
+    def tail_stats(level):
+        var = float(np.percentile(losses, level))
+        tail = losses[losses >= var]
+        return {"var": var, "expected_shortfall": float(tail.mean()) if len(tail) else var}
+
+    return {
+        "start_balance": start_balance,
+        "balance": {
+            "mean": float(balances.mean()),
+            "std": float(balances.std()),
+            "percentiles": {p: float(v) for p, v in zip(PERCENTILES, np.percentile(balances, PERCENTILES))},
+        },
+        "min_balance_percentiles": {p: float(v) for p, v in zip(PERCENTILES, np.percentile(min_balances, PERCENTILES))},
+        "risk": {95: tail_stats(95), 99: tail_stats(99)},
+        # The bank "defaults" when its balance goes negative at any point
+        "default_probability": float((min_balances < 0).mean()),
+        "central_repayment_failure_probability": float((failures > 0).mean()),
+        "central_repayment_failures_mean": float(failures.mean()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo risk runs of the bank.")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=5 * 365)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--event-chance", type=float, default=0.5)
+    parser.add_argument("--fresh", action="store_true", help="start from a new bank instead of the saved one")
+    args = parser.parse_args()
+
+    report = run_monte_carlo(Bank(load=not args.fresh), runs=args.runs, days=args.days,
+                             workers=args.workers, seed=args.seed, event_chance=args.event_chance)
+    print(f"{report['runs']} runs x {report['days']} days on {report['workers']} workers "
+          f"in {report['seconds']:.1f}s ({report['runs_per_sec']:.1f} runs/sec)")
+    print(f"Start balance: ${report['start_balance']:,.2f}")
+    for p, value in report["balance"]["percentiles"].items():
+        print(f"  P{p:<2} final balance: ${value:,.2f}")
+    for level, values in report["risk"].items():
+        print(f"  VaR {level}%: ${values['var']:,.2f}  ES: ${values['expected_shortfall']:,.2f}")
+    print(f"  Default (negative balance) probability: {report['default_probability']:.1%}")
+    print(f"  Central bank repayment failure probability: {report['central_repayment_failure_probability']:.1%}")
@@ -0,0 +1,120 @@
+# panels.py
+import tkinter as tk
+import tkinter.font as tkfont
+
+
+class VirtualList:
+    """
+    Scrollable read-only list that only draws the rows in view.
+
+    `source` is any sequence supporting len() and slicing (the sorted rows of
+    a snapshot, an ordered index, ...) and `format_row(row)` turns one row
+    into a list of (text, tag) segments. set_source() swaps in new data and
+    rewrites only the visible lines whose text changed, so a redraw costs
+    the same with ten rows or a million. Rows that are None (not loaded
+    yet, see ranking.Window) show as a placeholder, and `on_view(top,
+    visible)` is called whenever the rows in view change position.
+
+    Scroll with the scrollbar, the mouse wheel or Up/Down, PageUp/PageDown,
+    Home/End (click the list first to give it the keyboard focus).
+    """
+
+    PLACEHOLDER = [("…", None)]
+
+    def __init__(self, parent, format_row, on_view=None, **text_options):
+        self.format_row = format_row
+        self.on_view = on_view
+        self.source = ()
+        self.top = 0       # source index of the first visible row
+        self.visible = 1   # rows that fit in the widget (updated on resize)
+        self.lines = []    # segments currently drawn, one entry per line
+
+        self.frame = tk.Frame(parent, bg=text_options.get("bg"))
+        self.scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text = tk.Text(self.frame, wrap="none", state="disabled", cursor="arrow", **text_options)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.line_height = tkfont.Font(font=self.text.cget("font")).metrics("linespace")
+
+        self.text.bind("<Configure>", self.on_resize)
+        self.text.bind("<Button-1>", lambda event: self.text.focus_set())
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.text.bind(sequence, self.on_wheel)
+        for key, units, pages in (("<Up>", -1, 0), ("<Down>", 1, 0), ("<Prior>", 0, -1), ("<Next>", 0, 1)):
+            self.text.bind(key, lambda event, u=units, p=pages: self.scroll(u + p * self.visible))
+        self.text.bind("<Home>", lambda event: self.scroll_to(0))
+        self.text.bind("<End>", lambda event: self.scroll_to(len(self.source)))
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    def tag_configure(self, tag, **options):
+        self.text.tag_configure(tag, **options)
+
+    # ---------- Data ----------
+    def set_source(self, source):
+        self.source = source
+        self.render()
+
+    def render(self):
+        """Draw the rows from self.top down, rewriting only the lines that changed."""
+        total = len(self.source)
+        self.top = max(0, min(self.top, total - self.visible))
+        lines = [self.PLACEHOLDER if row is None else self.format_row(row)
+                 for row in self.source[self.top:self.top + self.visible]]
+        text = self.text
+        text.config(state="normal")
+        for i, segments in enumerate(lines):
+            if i < len(self.lines):
+                if self.lines[i] == segments:
+                    continue
+                text.delete(f"{i + 1}.0", f"{i + 1}.end")
+            elif i:
+                text.insert("end-1c", "\n")
+            for chunk, tag in segments:
+                text.insert(f"{i + 1}.end", chunk, tag or ())
+        if len(lines) < len(self.lines):
+            text.delete(f"{len(lines)}.end" if lines else "1.0", "end-1c")
+        text.config(state="disabled")
+        self.lines = lines
+        if total:
+            self.scrollbar.set(self.top / total, min(self.top + self.visible, total) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    # ---------- Scrolling ----------
+    def scroll(self, rows):
+        self.scroll_to(self.top + rows)
+        return "break"
+
+    def scroll_to(self, top):
+        top = max(0, min(int(top), len(self.source) - self.visible))
+        if top != self.top:
+            self.top = top
+            self.render()
+            self.view_changed()
+        return "break"
+
+    def view_changed(self):
+        if self.on_view is not None:
+            self.on_view(self.top, self.visible)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * len(self.source))
+        elif unit == "pages":
+            self.scroll(int(amount) * self.visible)
+        else:
+            self.scroll(int(amount))
+
+    def on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            return self.scroll(-3)
+        return self.scroll(3)
+
+    def on_resize(self, event):
+        visible = max(1, event.height // self.line_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+            self.view_changed()
@@ -0,0 +1,82 @@
+# profiler.py
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+
+
+class PhaseTimer:
+    """
+    Wall time and call counts per named phase of a hot path (advance_day).
+
+        with bank.timings.phase("loans"):
+            ...
+
+    Keeps the last `window` samples of each phase for rolling percentiles.
+    With enabled=False phase() does no timing at all.
+    """
+
+    def __init__(self, window=1000, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self.counts = {}
+        self.totals = {}
+        self.samples = {}  # phase -> deque of recent durations (seconds)
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+            self.counts[name] = 0
+            self.totals[name] = 0.0
+        samples.append(seconds)
+        self.counts[name] += 1
+        self.totals[name] += seconds
+
+    def reset(self):
+        self.counts.clear()
+        self.totals.clear()
+        self.samples.clear()
+
+    # ---------- Stats API ----------
+    def stats(self):
+        """
+        Per phase: call count, total and mean ms over all calls, and the
+        last sample and rolling p50/p90/p99 ms over the recent window.
+        """
+        out = {}
+        for name, samples in self.samples.items():
+            recent = np.fromiter(samples, dtype=np.float64, count=len(samples)) * 1000
+            entry = {
+                "count": self.counts[name],
+                "total_ms": self.totals[name] * 1000,
+                "mean_ms": self.totals[name] * 1000 / self.counts[name],
+                "last_ms": float(recent[-1]),
+            }
+            for p, value in zip(PERCENTILES, np.percentile(recent, PERCENTILES)):
+                entry[f"p{p}_ms"] = float(value)
+            out[name] = entry
+        return out
+
+    def report(self):
+        """The stats as a small text table, slowest phase (by p50) first."""
+        stats = self.stats()
+        lines = [f"{'phase':<20}{'calls':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'mean':>9}"]
+        for name, s in sorted(stats.items(), key=lambda kv: -kv[1]["p50_ms"]):
+            lines.append(f"{name:<20}{s['count']:>8}{s['p50_ms']:>9.3f}{s['p90_ms']:>9.3f}"
+                         f"{s['p99_ms']:>9.3f}{s['mean_ms']:>9.3f}")
+        return "\n".join(lines)
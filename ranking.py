@@ -0,0 +1,185 @@
+# ranking.py
+from bisect import bisect_left
+
+import numpy as np
+
+BLOCK_SIZE = 512
+
+
+class RankIndex:
+    """
+    Ids ordered by a value, largest first, kept sorted as values change.
+
+    Keys (-value, id) live in sorted blocks of about BLOCK_SIZE, each a pair
+    of NumPy arrays with some room to spare, so update() and discard() shift
+    part of one block in place: O(log n + BLOCK_SIZE). index[a:b] (the ids
+    ranked a..b-1) walks the blocks only up to `a`. Ties go to the lower id.
+    Each id's current -value is kept in an array indexed by id (NaN = not
+    ranked), so ids must be non-negative ints.
+
+        ranking.update(customer_id, 1250.0)
+        ranking[:10]  # the ten largest
+    """
+
+    def __init__(self):
+        self.blocks = []  # (sorted -values, ids) array pairs, filled up to sizes[i]
+        self.sizes = []
+        self.maxes = []   # last key (-value, id) of each block
+        self.keys = np.full(64, np.nan)  # id: -value
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, item_id):
+        return 0 <= item_id < len(self.keys) and not np.isnan(self.keys[item_id])
+
+    def __iter__(self):
+        for (_, ids), n in zip(self.blocks, self.sizes):
+            yield from ids[:n].tolist()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("RankIndex only supports slices")
+        start, stop, _ = index.indices(self.count)
+        ids = []
+        offset = 0
+        for (_, block_ids), n in zip(self.blocks, self.sizes):
+            if offset + n > start:
+                ids.extend(block_ids[max(start - offset, 0):min(max(stop - offset, 0), n)].tolist())
+            offset += n
+            if offset >= stop:
+                break
+        return ids
+
+    def value(self, item_id):
+        if item_id not in self:
+            raise KeyError(item_id)
+        return -float(self.keys[item_id])
+
+    # ---------- Mutations ----------
+    def update(self, item_id, value):
+        key = (-value, item_id)
+        if item_id < len(self.keys):
+            old = float(self.keys[item_id])
+            if old == key[0]:
+                return
+            if old == old:  # not NaN: ranked
+                self._remove((old, item_id))
+            else:
+                self.count += 1
+        else:
+            self._grow(item_id + 1)
+            self.count += 1
+        self.keys[item_id] = key[0]
+        if not self.blocks:
+            self.blocks.append(self._resized(self.keys[:0], np.zeros(0, dtype=np.int64), 0, BLOCK_SIZE))
+            self.sizes.append(0)
+            self.maxes.append(key)
+        self._insert(min(bisect_left(self.maxes, key), len(self.blocks) - 1), key)
+
+    def discard(self, item_id):
+        if item_id in self:
+            self._remove((float(self.keys[item_id]), item_id))
+            self.keys[item_id] = np.nan
+            self.count -= 1
+
+    def _insert(self, i, key):
+        values, ids = self.blocks[i]
+        n = self.sizes[i]
+        pos = self._position(values, ids, n, key)
+        if n == len(values):
+            values, ids = self.blocks[i] = self._resized(values, ids, n, n + n // 4 + 1)
+        values[pos + 1:n + 1] = values[pos:n]
+        ids[pos + 1:n + 1] = ids[pos:n]
+        values[pos], ids[pos] = key
+        n += 1
+        if n < 2 * BLOCK_SIZE:
+            self.sizes[i] = n
+            self.maxes[i] = (float(values[n - 1]), int(ids[n - 1]))
+            return
+        half = n // 2
+        capacity = half + half // 4
+        self.blocks[i:i + 1] = [self._resized(values, ids, half, capacity),
+                                self._resized(values[half:], ids[half:], n - half, capacity)]
+        self.sizes[i:i + 1] = [half, n - half]
+        self.maxes[i:i + 1] = [(float(values[half - 1]), int(ids[half - 1])), (float(values[n - 1]), int(ids[n - 1]))]
+
+    def _remove(self, key):
+        i = bisect_left(self.maxes, key)
+        values, ids = self.blocks[i]
+        n = self.sizes[i]
+        pos = self._position(values, ids, n, key)
+        values[pos:n - 1] = values[pos + 1:n]
+        ids[pos:n - 1] = ids[pos + 1:n]
+        n -= 1
+        if n:
+            self.sizes[i] = n
+            self.maxes[i] = (float(values[n - 1]), int(ids[n - 1]))
+        else:
+            del self.blocks[i]
+            del self.sizes[i]
+            del self.maxes[i]
+
+    @staticmethod
+    def _position(values, ids, n, key):
+        """Where key goes among a block's first n keys (ties on the value are ordered by id)."""
+        values = values[:n]
+        lo = int(values.searchsorted(key[0], "left"))
+        if lo < n and values[lo] == key[0]:
+            hi = int(values.searchsorted(key[0], "right"))
+            lo += int(ids[lo:hi].searchsorted(key[1]))
+        return lo
+
+    @staticmethod
+    def _resized(values, ids, n, capacity):
+        """New arrays of `capacity` holding the first n keys."""
+        new_values = np.empty(capacity, dtype=np.float64)
+        new_ids = np.empty(capacity, dtype=np.int64)
+        new_values[:n] = values[:n]
+        new_ids[:n] = ids[:n]
+        return new_values, new_ids
+
+    def _grow(self, needed):
+        capacity = len(self.keys)
+        if needed > capacity:
+            keys = np.full(max(needed, capacity * 2), np.nan)
+            keys[:capacity] = self.keys
+            self.keys = keys
+
+    def rebuild(self, ids, values):
+        """Replace the contents with `ids` ranked by `values` (array-likes), in one sort."""
+        ids = np.asarray(ids, dtype=np.int64)
+        values = -np.asarray(values, dtype=np.float64)
+        order = np.lexsort((ids, values))
+        ids, values = ids[order], values[order]
+        starts = range(0, len(ids), BLOCK_SIZE)
+        self.blocks = [self._resized(values[i:], ids[i:], min(BLOCK_SIZE, len(ids) - i), BLOCK_SIZE + BLOCK_SIZE // 4)
+                       for i in starts]
+        self.sizes = [min(BLOCK_SIZE, len(ids) - i) for i in starts]
+        self.maxes = [(float(values[i + n - 1]), int(ids[i + n - 1])) for i, n in zip(starts, self.sizes)]
+        self.keys = np.full(max(64, int(ids.max()) + 1 if len(ids) else 0), np.nan)
+        self.keys[ids] = values
+        self.count = len(ids)
+
+
+class Window:
+    """
+    A page of a ranked list for the GUI: rows start..start+len(rows)-1 of
+    `total`. Behaves like the whole list for len() and slicing; rows
+    outside the page come back as None until a snapshot covering them
+    arrives.
+    """
+
+    def __init__(self, start, rows, total):
+        self.start = start
+        self.rows = rows
+        self.total = total
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        start, stop, _ = index.indices(self.total)
+        first = self.start
+        return [self.rows[i - first] if first <= i < first + len(self.rows) else None for i in range(start, stop)]
@@ -0,0 +1,116 @@
+# ringbuffer.py
+import json
+from collections import deque
+from itertools import islice
+
+from saveload import append_text
+
+
+class RingBuffer:
+    """
+    Fixed-capacity FIFO feed (history, transactions, event messages).
+
+    Behaves like a list for the things the game does with these feeds
+    (append, extend, len, iteration, feed[-8:]). Entries pushed out of the
+    buffer are appended to `archive_file` as JSON lines, a batch at a time;
+    with archive_file=None they are simply dropped. With an `archive_writer`
+    (SaveWriter) the lines are written from its thread.
+    """
+
+    def __init__(self, capacity, archive_file=None, items=(), archive_batch=256):
+        self.capacity = capacity
+        self.archive_file = archive_file
+        self.archive_batch = archive_batch
+        self.items = deque()
+        self.total = 0     # entries ever appended (saves use it to tell which ones are new)
+        self.spilled = []  # pushed out, not yet written to the archive
+        self.archive_writer = None
+        self.extend(items)
+
+    # ---------- List-like helpers ----------
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __reversed__(self):
+        return reversed(self.items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self.items))
+            if step == 1 and stop == len(self.items):
+                # Tail slices (feed[-8:]) walk from the right end only
+                tail = list(islice(reversed(self.items), max(stop - start, 0)))
+                tail.reverse()
+                return tail
+            return list(islice(self.items, start, stop, step))
+        return self.items[index]
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self.items)!r})"
+
+    def to_list(self):
+        return list(self.items)
+
+    def __getstate__(self):
+        """Pickle support: a copy archives without the SaveWriter thread."""
+        state = self.__dict__.copy()
+        state["archive_writer"] = None
+        return state
+
+    # ---------- Mutations ----------
+    def append(self, item):
+        if len(self.items) >= self.capacity:
+            self.spill(self.items.popleft())
+        self.items.append(item)
+        self.total += 1
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def clear(self):
+        self.items.clear()
+
+    def load(self, items, total=None):
+        """Replace the contents (used when loading a save); nothing is archived."""
+        self.items = deque(islice(items, max(len(items) - self.capacity, 0), None))
+        self.total = len(self.items) if total is None else total
+
+    # ---------- Archive ----------
+    def spill(self, item):
+        if self.archive_file is None:
+            return
+        self.spilled.append(item)
+        if len(self.spilled) >= self.archive_batch:
+            self.flush_archive()
+
+    def flush_archive(self):
+        """Append spilled entries to the archive file."""
+        if not self.spilled or self.archive_file is None:
+            return
+        text = "".join(json.dumps(item, separators=(",", ":")) + "\n" for item in self.spilled)
+        self.spilled = []
+        if self.archive_writer is not None:
+            self.archive_writer.append_archive(self.archive_file, text)
+        else:
+            append_text(self.archive_file, text)
+
+
+class DayRingBuffer(RingBuffer):
+    """
+    Ring buffer of (day, ...) entries that also drops entries `max_age` days
+    or older. Entries arrive in day order, so expiry only ever looks at the
+    oldest end: amortized O(1) per append.
+    """
+
+    def __init__(self, capacity, max_age, archive_file=None, items=(), archive_batch=256):
+        self.max_age = max_age
+        super().__init__(capacity, archive_file, items, archive_batch)
+
+    def expire(self, today):
+        items = self.items
+        while items and today - items[0][0] >= self.max_age:
+            self.spill(items.popleft())
@@ -1,21 +1,57 @@
 import json
 import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+import numpy as np
+
+from customers import Customer, CustomerTable
+from ledger import RowChanges
 
 # File paths
 CUSTOMER_FILE = "data/customers.json"
 BANK_FILE = "data/bank_data.json"
+JOURNAL_FILE = "data/journal.jsonl"
+DATABASE_FILE = "data/bank.db"
+SNAPSHOT_CUSTOMER_FILE = "data/customers.npz"
+SNAPSHOT_BANK_FILE = "data/bank_data.npz"
 
-# Ensure files exist
-for filepath in [CUSTOMER_FILE, BANK_FILE]:
-    if not os.path.exists(filepath):
-        with open(filepath, "w") as f:
-            json.dump({}, f, indent=2)
+# Journal is compacted into fresh snapshots once it is at least this big
+# (or as big as the snapshots themselves, whichever is larger)
+JOURNAL_MIN_COMPACT_BYTES = 1024 * 1024
+
+# Bank data lists the journal records row by row: key -> (record op, id column)
+JOURNAL_ROWS = {"loans": ("loan", 5), "deposits": ("deposit", 2)}
+# ... and id lists it records slot by slot ([position, id]): key -> record op
+JOURNAL_SETS = {"funded_customers": "funded"}
 
 # ---------- Generic JSON save/load ----------
+@contextmanager
+def atomic_write(filepath, mode="w", **kwargs):
+    """
+    Open a temp file next to `filepath`; it replaces `filepath` (atomic
+    rename) only when the block completes, so a crash never leaves half a file.
+    """
+    tmp_path = filepath + ".tmp"
+    with open(tmp_path, mode, **kwargs) as f:
+        yield f
+    os.replace(tmp_path, filepath)
+
+def append_text(filepath, text):
+    """Append text to a file (archives), creating its folder."""
+    try:
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        with open(filepath, "a") as f:
+            f.write(text)
+    except Exception as e:
+        print(f"Error writing {filepath}: {e}")
+
 def save_json(filepath, data):
     """Save data as JSON with indentation."""
     try:
-        with open(filepath, "w") as f:
+        with atomic_write(filepath) as f:
             json.dump(data, f, indent=2)
     except Exception as e:
         print(f"Error saving {filepath}: {e}")
@@ -31,34 +67,830 @@ def load_json(filepath):
         print(f"Error loading {filepath}: {e}")
         return {}
 
+def compact_dumps(data):
+    return json.dumps(data, separators=(",", ":"))
+
+def customer_record(cid, info):
+    """
+    Normalize a stored customer. Loans and deposits are saved by the bank's
+    books; deposit entries of old saves are passed on for Bank.load_data.
+    """
+    return {
+        "id": cid,
+        "credit_score": info.get("credit_score", 300),
+        "deposits": info.get("deposits", []),
+        "deposit_balance": info.get("deposit_balance", 0.0)
+    }
+
+def plain_customer(customer):
+    """A customer as a JSON-ready dict (CustomerTable rows are views)."""
+    return customer.to_dict() if isinstance(customer, Customer) else customer
+
+def copy_customer(customer):
+    """A plain dict copy of a customer's saved fields."""
+    return dict(plain_customer(customer))
+
+def snapshot_customers(customers, customer_ids=None):
+    """
+    Copy of the customers to save, detached from the live ones (for the
+    background writer): `customer_ids`, or every loaded customer.
+    """
+    if customer_ids is None:
+        if isinstance(customers, LazyCustomers):
+            customers = customers.loaded()
+        if isinstance(customers, CustomerTable):
+            return customers.copy()
+        customer_ids = customers.keys()
+    return {cid: copy_customer(customers[cid]) for cid in customer_ids if cid in customers}
+
+def keyed_rows(rows, column):
+    """{row[column]: row tuple} for a list of rows (rows of old saves without that column keep their position)."""
+    return {row[column] if len(row) > column else -1 - i: tuple(row) for i, row in enumerate(rows)}
+
+def plain_customers(customers):
+    if isinstance(customers, CustomerTable):
+        return customers.to_dict()
+    return {cid: plain_customer(customer) for cid, customer in customers.items()}
+
+def plain_data(data):
+    """Bank data with full RowChanges replaced by the lists they hold, for backends that save whole values."""
+    plain = {}
+    for key, value in data.items():
+        if isinstance(value, RowChanges):
+            if not value.full:
+                raise ValueError(f"{key}: this backend saves whole values, not changed rows")
+            value = value.plain()
+        plain[key] = value
+    return plain
+
+def merge_bank_data(older, newer):
+    """Two bank data saves as one: newer values win, RowChanges are merged."""
+    merged = dict(newer)
+    for key, value in newer.items():
+        if isinstance(value, RowChanges) and isinstance(older.get(key), RowChanges):
+            merged[key] = older[key].merge(value)
+    return merged
+
+
+# ---------- JSON backend ----------
+class JsonBackend:
+    """
+    Whole-document JSON files (the original save format).
+
+    In journaled mode saves append small records to the journal instead of
+    rewriting the JSON files:
+        {"op": "bank", "data": {key: value}}       changed bank data keys
+        {"op": "loan", "id": loan_id, "row": []}   one loan row (row null = repaid)
+        {"op": "deposit", "id": cid, "row": []}    one deposit row (row null = withdrawn)
+        {"op": "history", "entries": [], "keep": n}  entries appended since the last save; the
+                                                      saved history is the last n entries
+        {"op": "funded", "rows": [], "removed": []}  funded customer id slots written ([position, id])
+                                                      and positions dropped off the end
+        {"op": "customer", "id": cid, "data": {}}  one customer record
+    so a save costs the rows that changed, not the size of the bank: the
+    bank hands over RowChanges (see take_changes) for the loans, deposits
+    and funded ids, and new history entries are told by its "history_total"
+    count. The journal is replayed on load and folded into the snapshots by
+    compact_journal().
+    """
+
+    def __init__(self, customer_file=CUSTOMER_FILE, bank_file=BANK_FILE, journal_file=JOURNAL_FILE):
+        self.customer_file = customer_file
+        self.bank_file = bank_file
+        self.journal_file = journal_file
+        self.journal = {
+            "enabled": False,
+            "bytes": 0,            # current size of the journal file
+            "snapshot_bytes": 0,   # size of the last snapshots
+            "bank": {},            # key: compact JSON of the last saved bank value
+            "history": None,       # history list as last saved
+            "history_total": None,  # its history_total
+        }
+
+        # Ensure files exist
+        os.makedirs(os.path.dirname(bank_file) or ".", exist_ok=True)
+        for filepath in [customer_file, bank_file]:
+            if not os.path.exists(filepath):
+                with open(filepath, "w") as f:
+                    json.dump({}, f, indent=2)
+
+    # ---------- Journal ----------
+    def enable_journal(self, enabled=True):
+        self.journal["enabled"] = enabled
+        self.journal["bytes"] = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+        self.journal["snapshot_bytes"] = sum(os.path.getsize(p) for p in (self.bank_file, self.customer_file)
+                                             if os.path.exists(p))
+
+    def journal_enabled(self):
+        return self.journal["enabled"]
+
+    def append_journal(self, records):
+        """Append records to the journal, one compact JSON object per line."""
+        if not records:
+            return
+        text = "".join(compact_dumps(r) + "\n" for r in records)
+        try:
+            with open(self.journal_file, "a") as f:
+                f.write(text)
+            self.journal["bytes"] += len(text)
+        except Exception as e:
+            print(f"Error writing {self.journal_file}: {e}")
+
+    def read_journal(self):
+        """Return all journal records. A torn last line (crash mid-write) is skipped."""
+        if not os.path.exists(self.journal_file):
+            return []
+        records = []
+        try:
+            with open(self.journal_file, "r") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except Exception as e:
+            print(f"Error loading {self.journal_file}: {e}")
+        return records
+
+    def journal_due(self):
+        """True when the journal has grown large enough to be compacted."""
+        return self.journal["bytes"] >= max(JOURNAL_MIN_COMPACT_BYTES, self.journal["snapshot_bytes"])
+
+    def full_save_due(self):
+        """True when the next customer save has to include every customer."""
+        return not self.journal["enabled"] or self.journal_due()
+
+    def saves_changes(self):
+        return self.journal["enabled"]
+
+    def compact_journal(self, customers):
+        """Write fresh snapshots of the bank data (replayed from the files) and customers, then empty the journal."""
+        bank_text = compact_dumps(self.load_bank_data())
+        customers_text = compact_dumps(plain_customers(customers))
+        try:
+            with atomic_write(self.bank_file) as f:
+                f.write(bank_text)
+            with atomic_write(self.customer_file) as f:
+                f.write(customers_text)
+            # Replaying old records over the new snapshots is harmless, so truncating last is safe
+            open(self.journal_file, "w").close()
+        except Exception as e:
+            print(f"Error compacting journal: {e}")
+            return
+        self.journal["bytes"] = 0
+        self.journal["snapshot_bytes"] = len(bank_text) + len(customers_text)
+
+    # ---------- Customers ----------
+    def load_customers(self):
+        raw_data = load_json(self.customer_file)
+        for record in self.read_journal():
+            if record.get("op") == "customer":
+                raw_data[str(record["id"])] = record["data"]
+        customers = CustomerTable(capacity=max(64, len(raw_data)))
+        for cid_str, info in raw_data.items():
+            try:
+                cid = int(cid_str)
+            except ValueError:
+                continue
+            customers[cid] = customer_record(cid, info)
+        return customers
+
+    def save_customers(self, customers, customer_ids=None):
+        if not self.journal["enabled"]:
+            save_json(self.customer_file, plain_customers(customers))
+            return
+        if customer_ids is None:
+            self.compact_journal(customers)
+            return
+        self.append_journal([{"op": "customer", "id": cid, "data": plain_customer(customers[cid])}
+                             for cid in customer_ids if cid in customers])
+
+    # ---------- Bank ----------
+    def load_bank_data(self):
+        data = load_json(self.bank_file)
+        rows = {key: keyed_rows(data.pop(key, []), column) for key, (_, column) in JOURNAL_ROWS.items()}
+        ops = {op: key for key, (op, _) in JOURNAL_ROWS.items()}
+        slots = {key: dict(enumerate(data.pop(key, []))) for key in JOURNAL_SETS}
+        set_ops = {op: key for key, op in JOURNAL_SETS.items()}
+        history = data.pop("history", [])
+        for record in self.read_journal():
+            op = record.get("op")
+            if op == "bank":
+                for key, value in record["data"].items():
+                    if key in JOURNAL_ROWS:
+                        rows[key] = keyed_rows(value, JOURNAL_ROWS[key][1])
+                    elif key in JOURNAL_SETS:
+                        slots[key] = dict(enumerate(value))
+                    elif key == "history":
+                        history = value
+                    else:
+                        data[key] = value
+            elif op in ops:
+                table = rows[ops[op]]
+                if record["row"] is None:
+                    table.pop(record["id"], None)
+                else:
+                    table[record["id"]] = tuple(record["row"])
+            elif op in set_ops:
+                ids = slots[set_ops[op]]
+                if "rows" in record:
+                    for position in record["removed"]:
+                        ids.pop(position, None)
+                    ids.update((position, item) for position, item in record["rows"])
+                else:
+                    # Journals from before slots recorded the ids added and removed
+                    removed = set(record["remove"])
+                    kept = [ids[p] for p in sorted(ids) if ids[p] not in removed]
+                    kept += [item for item in record["add"] if item not in kept]
+                    slots[set_ops[op]] = dict(enumerate(kept))
+            elif op == "history":
+                history.extend(record["entries"])
+                del history[:len(history) - record["keep"]]
+        self.journal["bank"] = {k: compact_dumps(v) for k, v in data.items()}
+        self.journal["history"] = history
+        self.journal["history_total"] = data.get("history_total")
+        for key, table in rows.items():
+            data[key] = [list(row) for row in table.values()]
+        for key, ids in slots.items():
+            data[key] = [ids[p] for p in sorted(ids)]
+        data["history"] = history
+        return data
+
+    def save_bank_data(self, data):
+        if not self.journal["enabled"]:
+            save_json(self.bank_file, plain_data(data))
+            return
+        changed = {}
+        records = []
+        for key, value in data.items():
+            if isinstance(value, RowChanges):
+                if value.full:
+                    changed[key] = value.plain()
+                else:
+                    records += self.row_records(key, value)
+                continue
+            if key == "history":
+                records += self.history_records(value, data.get("history_total"), changed)
+                continue
+            encoded = compact_dumps(value)
+            if self.journal["bank"].get(key) != encoded:
+                self.journal["bank"][key] = encoded
+                changed[key] = value
+        if changed:
+            records.insert(0, {"op": "bank", "data": changed})
+        self.append_journal(records)
+
+    def row_records(self, key, changes):
+        """Records for the changed rows (or slots) of `key`."""
+        if key in JOURNAL_SETS:
+            if not (changes.rows or changes.removed):
+                return []
+            return [{"op": JOURNAL_SETS[key], "rows": changes.rows, "removed": changes.removed}]
+        op = JOURNAL_ROWS[key][0]
+        records = [{"op": op, "id": row[changes.column], "row": row} for row in changes.rows]
+        records += [{"op": op, "id": row_id, "row": None} for row_id in changes.removed]
+        return records
+
+    def history_records(self, history, total, changed):
+        """A record of the entries appended since the last save (the whole list when that is unknown)."""
+        saved, saved_total = self.journal["history"], self.journal["history_total"]
+        self.journal["history"] = history
+        self.journal["history_total"] = total
+        if saved is None or saved_total is None or total is None or total < saved_total:
+            changed["history"] = history
+            return []
+        new = history[len(history) - min(total - saved_total, len(history)):]
+        if not new and len(history) == len(saved):
+            return []
+        return [{"op": "history", "entries": new, "keep": len(history)}]
+
+
+# ---------- SQLite backend ----------
+def table_columns(rows, names, dtypes):
+    """Query result rows as a dict of NumPy columns (what LoanBook/DepositBook.from_columns load)."""
+    columns = list(zip(*rows)) if rows else [()] * len(names)
+    return {name: np.array(column, dtype=dtype) for name, dtype, column in zip(names, dtypes, columns)}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bank_state (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS customers (
+    id INTEGER PRIMARY KEY,
+    credit_score INTEGER NOT NULL,
+    deposit_balance REAL NOT NULL,
+    deposits TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS loans (
+    loan_id INTEGER PRIMARY KEY,
+    customer_id INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    days_left INTEGER NOT NULL,
+    accrued REAL NOT NULL,
+    rate REAL NOT NULL,
+    maturity_day INTEGER NOT NULL,
+    settled_day INTEGER
+);
+CREATE INDEX IF NOT EXISTS loans_customer ON loans (customer_id);
+CREATE INDEX IF NOT EXISTS loans_maturity ON loans (maturity_day);
+CREATE TABLE IF NOT EXISTS deposits (
+    customer_id INTEGER PRIMARY KEY,
+    amount REAL NOT NULL,
+    accrued REAL NOT NULL,
+    settled_day INTEGER
+);
+CREATE TABLE IF NOT EXISTS central_loans (
+    position INTEGER PRIMARY KEY,
+    amount REAL NOT NULL,
+    days_left INTEGER NOT NULL,
+    accrued REAL NOT NULL,
+    rate REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS funded_customers (
+    position INTEGER PRIMARY KEY,
+    customer_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    day INTEGER NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_day ON history (day);
+"""
+
+# How many days of history load_bank_data returns from databases saved before
+# history_total (those kept every row; saves now trim the table to the bank's window)
+HISTORY_WINDOW = 30
+
+
+class LazyCustomers(MutableMapping):
+    """
+    Customer mapping backed by the SQLite customers table.
+
+    Only the ids are read up front; a row is loaded (into a CustomerTable)
+    the first time it is accessed. Iterating values()/items() loads the
+    remaining rows in one query.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.ids = set(row[0] for row in backend.conn.execute("SELECT id FROM customers"))
+        self.cache = CustomerTable()
+
+    def __getitem__(self, cid):
+        if cid in self.cache:
+            return self.cache[cid]
+        if cid not in self.ids:
+            raise KeyError(cid)
+        with self.backend.lock:
+            row = self.backend.conn.execute(
+                "SELECT id, credit_score, deposit_balance, deposits FROM customers WHERE id = ?", (cid,)
+            ).fetchone()
+        self.cache[cid] = self.backend.row_to_customer(row)
+        return self.cache[cid]
+
+    def __setitem__(self, cid, customer):
+        self.ids.add(cid)
+        self.cache[cid] = customer
+
+    def __delitem__(self, cid):
+        self.ids.remove(cid)
+        self.cache.pop(cid, None)
+
+    def __contains__(self, cid):
+        return cid in self.ids
+
+    def __iter__(self):
+        return iter(sorted(self.ids))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def load_all(self):
+        """Load every row not read yet."""
+        if len(self.cache) == len(self.ids):
+            return
+        with self.backend.lock:
+            rows = self.backend.conn.execute("SELECT id, credit_score, deposit_balance, deposits FROM customers").fetchall()
+        for row in rows:
+            if row[0] not in self.cache:
+                self.cache[row[0]] = self.backend.row_to_customer(row)
+
+    def values(self):
+        self.load_all()
+        return self.cache.values()
+
+    def items(self):
+        self.load_all()
+        return self.cache.items()
+
+    def loaded(self):
+        """Rows that are in memory (the only ones that can have changed)."""
+        return self.cache
+
+    def balances_of(self, ids):
+        """See CustomerTable.balances_of (loads the customers)."""
+        for cid in ids.tolist():
+            self[cid]
+        return self.cache.balances_of(ids)
+
+    def add_to_balances(self, ids, amounts):
+        """See CustomerTable.add_to_balances (loads the customers)."""
+        for cid in ids.tolist():
+            self[cid]
+        return self.cache.add_to_balances(ids, amounts)
+
+    def attach(self, loan_book, deposit_book):
+        self.cache.attach(loan_book, deposit_book)
+
+    def legacy_deposits(self, cid):
+        """See CustomerTable.legacy_deposits (loads the customer)."""
+        self[cid]
+        return self.cache.legacy_deposits(cid)
+
+    def drop_legacy(self):
+        self.cache.drop_legacy()
+
+
+class SqliteBackend:
+    """
+    SQLite storage: customers, loans, deposits, funded customer ids, central
+    loans and history live in their own tables. Customers are upserted by
+    id; of the loans, deposits and funded ids only the rows the bank marked
+    as changed (RowChanges) are written. History rows are appended and
+    trimmed to the bank's window.
+
+    Bank scalars and small lists are kept as JSON in bank_state. Loans and
+    deposits load as columns, straight into the books.
+    """
+
+    TABLE_KEYS = ("loans", "deposits", "central_loans", "history")
+
+    def __init__(self, path=DATABASE_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()  # the connection is shared with a background SaveWriter
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # Databases from before lazy deposit interest lack settled_day
+        if "settled_day" not in [row[1] for row in self.conn.execute("PRAGMA table_info(deposits)")]:
+            self.conn.execute("ALTER TABLE deposits ADD COLUMN settled_day INTEGER")
+        # ... and loans their settled_day (those rows were settled on maturity_day - days_left)
+        if "settled_day" not in [row[1] for row in self.conn.execute("PRAGMA table_info(loans)")]:
+            self.conn.execute("ALTER TABLE loans ADD COLUMN settled_day INTEGER")
+        # ... and their deposits table was keyed by list position instead of customer
+        if "position" in [row[1] for row in self.conn.execute("PRAGMA table_info(deposits)")]:
+            self.conn.execute("DROP INDEX IF EXISTS deposits_customer")
+            self.conn.execute("ALTER TABLE deposits RENAME TO deposits_by_position")
+            self.conn.executescript(SCHEMA)
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO deposits (customer_id, amount, accrued, settled_day) "
+                    "SELECT customer_id, SUM(amount), SUM(accrued), MIN(settled_day) FROM deposits_by_position "
+                    "GROUP BY customer_id")
+                self.conn.execute("DROP TABLE deposits_by_position")
+        self.state = {}          # key: compact JSON of the last saved bank_state value
+        self.tables = {}         # key: compact JSON of the last saved central_loans
+        self.history_total = None  # the bank's history total at the last save (None: rewrite the table)
+
+    # The journal only applies to the JSON files
+    def enable_journal(self, enabled=True):
+        pass
+
+    def journal_enabled(self):
+        return False
+
+    # Rows are upserted one by one
+    def full_save_due(self):
+        return False
+
+    def saves_changes(self):
+        return True
+
+    # ---------- Customers ----------
+    def row_to_customer(self, row):
+        cid, credit_score, deposit_balance, deposits = row
+        return customer_record(cid, {"credit_score": credit_score, "deposit_balance": deposit_balance,
+                                     "deposits": json.loads(deposits)})
+
+    def load_customers(self):
+        return LazyCustomers(self)
+
+    def load_customer(self, cid):
+        """Read one customer without touching the rest of the table."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, credit_score, deposit_balance, deposits FROM customers WHERE id = ?", (cid,)
+            ).fetchone()
+        return None if row is None else self.row_to_customer(row)
+
+    def save_customers(self, customers, customer_ids=None):
+        if customer_ids is None:
+            rows = customers.loaded() if isinstance(customers, LazyCustomers) else customers
+            customer_ids = rows.keys()
+        # The deposits column only has entries in old databases; the deposits table has the deposits
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO customers (id, credit_score, deposit_balance, deposits) VALUES (?, ?, ?, '[]')",
+                [(cid, customers[cid]["credit_score"], customers[cid]["deposit_balance"])
+                 for cid in customer_ids if cid in customers]
+            )
+
+    # ---------- Bank ----------
+    def load_bank_data(self):
+        data = {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM bank_state")}
+        self.state = {key: compact_dumps(value) for key, value in data.items()}
+
+        data["loans"] = table_columns(self.conn.execute(
+            "SELECT amount, maturity_day, accrued, rate, customer_id, loan_id, "
+            "COALESCE(settled_day, maturity_day - days_left) FROM loans ORDER BY loan_id"
+        ).fetchall(), LOAN_COLUMNS, LOAN_DTYPES)
+        data["deposits"] = table_columns(self.conn.execute(
+            "SELECT amount, accrued, customer_id, COALESCE(settled_day, -1) FROM deposits ORDER BY customer_id"
+        ).fetchall(), DEPOSIT_COLUMNS, DEPOSIT_DTYPES)
+        data["central_loans"] = [list(row) for row in self.conn.execute(
+            "SELECT amount, days_left, accrued, rate FROM central_loans ORDER BY position")]
+        self.tables = {"central_loans": compact_dumps(data["central_loans"])}
+
+        funded = [cid for (cid,) in self.conn.execute("SELECT customer_id FROM funded_customers ORDER BY position")]
+        saved_funded = data.pop("funded_customers", None)
+        if saved_funded is not None:
+            # Databases from before the funded_customers table kept the ids in bank_state
+            self.state.pop("funded_customers")
+            with self.lock, self.conn:
+                self.conn.execute("DELETE FROM bank_state WHERE key = 'funded_customers'")
+                if not funded:
+                    self.save_funded(RowChanges([[p, cid] for p, cid in enumerate(saved_funded)], full=True))
+                    funded = saved_funded
+        # No rows: all balances are empty, or the database predates the ids (the bank recounts them)
+        if funded or saved_funded is not None:
+            data["funded_customers"] = funded
+
+        self.history_total = data.get("history_total")
+        if self.history_total is None:
+            history = self.conn.execute("SELECT day, description FROM history WHERE day > ? ORDER BY id",
+                                        (data.get("day", 0) - HISTORY_WINDOW,))
+        else:
+            history = self.conn.execute("SELECT day, description FROM history ORDER BY id")
+        data["history"] = [list(row) for row in history]
+        return data
+
+    def save_bank_data(self, data):
+        with self.lock, self.conn:
+            for key, value in data.items():
+                if key == "loans":
+                    self.save_loans(value)
+                elif key == "deposits":
+                    self.save_deposits(value)
+                elif key == "funded_customers":
+                    self.save_funded(value)
+                elif key == "central_loans":
+                    self.save_table(key, value)
+                elif key == "history":
+                    self.save_history(value, data.get("history_total"))
+                else:
+                    encoded = compact_dumps(value)
+                    if self.state.get(key) != encoded:
+                        self.state[key] = encoded
+                        self.conn.execute("INSERT OR REPLACE INTO bank_state (key, value) VALUES (?, ?)",
+                                          (key, encoded))
+
+    def save_loans(self, changes):
+        """
+        Upsert the changed loan rows and delete repaid ones (full changes
+        rewrite the table). Rows are settled state (LoanBook.take_changes);
+        days_left and accrued are stored as of settled_day.
+        """
+        if changes.full:
+            self.conn.execute("DELETE FROM loans")
+        if changes.rows:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO loans (loan_id, customer_id, amount, days_left, accrued, rate, maturity_day, "
+                "settled_day) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(loan_id, customer_id, amount, end_day - settled_day, accrued, rate, end_day, settled_day)
+                 for amount, end_day, accrued, rate, customer_id, loan_id, settled_day in changes.rows])
+        if changes.removed:
+            self.conn.executemany("DELETE FROM loans WHERE loan_id = ?", [(loan_id,) for loan_id in changes.removed])
+
+    def save_deposits(self, changes):
+        """Upsert the changed deposit rows (one per customer) and delete closed ones."""
+        if changes.full:
+            self.conn.execute("DELETE FROM deposits")
+        if changes.rows:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO deposits (customer_id, amount, accrued, settled_day) VALUES (?, ?, ?, ?)",
+                [(customer_id, amount, accrued, settled_day)
+                 for amount, accrued, customer_id, settled_day in changes.rows])
+        if changes.removed:
+            self.conn.executemany("DELETE FROM deposits WHERE customer_id = ?",
+                                  [(customer_id,) for customer_id in changes.removed])
+
+    def save_funded(self, changes):
+        """Write the changed [position, id] slots of the funded customer ids and drop the freed positions."""
+        if changes.full:
+            self.conn.execute("DELETE FROM funded_customers")
+        if changes.removed:
+            self.conn.executemany("DELETE FROM funded_customers WHERE position = ?",
+                                  [(position,) for position in changes.removed])
+        if changes.rows:
+            self.conn.executemany("INSERT OR REPLACE INTO funded_customers (position, customer_id) VALUES (?, ?)",
+                                  changes.rows)
+
+    def save_table(self, key, rows):
+        """Rewrite the central_loans table when it changed (it holds a handful of rows)."""
+        encoded = compact_dumps(rows)
+        if self.tables.get(key) == encoded:
+            return
+        self.tables[key] = encoded
+        self.conn.execute(f"DELETE FROM {key}")
+        self.conn.executemany(
+            "INSERT INTO central_loans (position, amount, days_left, accrued, rate) VALUES (?, ?, ?, ?, ?)",
+            [(i, *row) for i, row in enumerate(rows)])
+
+    def save_history(self, history, total):
+        """
+        Insert the entries appended since the last save (told by the bank's
+        running history `total`), then drop the rows that left the bank's
+        window with one DELETE by id. Without a known last total the table
+        is rewritten.
+        """
+        saved, self.history_total = self.history_total, total
+        if saved is not None and total is not None and 0 <= total - saved <= len(history):
+            new = history[len(history) - (total - saved):]
+        else:
+            self.conn.execute("DELETE FROM history")
+            new = history
+        if new:
+            self.conn.executemany("INSERT INTO history (day, description) VALUES (?, ?)",
+                                  [(day, description) for day, description in new])
+        self.conn.execute("DELETE FROM history WHERE id <= (SELECT MAX(id) FROM history) - ?", (len(history),))
+
+    def close(self):
+        self.conn.close()
+
+
+# ---------- Binary snapshot backend ----------
+SNAPSHOT_FORMAT = "banking-tycoon-snapshot"
+SNAPSHOT_VERSION = 3  # 1 stored loans with days_left instead of end_day/settled_day; 2 had customer deposit entries
+LOAN_COLUMNS = ("amount", "end_day", "accrued", "rate", "customer_id", "loan_id", "settled_day")
+LOAN_DTYPES = (np.float64, np.int64, np.float64, np.float64, np.int64, np.int64, np.int64)
+DEPOSIT_COLUMNS = ("amount", "accrued", "customer_id", "settled_day")
+DEPOSIT_DTYPES = (np.float64, np.float64, np.int64, np.int64)
+
+def write_snapshot(filepath, arrays):
+    """Write arrays plus a format header to an .npz file (via a temp file, so a crash keeps the old one)."""
+    header = compact_dumps({"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION})
+    try:
+        with atomic_write(filepath, "wb") as f:
+            np.savez(f, header=np.array(header), **arrays)
+    except Exception as e:
+        print(f"Error saving {filepath}: {e}")
+
+def read_snapshot(filepath):
+    """The arrays of a snapshot file, or None when it is missing or not in a known format."""
+    if not os.path.exists(filepath):
+        return None
+    try:
+        with np.load(filepath, allow_pickle=False) as npz:
+            header = json.loads(str(npz["header"]))
+            if header.get("format") != SNAPSHOT_FORMAT or header.get("version") not in (1, 2, SNAPSHOT_VERSION):
+                print(f"Unsupported snapshot {filepath}: {header}")
+                return None
+            return {key: npz[key] for key in npz.files}
+    except Exception as e:
+        print(f"Error loading {filepath}: {e}")
+        return None
+
+
+class SnapshotBackend:
+    """
+    Binary snapshots: the customer, loan and deposit tables are stored as
+    typed NumPy columns in .npz files with a format header; the rest of the
+    bank data is UTF-8 JSON inside the bank snapshot. Every save rewrites
+    the files.
+
+    Loading builds the CustomerTable, LoanBook and DepositBook straight from
+    the columns. Deposit entries in customer snapshots before version 3 stay
+    packed until Bank.load_data moves them into the DepositBook. When a
+    snapshot is missing or unreadable the `fallback` backend (the JSON
+    files by default) is loaded instead, so existing saves carry over.
+    """
+
+    def __init__(self, customer_file=SNAPSHOT_CUSTOMER_FILE, bank_file=SNAPSHOT_BANK_FILE, fallback=None):
+        os.makedirs(os.path.dirname(bank_file) or ".", exist_ok=True)
+        self.customer_file = customer_file
+        self.bank_file = bank_file
+        self.fallback = fallback if fallback is not None else JsonBackend()
+
+    # Snapshots are always whole files
+    def enable_journal(self, enabled=True):
+        pass
+
+    def journal_enabled(self):
+        return False
+
+    def full_save_due(self):
+        return True
+
+    def saves_changes(self):
+        return False
+
+    # ---------- Customers ----------
+    def load_customers(self):
+        arrays = read_snapshot(self.customer_file)
+        if arrays is None:
+            return self.fallback.load_customers()
+        packed = None
+        if "deposit_customer_id" in arrays:
+            packed = tuple(arrays[f"deposit_{name}"] for name in ("customer_id", "amount", "accrued", "settled_day"))
+        return CustomerTable.from_columns(arrays["ids"], arrays["credit_score"], arrays["deposit_balance"],
+                                          packed if packed and len(packed[0]) else None)
+
+    def save_customers(self, customers, customer_ids=None):
+        if not isinstance(customers, CustomerTable):
+            customers = CustomerTable(customers.items())
+        n = customers.size
+        write_snapshot(self.customer_file, {
+            "ids": customers.ids[:n],
+            "credit_score": customers.credit_score[:n],
+            "deposit_balance": customers.deposit_balance[:n],
+        })
+
+    # ---------- Bank ----------
+    def load_bank_data(self):
+        arrays = read_snapshot(self.bank_file)
+        if arrays is None:
+            return self.fallback.load_bank_data()
+        data = json.loads(arrays["bank"].tobytes().decode("utf-8"))
+        data["funded_customers"] = arrays["funded_customers"].tolist()
+        data["loans"] = {key[len("loan_"):]: arrays[key] for key in arrays if key.startswith("loan_")}
+        data["deposits"] = {key[len("deposit_"):]: arrays[key] for key in arrays if key.startswith("deposit_")}
+        return data
+
+    def save_bank_data(self, data):
+        data = plain_data(data)
+        loans = data.pop("loans", [])
+        deposits = data.pop("deposits", [])
+        funded = data.pop("funded_customers", [])
+        arrays = {"bank": np.frombuffer(compact_dumps(data).encode("utf-8"), dtype=np.uint8),
+                  "funded_customers": np.array(funded, dtype=np.int64)}
+        loan_columns = list(zip(*loans)) if loans else [()] * len(LOAN_COLUMNS)
+        for name, dtype, column in zip(LOAN_COLUMNS, LOAN_DTYPES, loan_columns):
+            arrays[f"loan_{name}"] = np.array(column, dtype=dtype)
+        arrays["deposit_amount"] = np.array([row[0] for row in deposits], dtype=np.float64)
+        arrays["deposit_accrued"] = np.array([row[1] for row in deposits], dtype=np.float64)
+        arrays["deposit_customer_id"] = np.array([row[2] for row in deposits], dtype=np.int64)
+        arrays["deposit_settled_day"] = np.array([row[3] if len(row) > 3 else -1 for row in deposits],
+                                                 dtype=np.int64)
+        write_snapshot(self.bank_file, arrays)
+
+
+# ---------- Active backend ----------
+_backend = JsonBackend()
+
+def set_backend(backend):
+    """Plug in a storage backend (JsonBackend, SqliteBackend or SnapshotBackend)."""
+    global _backend
+    _backend = backend
+
+def get_backend():
+    return _backend
+
+# ---------- Journal ----------
+def enable_journal(enabled=True):
+    """Switch the JSON backend's append-only journal on or off."""
+    _backend.enable_journal(enabled)
+
+def journal_enabled():
+    return _backend.journal_enabled()
+
+def full_save_due():
+    """True when the backend can not take a partial customer save right now."""
+    return _backend.full_save_due()
+
+def saves_changes():
+    """True when the backend saves the changed rows of the books (RowChanges) rather than whole lists."""
+    return _backend.saves_changes()
+
 # ---------- Customer-specific functions ----------
 def load_customers():
     """Load customers and ensure unique IDs and proper structure."""
-    raw_data = load_json(CUSTOMER_FILE)
-    customers = {}
-    for cid_str, info in raw_data.items():
-        try:
-            cid = int(cid_str)
-        except ValueError:
-            continue
-        customers[cid] = {
-            "id": cid,
-            "credit_score": info.get("credit_score", 300),
-            "loans": info.get("loans", []),
-            "deposits": info.get("deposits", []),
-            "deposit_balance": info.get("deposit_balance", 0.0)
-        }
-    return customers
+    return _backend.load_customers()
+
+def save_customers(customers, customer_ids=None):
+    """
+    Save customers to file.
 
-def save_customers(customers):
-    """Save customers to file."""
-    save_json(CUSTOMER_FILE, customers)
+    When `customer_ids` is given, backends that can write single records
+    (journal, SQLite) only write those; otherwise everything is saved.
+    """
+    _backend.save_customers(customers, customer_ids)
 
 # ---------- Bank-specific functions ----------
 def load_bank_data():
     """Load bank data, return empty dict if file doesn't exist."""
-    return load_json(BANK_FILE)
+    return _backend.load_bank_data()
 
 def save_bank_data(data):
     """Save bank data to file."""
-    save_json(BANK_FILE, data)
+    _backend.save_bank_data(data)
@@ -0,0 +1,67 @@
+# scheduler.py
+import heapq
+
+
+class EventCalendar:
+    """
+    Priority queue of scheduled game days: loan maturities, the interest
+    collection date, the tax date, the economy change and the market rotation.
+
+    Each entry is identified by (kind, key). Scheduling an entry again moves
+    it; the old heap item is left behind and skipped when it reaches the top,
+    so rescheduling and cancelling are O(log n) / O(1).
+
+    The calendar only has to contain every day that has real work: a stale
+    or early entry just means advance_day() runs on a day where nothing
+    special happens.
+    """
+
+    def __init__(self):
+        self.heap = []   # (day, seq, kind, key)
+        self.due = {}    # (kind, key): day
+        self.seq = 0
+
+    def __len__(self):
+        return len(self.due)
+
+    def schedule(self, day, kind, key=None):
+        if self.due.get((kind, key)) == day:
+            return
+        self.due[(kind, key)] = day
+        self.seq += 1
+        heapq.heappush(self.heap, (day, self.seq, kind, key))
+
+    def cancel(self, kind, key=None):
+        self.due.pop((kind, key), None)
+
+    def due_day(self, kind, key=None):
+        return self.due.get((kind, key))
+
+    def clear(self):
+        self.heap = []
+        self.due = {}
+
+    def _drop_stale(self):
+        heap = self.heap
+        while heap:
+            day, _, kind, key = heap[0]
+            if self.due.get((kind, key)) == day:
+                return
+            heapq.heappop(heap)
+
+    def next_day(self):
+        """The earliest scheduled day, or None."""
+        self._drop_stale()
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, today):
+        """Remove and return the (kind, key) of every entry due on or before `today`."""
+        due = []
+        heap = self.heap
+        while True:
+            self._drop_stale()
+            if not heap or heap[0][0] > today:
+                return due
+            _, _, kind, key = heapq.heappop(heap)
+            del self.due[(kind, key)]
+            due.append((kind, key))
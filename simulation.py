@@ -0,0 +1,166 @@
+# simulation.py
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+import saveload
+from bank import Bank
+from events import EVENT_RATES, deposit_event, withdraw_event, loan_request_event, draw_event_batch
+
+
+class Simulation:
+    """
+    Headless fast-forward for a Bank: advance_day plus random events,
+    with no tkinter and no per-day disk writes.
+
+    Saves are deferred to checkpoints every `checkpoint_interval` days
+    (and at the end of a run). Use checkpoint_interval=None to keep
+    everything in memory.
+
+    With jump=True the run draws the number of days until the next event
+    and lets the bank fast_forward() over the quiet days in between. The
+    event days follow the same distribution, but on_day is then only
+    called on the days the run stops at.
+
+    With event_rates ({"deposit": .., "withdraw": .., "loan": ..}, mean
+    events per day) every day instead runs a Poisson batch of events
+    (events.draw_event_batch); event_chance and jump are then ignored.
+    """
+
+    def __init__(self, bank, event_chance=0.5, checkpoint_interval=365, seed=None, approval_callback=None,
+                 pregenerate_economy=True, jump=False, event_rates=None):
+        self.bank = bank
+        self.jump = jump and not event_rates
+        self.event_rates = event_rates
+        self.rng = np.random.default_rng(seed)
+        self.pregenerate_economy = pregenerate_economy
+        self.event_chance = event_chance
+        self.checkpoint_interval = checkpoint_interval
+        self.approval_callback = approval_callback
+        self.events_run = 0
+        if seed is not None:
+            random.seed(seed)
+            bank.stock_market.rng = self.rng  # stock prices too
+
+    def simulate_event(self):
+        """Pick and run one event the same way BankingGUI.simulate_event does."""
+        event_funcs = [deposit_event, loan_request_event]
+        if self.bank.deposits:
+            event_funcs.append(withdraw_event)
+
+        evt_func = random.choice(event_funcs)
+        if evt_func == loan_request_event:
+            result = evt_func(self.bank, approval_callback=self.approval_callback)
+        else:
+            result = evt_func(self.bank)
+        self.events_run += 1
+        return result
+
+    def step(self):
+        """Advance one day and maybe run an event (or the day's batch of events)."""
+        self.bank.advance_day()
+        if self.event_rates:
+            self.simulate_batch()
+        elif random.random() < self.event_chance:
+            self.simulate_event()
+        return 1
+
+    def simulate_batch(self):
+        """Draw and apply one day of Poisson batched events."""
+        batch = draw_event_batch(self.bank, self.event_rates, self.rng)
+        self.events_run += sum(len(batch[key]) for key in ("deposit_amounts", "withdraw_amounts", "loan_amounts"))
+        return self.bank.apply_event_batch(batch)
+
+    def days_until_event(self):
+        """Draw the number of days until the next event (geometric); None if there are no events."""
+        if self.event_chance <= 0:
+            return None
+        if self.event_chance >= 1:
+            return 1
+        return 1 + int(math.log(1.0 - random.random()) / math.log(1.0 - self.event_chance))
+
+    def jump_step(self, max_days):
+        """Fast-forward to the next event day (at most `max_days` days) and run the event."""
+        gap = self.days_until_event()
+        days = max_days if gap is None else min(gap, max_days)
+        self.bank.fast_forward(days)
+        # Days without an event are memoryless, so a cut-short gap is simply drawn again
+        if days == gap:
+            self.simulate_event()
+        return days
+
+    def run(self, days, on_day=None):
+        """
+        Run `days` simulated days as fast as possible.
+        `on_day(bank)` is called after every day if given.
+
+        Returns a report dict with days, events, seconds and days_per_sec.
+        """
+        autosave = self.bank.autosave
+        self.bank.autosave = False
+        events_before = self.events_run
+        start = time.perf_counter()
+        if self.pregenerate_economy:
+            self.bank.pregenerate_economy(days)
+        try:
+            day = 0
+            while day < days:
+                max_days = days - day
+                if self.checkpoint_interval:
+                    max_days = min(max_days, self.checkpoint_interval - day % self.checkpoint_interval)
+                day += self.jump_step(max_days) if self.jump else self.step()
+                if on_day is not None:
+                    on_day(self.bank)
+                if self.checkpoint_interval and day % self.checkpoint_interval == 0:
+                    self.bank.checkpoint()
+            if self.checkpoint_interval and days % self.checkpoint_interval:
+                self.bank.checkpoint()
+        finally:
+            self.bank.autosave = autosave
+            self.bank.economy_path.clear()
+        seconds = time.perf_counter() - start
+
+        return {
+            "days": days,
+            "events": self.events_run - events_before,
+            "seconds": seconds,
+            "days_per_sec": days / seconds if seconds > 0 else float("inf"),
+            "day": self.bank.day,
+            "balance": self.bank.balance,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the bank without the GUI.")
+    parser.add_argument("--days", type=int, default=3650, help="number of days to simulate")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--event-chance", type=float, default=0.5, help="chance of an event each day")
+    parser.add_argument("--checkpoint", type=int, default=365, help="days between saves (0 = never save)")
+    parser.add_argument("--fresh", action="store_true", help="start from a new bank instead of the saved one")
+    parser.add_argument("--timings", action="store_true", help="print advance_day phase timings at the end")
+    parser.add_argument("--jump", action="store_true", help="jump over quiet days between events")
+    parser.add_argument("--rates", default=None, metavar="DEPOSIT,WITHDRAW,LOAN",
+                        help="run Poisson event batches with these mean events per day "
+                             f"(default rates: {','.join(str(r) for r in EVENT_RATES.values())})")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="save binary .npz snapshots (the JSON save is loaded if there is no snapshot yet)")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        saveload.set_backend(saveload.SnapshotBackend())
+
+    event_rates = None
+    if args.rates:
+        event_rates = dict(zip(EVENT_RATES, (float(r) for r in args.rates.split(","))))
+
+    sim = Simulation(Bank(load=not args.fresh), event_chance=args.event_chance,
+                     checkpoint_interval=args.checkpoint or None, seed=args.seed, jump=args.jump,
+                     event_rates=event_rates)
+    report = sim.run(args.days)
+    print(f"Simulated {report['days']} days ({report['events']} events) in {report['seconds']:.2f}s "
+          f"- {report['days_per_sec']:,.0f} days/sec. Day {report['day']}, balance ${report['balance']:,.2f}")
+    if args.timings:
+        print(sim.bank.timings.report())
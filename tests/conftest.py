@@ -0,0 +1,17 @@
+# conftest.py
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def game_dir(tmp_path, monkeypatch):
+    """A scratch working directory with the game's files/ (the bank reads and writes relative paths)."""
+    shutil.copytree(os.path.join(ROOT, "files"), tmp_path / "files")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,63 @@
+# test_bank.py
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from bank import Bank
+from history import HistoryLogger
+
+
+def test_pickle_with_logger_and_writer(game_dir):
+    bank = Bank(load=False)
+    bank.history_logger = HistoryLogger()
+    bank.start_writer()
+    try:
+        bank.deposit(500)
+        clone = pickle.loads(pickle.dumps(bank))
+    finally:
+        bank.stop_writer()
+        bank.history_logger.close()
+
+    assert clone.writer is None
+    assert clone.history_logger is None
+    assert clone.history.archive_writer is None
+    assert clone.balance == bank.balance
+    assert clone.history.to_list() == bank.history.to_list()
+    clone.deposit(250)  # the clone still runs, without logging or the writer thread
+    assert clone.balance == bank.balance + 250
+
+
+def seeded_bank():
+    random.seed(5)
+    bank = Bank(load=False)
+    bank.autosave = False
+    bank.balance = 1e7
+    for i in range(40):
+        bank.deposit(1000 + i * 37)
+    for i in range(30):
+        bank.give_loan(5000 + i * 11, years=(i % 4) + 0.1, rate=0.05, require_approval=False)
+    bank.borrow_central_bank(10000, 1)
+    random.seed(9)
+    bank.stock_market.rng = np.random.default_rng(1)
+    return bank
+
+
+def test_fast_forward_matches_daily_advance(game_dir):
+    daily = seeded_bank()
+    for _ in range(800):
+        daily.advance_day()
+    skipped = seeded_bank()
+    skipped.fast_forward(800)
+
+    assert skipped.day == daily.day
+    assert skipped.economic_status == daily.economic_status
+    assert len(skipped.loans) == len(daily.loans)
+    assert len(skipped.central_loans) == len(daily.central_loans)
+    assert skipped.balance == pytest.approx(daily.balance)
+    assert skipped.interest_earned == pytest.approx(daily.interest_earned)
+    totals, expected = skipped.totals(), daily.totals()
+    assert totals["credit_bands"] == expected["credit_bands"]
+    assert {k: v for k, v in totals.items() if k != "credit_bands"} == pytest.approx(
+        {k: v for k, v in expected.items() if k != "credit_bands"})
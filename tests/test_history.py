@@ -0,0 +1,18 @@
+# test_history.py
+import os
+
+from history import HistoryLogger
+
+
+def test_read_day_across_rotated_files(tmp_path):
+    logger = HistoryLogger(log_folder=str(tmp_path), max_bytes=2000, backup_count=5)
+    for day in range(1, 31):
+        for i in range(3):
+            logger.log(day, f"day {day} entry {i}")
+    logger.close()  # writes what is still queued
+
+    assert os.path.exists(tmp_path / "history.jsonl.2")
+    for day in range(1, 31):
+        assert [record["event"] for record in logger.read_day(day)] == [f"day {day} entry {i}" for i in range(3)]
+        assert {record["day"] for record in logger.read_day(day)} == {day}
+    assert logger.read_day(31) == []
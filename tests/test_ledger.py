@@ -0,0 +1,46 @@
+# test_ledger.py
+import pytest
+
+from ledger import DepositBook, LoanBook, RateIndex
+
+LOANS = {1: (5000.0, 90, 0.05), 2: (12000.0, 400, 0.08)}  # customer: (amount, days, rate)
+
+
+def test_lazy_accrual_matches_daily_accrual():
+    rates = RateIndex()
+    loans = LoanBook(rates)
+    deposits = DepositBook(rates, rate=0.01)
+    loan_ids = {cid: loans.add(amount, days, rate, cid) for cid, (amount, days, rate) in LOANS.items()}
+    deposits.add(2500.0, customer_id=1)
+
+    # The old advance_day: every loan with days left and every deposit accrues a day's interest
+    eager = {cid: 0.0 for cid in LOANS}
+    days_left = {cid: days for cid, (_, days, _) in LOANS.items()}
+    owed = 0.0
+    amount = 2500.0
+    multiplier = 1.0
+    for day in range(1, 176):
+        if day % 40 == 0:
+            multiplier = 1.0 + day / 200
+            rates.set_multiplier(day, multiplier)
+        rates.advance(day)
+        for cid, (principal, _, rate) in LOANS.items():
+            if days_left[cid] > 0:
+                eager[cid] += principal * rate * multiplier / 365
+                days_left[cid] -= 1
+        owed += amount * 0.01 * multiplier / 365
+        if day == 100:
+            deposits.change(1, 500.0)  # settles the row at the old amount first
+            amount += 500.0
+        if day == 120:
+            assert loans.collect_accrued() == pytest.approx(sum(eager.values()))
+            eager = {cid: 0.0 for cid in LOANS}
+
+    accrued = {row[4]: row[2] for row in loans.rows()}
+    assert accrued == {cid: pytest.approx(eager[cid]) for cid in LOANS}
+    assert loans.get(loan_ids[1])[1] == 0
+    assert loans.matured() == [loan_ids[1]]
+    loans.remove(loan_ids[1])  # repaid: accrued_total only counts the running loans
+    assert loans.accrued_total() == pytest.approx(eager[2])
+    assert deposits.accrued_of(1) == pytest.approx(owed)
+    assert deposits.owed_interest() == pytest.approx(owed)
@@ -0,0 +1,39 @@
+# test_ringbuffer.py
+import json
+from types import SimpleNamespace
+
+from ringbuffer import DayRingBuffer, RingBuffer
+
+
+def archived(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_pushed_out_entries_spill_to_the_archive(tmp_path):
+    archive = tmp_path / "feed.jsonl"
+    feed = RingBuffer(3, archive_file=str(archive), archive_batch=2)
+    feed.extend(range(6))
+    assert feed.to_list() == [3, 4, 5]
+    assert feed[-2:] == [4, 5]
+    assert feed.total == 6
+    assert archived(archive) == [0, 1]  # written a batch at a time
+    assert feed.spilled == [2]
+    feed.flush_archive()
+    assert archived(archive) == [0, 1, 2]
+
+    texts = []
+    feed.archive_writer = SimpleNamespace(append_archive=lambda path, text: texts.append((path, text)))
+    feed.extend([6, 7])
+    assert texts == [(str(archive), "3\n4\n")]  # handed to the writer thread instead
+
+
+def test_day_ring_buffer_expires_old_days(tmp_path):
+    archive = tmp_path / "history.jsonl"
+    feed = DayRingBuffer(10, max_age=3, archive_file=str(archive))
+    for day in range(6):
+        feed.append((day, f"entry {day}"))
+    feed.expire(6)
+    assert feed.to_list() == [(4, "entry 4"), (5, "entry 5")]
+    feed.flush_archive()
+    assert archived(archive) == [[day, f"entry {day}"] for day in range(4)]
@@ -0,0 +1,147 @@
+# test_saveload.py
+import os
+import random
+from functools import reduce
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import benchmark
+import saveload
+from bank import Bank
+from events import deposit_event, loan_request_event, withdraw_event
+
+
+def journaled_bank(customers):
+    backend = saveload.JsonBackend(f"data/customers_{customers}.json", f"data/bank_{customers}.json",
+                                   f"data/journal_{customers}.jsonl")
+    backend.enable_journal()
+    saveload.set_backend(backend)
+    bank = benchmark.build_bank(customers)
+    bank.autosave = True
+    bank.write_data()
+    bank.write_customers()
+    return bank, backend
+
+
+def journal_growth(backend, action):
+    before = os.path.getsize(backend.journal_file)
+    action()
+    return os.path.getsize(backend.journal_file) - before
+
+
+def test_deposit_journal_record_is_constant_size(game_dir):
+    sizes = []
+    for customers in (500, 4000):
+        bank, backend = journaled_bank(customers)
+        sizes.append(journal_growth(backend, lambda: bank.deposit(100, customer_id=5)))
+    # Only the digits of the balances differ, not anything per customer or per loan
+    assert abs(sizes[0] - sizes[1]) < 16
+    assert max(sizes) < 1024
+
+
+def test_journal_replays_rows(game_dir):
+    bank, backend = journaled_bank(500)
+    bank.deposit(100, customer_id=5)
+    bank.withdraw(50, customer_id=7)
+    for _ in range(3):
+        bank.advance_day()
+
+    loaded = Bank(load=False)
+    loaded.load_data()
+    assert sorted(loaded.loans.to_list()) == sorted(bank.loans.to_list())
+    assert sorted(loaded.deposits.to_list()) == sorted(bank.deposits.to_list())
+    assert loaded.history.to_list() == bank.history.to_list()
+    assert sorted(loaded.registry.funded) == sorted(bank.registry.funded)
+
+    backend.compact_journal(bank.customers)
+    compacted = Bank(load=False)
+    compacted.load_data()
+    assert sorted(compacted.loans.to_list()) == sorted(bank.loans.to_list())
+    assert compacted.history.to_list() == bank.history.to_list()
+
+
+def test_coalesced_saves_merge_changed_rows(game_dir):
+    bank, backend = journaled_bank(500)
+    bank.autosave = False
+    saves = []
+    bank.writer = SimpleNamespace(save_data=saves.append)  # what a busy SaveWriter would queue up
+    for day in range(40):
+        bank.advance_day()
+        bank.deposit(100, customer_id=5 + day)
+        bank.withdraw(30)
+        bank.write_data()
+    bank.writer = None
+    backend.save_bank_data(reduce(saveload.merge_bank_data, saves))
+
+    loaded = Bank(load=False)
+    loaded.load_data()
+    assert sorted(loaded.loans.to_list()) == sorted(bank.loans.to_list())
+    assert sorted(loaded.deposits.to_list()) == sorted(bank.deposits.to_list())
+    assert list(loaded.registry.funded) == list(bank.registry.funded)
+
+
+BACKENDS = {
+    "json": lambda: saveload.JsonBackend("data/customers.json", "data/bank.json", "data/journal.jsonl"),
+    "journal": lambda: saveload.JsonBackend("data/customers.json", "data/bank.json", "data/journal.jsonl"),
+    "sqlite": lambda: saveload.SqliteBackend("data/bank.db"),
+    "snapshot": lambda: saveload.SnapshotBackend("data/customers.npz", "data/bank.npz"),
+}
+
+
+def use_backend(name):
+    backend = BACKENDS[name]()
+    if name == "journal":
+        backend.enable_journal()
+    saveload.set_backend(backend)
+
+
+def play(bank, days, seed):
+    random.seed(seed)
+    bank.stock_market.rng = np.random.default_rng(seed)
+    for _ in range(days):
+        bank.advance_day()
+        r = random.random()
+        if r < 0.3:
+            deposit_event(bank)
+        elif r < 0.6:
+            loan_request_event(bank)
+        elif r < 0.8:
+            withdraw_event(bank)
+
+
+def bank_state(bank):
+    return {
+        "day": bank.day,
+        "balance": pytest.approx(bank.balance),
+        "totals": {k: v if isinstance(v, dict) else pytest.approx(v) for k, v in bank.totals().items()},
+        "loans": sorted(bank.loans.to_list()),
+        "deposits": sorted(bank.deposits.to_list()),
+        "funded": list(bank.registry.funded),
+        "history": bank.history.to_list(),
+        "next_customer_id": bank.next_customer_id,
+    }
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_backend_save_reload_and_continue(game_dir, monkeypatch, backend):
+    monkeypatch.setattr(saveload, "_backend", saveload.get_backend())  # restored afterwards
+    use_backend(backend)
+    bank = Bank(load=False)  # autosaves as it goes: later saves only write the changes
+    bank.economic_change_interval = 40
+    play(bank, 120, seed=1)
+    bank.write_data()
+    bank.write_customers()
+
+    use_backend(backend)  # a fresh backend instance, as on the next start
+    loaded = Bank(load=False)
+    loaded.economic_change_interval = 40
+    loaded.load_data()
+    assert bank_state(loaded) == bank_state(bank)
+
+    # Only the loaded bank writes from here on (SQLite loads customers lazily from the store)
+    bank.autosave = False
+    for each in (bank, loaded):
+        play(each, 60, seed=2)
+    assert bank_state(loaded) == bank_state(bank)
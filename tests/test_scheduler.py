@@ -0,0 +1,24 @@
+# test_scheduler.py
+from scheduler import EventCalendar
+
+
+def test_rescheduled_and_cancelled_entries_are_skipped():
+    calendar = EventCalendar()
+    calendar.schedule(5, "tax")
+    calendar.schedule(5, "tax")  # same day again: no new heap item
+    calendar.schedule(3, "loans", 3)
+    calendar.schedule(9, "tax")  # moved: the day 5 item is stale now
+    calendar.schedule(4, "market")
+    calendar.cancel("market")
+    assert len(calendar.heap) == 4
+    assert len(calendar) == 2
+
+    assert calendar.next_day() == 3
+    assert calendar.pop_due(8) == [("loans", 3)]
+    assert calendar.next_day() == 9
+    calendar.schedule(7, "tax")  # moved earlier: the day 9 item is stale now
+    assert calendar.due_day("tax") == 7
+    assert calendar.pop_due(10) == [("tax", None)]
+    assert calendar.next_day() is None
+    assert len(calendar) == 0
+    assert calendar.heap == []
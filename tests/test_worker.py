@@ -0,0 +1,39 @@
+# test_worker.py
+from bank import Bank
+from worker import SimulationWorker, SnapshotBuffer
+
+
+def test_snapshot_buffer_keeps_the_newest():
+    buffer = SnapshotBuffer()
+    assert buffer.latest() == (0, None)
+    buffer.publish({"day": 1})
+    buffer.publish({"day": 2})
+    assert buffer.latest() == (2, {"day": 2})
+
+
+def test_worker_runs_commands_in_order_and_publishes_them(game_dir):
+    bank = Bank(load=False)
+    bank.autosave = False
+    worker = SimulationWorker(bank, day_duration=0.01, speed=10).start()
+    try:
+        done = []
+        futures = [worker.submit(done.append, i) for i in range(50)]
+        for future in futures:
+            future.result(timeout=5)
+        assert done == list(range(50))
+
+        # A command's result is in the snapshot that is out when it returns
+        day = worker.call(lambda: bank.day)
+        version, snapshot = worker.snapshots.latest()
+        assert snapshot["day"] >= day
+
+        # Snapshots only move forward
+        for _ in range(20):
+            worker.call(lambda: None)
+            newer, snapshot_now = worker.snapshots.latest()
+            assert newer > version
+            assert snapshot_now["day"] >= snapshot["day"]
+            version, snapshot = newer, snapshot_now
+    finally:
+        worker.stop()
+    assert bank.day >= snapshot["day"]
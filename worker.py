@@ -0,0 +1,244 @@
+# worker.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+SPEEDS = (1, 10, 100, None)  # game clock: days per day_duration (None = as fast as possible)
+STEP_BUDGET = 0.05           # seconds of ticking before the worker looks at its commands again
+PUBLISH_INTERVAL = 0.05      # at most 20 snapshots a second, however many days run
+MAX_CATCH_UP = 1.0           # seconds' worth of late days made up after a stall; the rest are dropped
+
+
+class SnapshotBuffer:
+    """
+    Double buffer between the simulation thread and the GUI.
+
+    The worker builds each snapshot on its own (the back buffer) and
+    publish() swaps it in as the front one; readers only ever see complete
+    snapshots. Snapshots are never mutated after publishing, so the GUI can
+    keep rendering one while the next is being built.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.front = None
+        self.version = 0  # bumped on every publish
+
+    def publish(self, snapshot):
+        with self.lock:
+            self.front = snapshot
+            self.version += 1
+
+    def latest(self):
+        """(version, snapshot) of the newest published snapshot."""
+        with self.lock:
+            return self.version, self.front
+
+
+class SimulationWorker:
+    """
+    Runs the simulation on its own thread: `tick(bank)` `speed` times every
+    `day_duration` seconds while not paused (speed=None: as fast as it
+    goes). Days that come due while a tick runs long are caught up in the
+    next frame, within STEP_BUDGET, so the clock keeps its pace; the days
+    of one frame are saved together in a single bank.batch(). Snapshots
+    (bank.snapshot() with the `view` arguments set by request_snapshot())
+    are published after every batch of commands and at most every
+    PUBLISH_INTERVAL while ticking, so high speeds are not spent building
+    snapshots nobody will draw.
+
+    The worker is the only thread that touches the Bank. Other threads
+    send it commands and render from the published snapshots:
+
+        worker = SimulationWorker(bank, tick=simulate_day)
+        worker.start()
+        worker.call(bank.borrow_central_bank, 1000, 5)  # runs on the worker, returns its result
+        version, snapshot = worker.snapshots.latest()
+        worker.stop()
+
+    A tick that needs an answer from the GUI thread (a loan approval
+    dialog) uses ask(); the GUI answers from its own loop with
+    answer_prompts(). The worker keeps running commands while it waits.
+    """
+
+    def __init__(self, bank, tick=None, day_duration=1.0, speed=1):
+        self.bank = bank
+        self.tick = tick if tick is not None else (lambda b: b.advance_day())
+        self.day_duration = day_duration
+        self.speed = speed
+        self.paused = False
+        self.running = False
+        self.ticks = 0
+        self.commands = queue.Queue()  # (future, fn, args, kwargs), run on the worker
+        self.prompts = queue.Queue()   # (future, fn, args), answered on the GUI thread
+        self.snapshots = SnapshotBuffer()
+        self.view = {}  # keyword arguments for bank.snapshot() (the GUI's scroll positions)
+        self.published_at = 0.0
+        self.stale = False  # days have run since the last publish
+        self.thread = None
+
+    # ---------- Other threads ----------
+    def start(self):
+        if self.thread is None:
+            self.running = True
+            self.snapshots.publish(self.bank.snapshot(**self.view))
+            self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """Finish the current tick and stop the thread; pending commands still run."""
+        if self.thread is None:
+            return
+        self.running = False
+        self.commands.put(None)  # wake the thread up
+        self.thread.join()
+        self.thread = None
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) to run on the worker; returns a Future."""
+        future = Future()
+        if self.thread is None or threading.current_thread() is self.thread:
+            outcome = self.execute(fn, args, kwargs)
+            if self.thread is None:
+                self.publish()
+            else:
+                self.stale = True  # published with the rest of this tick
+            self.resolve(future, outcome)
+        else:
+            self.commands.put((future, fn, args, kwargs))
+        return future
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn on the worker, wait for it and return its result (the latest snapshot already shows it)."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def request_snapshot(self, **view):
+        """Change some snapshot arguments and have a fresh snapshot published."""
+        self.view = dict(self.view, **view)
+        if self.thread is None:
+            self.snapshots.publish(self.bank.snapshot(**self.view))
+        else:
+            self.commands.put((Future(), lambda: None, (), {}))  # any command ends with a publish
+
+    def answer_prompts(self):
+        """Run the prompts the worker is waiting on (call from the GUI thread)."""
+        while True:
+            try:
+                future, fn, args = self.prompts.get_nowait()
+            except queue.Empty:
+                return
+            self.resolve(future, self.execute(fn, args, {}))
+
+    # ---------- Worker thread ----------
+    def ask(self, fn, *args):
+        """Have the GUI thread run fn(*args) and wait for its result (None if stopped meanwhile)."""
+        if self.thread is None:
+            return fn(*args)
+        future = Future()
+        self.prompts.put((future, fn, args))
+        while not future.done():
+            if not self.running:
+                return None
+            self.run_commands(0.05)
+        return future.result()
+
+    @staticmethod
+    def execute(fn, args, kwargs):
+        """Run one command; returns (result, exception) to hand to resolve()."""
+        try:
+            return fn(*args, **kwargs), None
+        except Exception as e:
+            return None, e
+
+    @staticmethod
+    def resolve(future, outcome):
+        result, error = outcome
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def run_commands(self, timeout):
+        """
+        Run queued commands, waiting up to `timeout` seconds for the first.
+        Their futures are resolved only after the snapshot showing their
+        effects is published. True if any ran.
+        """
+        try:
+            job = self.commands.get(timeout=timeout) if timeout > 0 else self.commands.get_nowait()
+        except queue.Empty:
+            return False
+        done = []
+        while True:
+            if job is not None:
+                future, fn, args, kwargs = job
+                done.append((future, self.execute(fn, args, kwargs)))
+            try:
+                job = self.commands.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            if done:
+                self.publish()
+        finally:
+            for future, outcome in done:
+                self.resolve(future, outcome)
+        return bool(done)
+
+    def publish(self):
+        self.snapshots.publish(self.bank.snapshot(**self.view))
+        self.published_at = time.monotonic()
+        self.stale = False
+
+    def step(self):
+        try:
+            self.tick(self.bank)
+        except Exception as e:
+            print(f"Error in simulation tick: {e}")
+        self.ticks += 1
+        self.stale = True
+
+    def run(self):
+        last = time.monotonic()
+        due = 0.0  # days the clock owes (fractional)
+        while self.running:
+            now = time.monotonic()
+            speed = self.speed
+            rate = None if speed is None else speed / self.day_duration  # days per second
+            if self.paused:
+                due = 0.0
+            elif rate is None:
+                due = float("inf")
+            else:
+                due = min(due + (now - last) * rate, max(1.0, rate * MAX_CATCH_UP))
+            last = now
+
+            # Catch-up stepping: the days that are due, within this frame's budget, saved once
+            if due >= 1 and not self.paused:
+                deadline = now + STEP_BUDGET
+                with self.bank.batch():
+                    while due >= 1 and self.running and not self.paused and time.monotonic() < deadline:
+                        self.step()
+                        due -= 1
+            if rate is None:
+                due = 0.0
+
+            now = time.monotonic()
+            if self.stale and now - self.published_at >= PUBLISH_INTERVAL:
+                self.publish()
+
+            # Wait for commands until the next day is due (or a held-back snapshot should go out)
+            if self.paused:
+                timeout = 0.1
+            elif rate is None or due >= 1:
+                timeout = 0
+            else:
+                timeout = min((1 - due) / rate, 0.1)
+            if self.stale:
+                timeout = min(timeout, max(self.published_at + PUBLISH_INTERVAL - now, 0))
+            self.run_commands(timeout)
+        self.run_commands(0)
+        if self.stale:
+            self.publish()
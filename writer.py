@@ -0,0 +1,120 @@
+# writer.py
+import json
+import queue
+import threading
+
+import saveload
+
+STOP = object()
+
+
+class SaveWriter:
+    """
+    Background thread that does the bank's disk writes, so the Tk thread
+    never waits on the disk.
+
+    The game thread hands over detached copies (nothing the live Bank will
+    mutate again) with the save_*() methods. Everything that queued up while
+    the previous write was running is coalesced into one write: whole files
+    keep only the newest version, bank data too except for the changed rows
+    of the books (RowChanges), which are merged, customer records are
+    merged by id (on top of a pending full save, if any) and archive lines
+    are appended in order.
+
+        writer = SaveWriter(saveload.get_backend())
+        writer.save_data(data)
+        writer.flush()     # block until everything queued so far is on disk
+        writer.shutdown()  # flush, then stop the thread
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else saveload.get_backend()
+        self.queue = queue.Queue()
+        self.writes = 0  # coalesced writes done (for tests and the timings panel)
+        self.thread = threading.Thread(target=self.run, name="save-writer", daemon=True)
+        self.thread.start()
+
+    # ---------- Game thread ----------
+    def save_data(self, data):
+        self.queue.put(("data", data))
+
+    def save_customers(self, customers, customer_ids=None):
+        """`customers` must be a copy; customer_ids=None means it holds every customer to save."""
+        self.queue.put(("customers", customers, None if customer_ids is None else list(customer_ids)))
+
+    def append_archive(self, filepath, text):
+        self.queue.put(("archive", filepath, text))
+
+    def save_json(self, filepath, data):
+        self.queue.put(("json", filepath, data))
+
+    def flush(self):
+        """Wait until everything submitted so far has been written."""
+        if self.thread.is_alive():
+            self.queue.join()
+
+    def shutdown(self):
+        """Write what is pending and stop the thread."""
+        if self.thread.is_alive():
+            self.queue.put(STOP)
+            self.thread.join()
+
+    # ---------- Writer thread ----------
+    def run(self):
+        while True:
+            jobs = [self.queue.get()]
+            while True:
+                try:
+                    jobs.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.write([job for job in jobs if job is not STOP])
+            except Exception as e:
+                print(f"Error in background save: {e}")
+            finally:
+                for _ in jobs:
+                    self.queue.task_done()
+            if STOP in jobs:
+                return
+
+    def write(self, jobs):
+        archives = {}   # filepath: [text]
+        files = {}      # filepath: data
+        data = None
+        full = None     # latest full customer save
+        records = {}    # customer_id: record saved after it
+        for kind, *args in jobs:
+            if kind == "archive":
+                archives.setdefault(args[0], []).append(args[1])
+            elif kind == "json":
+                files[args[0]] = args[1]
+            elif kind == "data":
+                data = args[0] if data is None else saveload.merge_bank_data(data, args[0])
+            elif kind == "customers":
+                customers, customer_ids = args
+                if customer_ids is None:
+                    full, records = customers, {}
+                elif full is not None:
+                    for cid in customer_ids:
+                        full[cid] = customers[cid]
+                else:
+                    records.update(customers)
+        if not (archives or files or data is not None or full is not None or records):
+            return
+
+        for filepath, texts in archives.items():
+            saveload.append_text(filepath, "".join(texts))
+        if data is not None:
+            self.backend.save_bank_data(data)
+        if full is not None:
+            self.backend.save_customers(full)
+        if records:
+            self.backend.save_customers(records, list(records))
+        for filepath, content in files.items():
+            try:
+                with saveload.atomic_write(filepath) as f:
+                    json.dump(content, f, indent=2)
+            except Exception as e:
+                print(f"Error saving {filepath}: {e}")
+        self.writes += 1